@@ -0,0 +1,673 @@
+"""
+임보/입양 상담 설문 일괄 매칭 모듈
+상담 설문 응답 CSV를 신청자 프로필로 변환하고, 프로필마다 하드 필터와 쿼리 문장을 만든 뒤
+한 번의 일괄 임베딩과 필터 그룹별 행렬-행렬 곱으로 신청자별 상위 N마리를 찾는다.
+결과는 신청자 단위로 바로 파일에 기록한다.
+
+ReverseMatcher는 반대 방향(신규 동물 → 적합 신청자)을 증분으로 유지한다.
+
+사용법:
+    python adopter_matching.py [설문 CSV] [--store animal_embeddings] [--top-n 10] [--output adopter_matches.csv]
+    python adopter_matching.py [설문 CSV] --reverse     # 신청자 임베딩 행렬 추가 + 동물별 상위 신청자 테이블 재생성
+"""
+
+import os
+import re
+import csv
+import json
+import hashlib
+import time
+import sqlite3
+from datetime import datetime
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from vector_index import normalize_rows, top_k_indices
+from animal_features import SIZE_CODES, GENDER_CODES, REGION_BITS, REGION_UNKNOWN
+
+
+DEFAULT_SURVEY_FILE = os.path.join('data', '핌피 임보_입양 상담(응답) - 설문지 응답.csv')
+
+# 설문 문항 → 내부 컬럼명 (문항 끝 공백은 로드 시 제거)
+SURVEY_COLUMNS = {
+    '타임스탬프': 'submitted_at',
+    '성함': 'name',
+    '현황': 'status',
+    '관심 있는 아이가 있다면 말씀주세요': 'interested_in',
+    '거주 지역': 'region',
+    '동거 가족에 대해 알려주세요.': 'household',
+    '임보 가능한 최대 기간은 대략 어느 정도일까요?': 'max_period',
+    '평균적으로 하루에 집이 비는 시간이 어느 정도 일까요?': 'hours_away',
+    '반려동물이 있거나 과거 경험이 있다면 말씀주세요': 'pet_experience',
+    '기타 문의사항 및 특이사항이 있다면 말씀주세요': 'notes',
+    '어떤 목적으로 문의를 주셨을까요?': 'purpose',
+    '관심 동물': 'species',
+}
+
+# 매칭 대상에서 제외하는 상담 현황
+EXCLUDED_STATUSES = ('취소', '블랙', '신청포기')
+
+NO_ANSWER = {'', '-', 'x', 'X', '없음', '없습니다', '없어요', '無', '.'}
+
+NUMBER = r'(\d+(?:\.\d+)?)'
+PERIOD_PATTERN = re.compile(NUMBER + r'\s*(?:~|-)?\s*(?:' + NUMBER + r')?\s*(개월|달|년|주)')
+HOURS_PATTERN = re.compile(NUMBER + r'\s*(?:~|-)?\s*(?:' + NUMBER + r')?\s*시간')
+CLOCK_RANGE_PATTERN = re.compile(r'(\d{1,2})\s*(?:시\s*(?:\d{1,2}\s*분?|반)?|:\d{2})?\s*(?:~|-|부터|to)\s*'
+                                 r'(?:오전|오후|저녁)?\s*(\d{1,2})')
+# 집이 거의 비지 않는다는 응답
+AT_HOME_KEYWORDS = ('거의 없', '거의없', '항상', '하루종일', '하루 종일', '계속', '집에 있', '집에있', '상주', '비지 않',
+                    '비어있지 않', '시간이 없', '드뭄', '드물', '전업주부', '재택', '데리고', '동반출',
+                    '같이 회사', '없음', '없습니다', '집에 계', '집에서', '안 비')
+CHILD_PATTERN = re.compile(r'(아들|딸|아이|자녀|초등|유치원|[1-9]\s*세|[1-9]\s*살)')
+
+# 거주 지역 응답 → 동물 임보 가능 지역(animal_features.FOSTER_REGIONS) 구분
+# 임보 가능 지역 선택지에 인천이 없어서 인천은 경기(수도권)로 본다. 응답에서 가장 앞에 나온 지명 기준.
+REGION_KEYWORDS = {
+    '서울': ('서울', '강남구', '강동구', '강북구', '강서구', '관악구', '광진구', '구로구', '금천구', '노원구', '도봉구',
+           '동대문구', '동작구', '마포구', '서대문구', '서초구', '성동구', '성북구', '송파구', '양천구', '영등포',
+           '용산구', '은평구', '종로구', '중랑구'),
+    '경기': ('경기', '인천', '송도', '연수구', '부평', '계양', '수원', '성남', '분당', '판교', '안양', '평촌', '부천', '광명', '평택', '안산', '고양', '일산',
+           '과천', '구리', '남양주', '오산', '시흥', '군포', '의왕', '하남', '용인', '파주', '이천', '안성', '김포',
+           '화성', '동탄', '양주', '포천', '여주', '동두천', '가평', '양평', '연천', '의정부', '위례'),
+    '강원': ('강원', '춘천', '원주', '강릉', '속초', '삼척', '태백', '동해'),
+    '충청': ('충청', '충남', '충북', '대전', '세종', '천안', '아산', '청주', '충주', '제천', '당진', '서산', '공주', '논산', '예산'),
+    '전라': ('전라', '전남', '전북', '광주', '전주', '익산', '군산', '여수', '순천', '목포', '광양', '나주'),
+    '경상': ('경상', '경남', '경북', '부산', '대구', '울산', '창원', '김해', '양산', '진주', '포항', '구미', '경주',
+           '안동', '거제', '통영', '경산', '문경', '영주', '김천'),
+}
+
+
+def _text(value) -> str:
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ''
+    return str(value).strip()
+
+
+def _answered(value: str) -> bool:
+    return value not in NO_ANSWER
+
+
+def stable_adopter_id(submitted_at, name) -> int:
+    """설문 제출 시각 + 성함 해시로 만든 신청자 번호 (설문 행 순서가 바뀌어도 유지, 연락처는 쓰지 않음)"""
+    digest = hashlib.sha1(f"{_text(submitted_at)}|{_text(name)}".encode('utf-8')).hexdigest()
+    return int(digest[:15], 16)   # 60비트 → SQLite INTEGER / int64 범위
+
+
+def parse_period_months(text: str) -> Optional[float]:
+    """'3-6개월', '1년', '최소 3개월 ~1년' 등에서 가능한 최대 임보 기간(개월)"""
+    text = _text(text)
+    if not text:
+        return None
+    
+    months = []
+    for low, high, unit in PERIOD_PATTERN.findall(text):
+        value = float(high or low)
+        months.append(value * {'개월': 1, '달': 1, '년': 12, '주': 0.25}[unit])
+    if months:
+        return max(months)
+    if '한달' in text or '한 달' in text:
+        return 1.0
+    if '단기' in text:
+        return 1.0
+    if '입양' in text or '장기' in text:
+        return 12.0
+    return None
+
+
+def parse_hours_away(text: str) -> Optional[float]:
+    """'4-5시간', '9-6', '평일 11시간' 등에서 하루 최대 빈집 시간"""
+    text = _text(text)
+    if not text:
+        return None
+    
+    hours = [float(high or low) for low, high in HOURS_PATTERN.findall(text)]
+    if hours:
+        return max(hours)
+    if '한 시간' in text or '한시간' in text:
+        return 1.0
+    if not _answered(text) or any(keyword in text for keyword in AT_HOME_KEYWORDS):
+        return 0.0
+    
+    # '9-6', '9시부터 6시까지'처럼 출퇴근 시각으로 답한 경우
+    clock = CLOCK_RANGE_PATTERN.search(text)
+    if clock:
+        start, end = int(clock.group(1)), int(clock.group(2))
+        if end <= start:
+            end += 12
+        return float(end - start)
+    
+    number = re.fullmatch(NUMBER, text)
+    return float(number.group(1)) if number else None
+
+
+@dataclass
+class AdopterProfile:
+    """설문 응답 1건에서 만든 신청자 프로필"""
+    adopter_id: int
+    name: str
+    status: str
+    region: str
+    period_months: Optional[float]
+    hours_away: Optional[float]
+    has_experience: bool
+    has_resident_dog: bool
+    has_resident_cat: bool
+    has_children: bool
+    wants_dog: bool
+    notes: str
+    interested_in: str
+    preferences: Dict = field(default_factory=dict)
+    query_text: str = ''
+
+
+def load_survey(path: str = DEFAULT_SURVEY_FILE) -> pd.DataFrame:
+    """설문 응답 CSV 로드 (문항명을 내부 컬럼명으로 변경)"""
+    df = pd.read_csv(path)
+    df.columns = [str(column).strip() for column in df.columns]
+    df = df.rename(columns=SURVEY_COLUMNS)
+    for column in SURVEY_COLUMNS.values():
+        if column not in df.columns:
+            df[column] = ''
+    return df
+
+
+def parse_region(text: str) -> Optional[str]:
+    """'서울시 강서구 화곡동' → '서울', '수원시 영통구' → '경기', 알 수 없으면 None"""
+    text = _text(text)
+    found = [(position, region) for region, keywords in REGION_KEYWORDS.items()
+             for position in (text.find(keyword) for keyword in keywords) if position >= 0]
+    return min(found)[1] if found else None
+
+
+def derive_preferences(notes: str, region: str = '', period_months: Optional[float] = None) -> Dict:
+    """설문 응답에서 하드 필터 추출
+    
+    size/age/gender는 자유 응답(notes)에서, region/period는 구조화된 문항(거주 지역, 최대 임보 기간)에서 가져온다.
+    region은 동물의 임보 가능 지역에, period는 동물의 최소 임보 기간에 대한 조건이다.
+    extract_user_preferences는 '남'만으로도 성별을 잡아서 '남편', '남양주' 같은 설문 문장에는 쓰지 않는다.
+    """
+    preferences = {'size': None, 'age': None, 'gender': None,
+                   'region': parse_region(region), 'period': period_months}
+    
+    if any(keyword in notes for keyword in ('대형견은 무리', '대형견은 어렵', '대형견 불가', '원룸', '집이 좁')):
+        preferences['size'] = '소형'
+    elif '소형견' in notes or '소형' in notes:
+        preferences['size'] = '소형'
+    elif '중형견' in notes:
+        preferences['size'] = '중형'
+    elif '대형견' in notes and '무리' not in notes:
+        preferences['size'] = '대형'
+    
+    if any(keyword in notes for keyword in ('노견', '시니어', '나이 많은')):
+        preferences['age'] = '고령'
+    elif any(keyword in notes for keyword in ('퍼피', '아기 강아지', '어린 아이', '새끼')):
+        preferences['age'] = '어린'
+    
+    if any(keyword in notes for keyword in ('남아', '수컷')):
+        preferences['gender'] = '남'
+    elif any(keyword in notes for keyword in ('여아', '암컷')):
+        preferences['gender'] = '여'
+    
+    return preferences
+
+
+def build_query_text(profile: AdopterProfile) -> str:
+    """프로필을 동물 임베딩 텍스트와 비교할 자연어 쿼리로 변환"""
+    parts = []
+    
+    if profile.hours_away is not None:
+        if profile.hours_away >= 8:
+            parts.append("혼자 있는 시간을 잘 견디고 분리불안이 없는 독립적인 아이")
+        elif profile.hours_away <= 3:
+            parts.append("사람과 함께 있는 시간을 좋아하는 애교 많은 아이")
+    if profile.has_resident_dog:
+        parts.append("다른 강아지와 잘 지내는 사회성 좋은 아이")
+    if profile.has_resident_cat:
+        parts.append("고양이와도 잘 지내는 아이")
+    if profile.has_children:
+        parts.append("아이들과 잘 지내는 순하고 친화적인 아이")
+    if not profile.has_experience:
+        parts.append("첫 반려동물로 키우기 쉬운 순한 아이")
+    if profile.period_months is not None and profile.period_months >= 6:
+        parts.append("장기 임시보호나 입양을 기다리는 아이")
+    elif profile.period_months is not None and profile.period_months <= 1:
+        parts.append("단기 임시보호가 필요한 아이")
+    
+    if _answered(profile.notes):
+        parts.append(profile.notes[:300])
+    if _answered(profile.interested_in):
+        parts.append(f"관심 있는 아이: {profile.interested_in[:100]}")
+    
+    return ' / '.join(parts) if parts else "사람을 좋아하는 순한 아이"
+
+
+def build_profiles(survey_df: pd.DataFrame, excluded_statuses=EXCLUDED_STATUSES) -> List[AdopterProfile]:
+    """설문 응답을 신청자 프로필 목록으로 변환 (제외 현황/고양이만 희망한 응답은 제외)
+    
+    adopter_id는 제출 시각 + 성함 기준이라 같은 응답이 두 번 있으면 뒤의 응답만 남긴다.
+    """
+    profiles = {}
+    for row in survey_df.to_dict('records'):
+        adopter_id = stable_adopter_id(row['submitted_at'], row['name'])
+        profiles.pop(adopter_id, None)
+        status = _text(row['status'])
+        species = _text(row['species'])
+        if status in excluded_statuses:
+            continue
+        wants_dog = (not species) or ('개' in species) or ('둘 다' in species)
+        if not wants_dog:
+            continue
+        
+        experience = _text(row['pet_experience'])
+        household = _text(row['household'])
+        notes = _text(row['notes'])
+        region = _text(row['region'])
+        period_months = parse_period_months(row['max_period'])
+        
+        profile = AdopterProfile(
+            adopter_id=adopter_id,
+            name=_text(row['name']),
+            status=status,
+            region=region,
+            period_months=period_months,
+            hours_away=parse_hours_away(row['hours_away']),
+            has_experience=_answered(experience),
+            has_resident_dog=any(keyword in experience for keyword in ('현재', '키우고', '키웁니다', '있습니다')) and
+                             any(keyword in experience for keyword in ('강아지', '반려견', '견', '개')),
+            has_resident_cat=any(keyword in experience for keyword in ('고양이', '냥')),
+            has_children=bool(CHILD_PATTERN.search(household)),
+            wants_dog=wants_dog,
+            notes=notes,
+            interested_in=_text(row['interested_in']),
+            preferences=derive_preferences(notes, region, period_months),
+        )
+        profile.query_text = build_query_text(profile)
+        profiles[adopter_id] = profile
+    
+    return list(profiles.values())
+
+
+def profile_signature(profile: AdopterProfile) -> str:
+    """역매칭에 쓰는 신청자 값(현황/필터/쿼리 문장) 해시 — 달라지면 신청자 행을 다시 만든다"""
+    values = [profile.status, profile.region, json.dumps(profile.preferences, ensure_ascii=False, sort_keys=True),
+              profile.query_text]
+    return hashlib.sha1('\x1f'.join(values).encode('utf-8')).hexdigest()
+
+
+def match_adopters(processor, profiles: List[AdopterProfile], output_path: str, top_n: int = 10,
+                   available_only: bool = True, block_size: int = 4096) -> Dict:
+    """신청자 프로필 일괄 매칭 후 결과를 CSV로 기록
+    
+    Args:
+        processor: 임베딩 저장소가 로드된 GPTEmbeddingProcessor
+    
+    Returns:
+        처리 통계 (신청자 수, 매칭 행 수, 구간별 소요 시간)
+    """
+    started = time.time()
+    
+    # 1. 프로필 쿼리 일괄 임베딩 (쿼리 캐시 + 토큰 기준 배치)
+    query_vectors = processor.embed_queries([profile.query_text for profile in profiles])
+    embedded_at = time.time()
+    
+    # 2. 하드 필터 그룹별 행렬-행렬 곱
+    preferences = [profile.preferences for profile in profiles]
+    hits = processor.search_batch(query_vectors, preferences, top_n, available_only, block_size)
+    searched_at = time.time()
+    
+    # 3. 신청자 단위로 바로 기록 (필요한 컬럼만 한 번씩 배열로 꺼내 둠)
+    df = processor.processed_df
+    uids = df['uid'].to_numpy() if 'uid' in df.columns else df.index.to_numpy()
+    names = df['addinfo01'].to_numpy() if 'addinfo01' in df.columns else uids
+    
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    
+    rows_written = 0
+    unmatched = 0
+    with open(output_path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(['adopter_id', 'adopter_name', 'status', 'region', 'filters', 'rank',
+                         'animal_uid', 'animal_name', 'similarity', 'link', 'query_text'])
+        for profile, (top_indices, top_scores) in zip(profiles, hits):
+            if not len(top_indices):
+                unmatched += 1
+                continue
+            filters = ','.join(f"{k}={v}" for k, v in profile.preferences.items() if v is not None)
+            for rank, (idx, score) in enumerate(zip(top_indices, top_scores), 1):
+                uid = uids[idx]
+                writer.writerow([profile.adopter_id, profile.name, profile.status, profile.region, filters, rank,
+                                 uid, names[idx], f"{score:.4f}",
+                                 f"https://www.pimfyvirus.com/search/01_v/{uid}", profile.query_text])
+                rows_written += 1
+    
+    finished = time.time()
+    stats = {
+        'adopters': len(profiles),
+        'unmatched': unmatched,
+        'rows': rows_written,
+        'embed_seconds': embedded_at - started,
+        'search_seconds': searched_at - embedded_at,
+        'write_seconds': finished - searched_at,
+        'total_seconds': finished - started,
+    }
+    print(f"✅ 신청자 {stats['adopters']}명 매칭 완료 → {output_path} ({rows_written}행, 후보 없음 {unmatched}명)")
+    print(f"   ⏱️  임베딩 {stats['embed_seconds']:.1f}초, 검색 {stats['search_seconds']:.2f}초, 기록 {stats['write_seconds']:.2f}초")
+    return stats
+
+
+REVERSE_INDEX_DIR = 'adopter_index'
+ADOPTER_MATRIX_FILE = 'adopter_embeddings.npy'
+ADOPTER_TABLE_FILE = 'adopters.csv'
+ADOPTER_MANIFEST_FILE = 'manifest.json'
+BEST_ADOPTERS_DB = 'best_adopters.sqlite'
+
+NO_PREFERENCE = -2
+AGE_PREF_CODES = {'어린': 1, '고령': 2}
+NO_PERIOD = np.inf
+
+
+class ReverseMatcher:
+    """신규 동물 → 적합 신청자 역매칭
+    
+    신청자 프로필 임베딩 행렬(정규화, .npy)과 신청자 표를 저장해 두고,
+    동기화 때 새로 들어온 동물 k마리만 (신청자 수 x k) 행렬 곱으로 점수화해서
+    동물별 상위 신청자 테이블(SQLite)의 해당 동물 행만 교체한다.
+    """
+    
+    def __init__(self, store_dir: str, top_n: int = 10):
+        self.store_dir = store_dir
+        self.top_n = top_n
+        self.matrix = None
+        self.adopters = None
+        self.manifest = {}
+        
+        os.makedirs(store_dir, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(store_dir, BEST_ADOPTERS_DB))
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS best_adopters ("
+            "animal_uid TEXT NOT NULL, rank INTEGER NOT NULL, adopter_id INTEGER NOT NULL, "
+            "similarity REAL NOT NULL, matched_at TEXT NOT NULL, PRIMARY KEY (animal_uid, rank))"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS best_adopters_adopter ON best_adopters (adopter_id)")
+        self.conn.commit()
+        
+        if os.path.exists(os.path.join(store_dir, ADOPTER_MATRIX_FILE)):
+            self.load()
+    
+    @property
+    def ready(self) -> bool:
+        return self.matrix is not None and len(self.matrix) > 0
+    
+    def load(self):
+        """신청자 임베딩 행렬과 신청자 표 로드"""
+        with open(os.path.join(self.store_dir, ADOPTER_MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.matrix = np.load(os.path.join(self.store_dir, ADOPTER_MATRIX_FILE))
+        self.adopters = pd.read_csv(os.path.join(self.store_dir, ADOPTER_TABLE_FILE), encoding='utf-8-sig',
+                                    keep_default_na=False)
+        self._refresh_preferences()
+        print(f"👥 신청자 임베딩 로드: {len(self.adopters)}명 ({self.matrix.shape[1]}차원)")
+    
+    def save(self):
+        """신청자 행렬/표/매니페스트를 임시 파일에 쓴 뒤 교체"""
+        matrix_path = os.path.join(self.store_dir, ADOPTER_MATRIX_FILE)
+        np.save(matrix_path + '.tmp.npy', self.matrix)
+        os.replace(matrix_path + '.tmp.npy', matrix_path)
+        
+        table_path = os.path.join(self.store_dir, ADOPTER_TABLE_FILE)
+        self.adopters.to_csv(table_path + '.tmp', index=False, encoding='utf-8-sig')
+        os.replace(table_path + '.tmp', table_path)
+        
+        manifest_path = os.path.join(self.store_dir, ADOPTER_MANIFEST_FILE)
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+    
+    def _refresh_preferences(self):
+        """신청자 하드 필터를 코드 배열로 변환 (동물 특성 배열과 바로 비교하기 위함)"""
+        self.adopter_ids = self.adopters['adopter_id'].to_numpy(dtype=np.int64)
+        self.size_pref = np.array([SIZE_CODES.get(v, NO_PREFERENCE) for v in self.adopters['size']], dtype=np.int8)
+        self.gender_pref = np.array([GENDER_CODES.get(v, NO_PREFERENCE) for v in self.adopters['gender']], dtype=np.int8)
+        self.age_pref = np.array([AGE_PREF_CODES.get(v, 0) for v in self.adopters['age']], dtype=np.int8)
+        # 이전 버전 표에는 지역/기간 컬럼이 없음 (조건 없음으로 취급)
+        for column in ('foster_region', 'period'):
+            if column not in self.adopters.columns:
+                self.adopters[column] = ''
+        self.region_pref = np.array([REGION_BITS.get(v, REGION_UNKNOWN) for v in self.adopters['foster_region']],
+                                    dtype=np.uint8)
+        self.period_pref = pd.to_numeric(self.adopters['period'], errors='coerce').fillna(NO_PERIOD) \
+            .to_numpy(dtype=np.float32)
+    
+    def add_adopters(self, processor, profiles: List[AdopterProfile]) -> int:
+        """현재 설문 기준으로 신청자 행렬 동기화 (adopter_id 기준)
+        
+        설문에서 빠졌거나(신청포기/취소 등 제외 현황 포함) 현황/필터/쿼리 문장이 바뀐 신청자는
+        행렬과 상위 신청자 테이블에서 지우고, 그 신청자가 들어 있던 동물은 다시 매칭한다.
+        새로 추가된 신청자는 이후 동기화되는 동물부터 매칭된다. 기존 동물까지 다시 매칭하려면 rebuild_table 사용.
+        """
+        affected_uids = []
+        if self.ready:
+            self._check_compatible(processor)
+            current = {profile.adopter_id: profile_signature(profile) for profile in profiles}
+            stored = self.adopters['signature'] if 'signature' in self.adopters.columns else [''] * len(self.adopters)
+            stale = [adopter_id for adopter_id, signature in zip(self.adopter_ids.tolist(), stored)
+                     if current.get(adopter_id) != signature]
+            affected_uids = self.remove_adopters(stale)
+            known = set(self.adopter_ids.tolist()) if self.ready else set()
+            profiles = [profile for profile in profiles if profile.adopter_id not in known]
+        if not profiles:
+            if affected_uids:
+                self.sync_animals(processor, affected_uids)
+            return 0
+        
+        vectors = processor.embed_queries([profile.query_text for profile in profiles])
+        embedded = [(profile, vector) for profile, vector in zip(profiles, vectors) if vector is not None]
+        if not embedded:
+            return 0
+        
+        new_matrix = normalize_rows(np.array([vector for _, vector in embedded], dtype=np.float32))
+        new_adopters = pd.DataFrame([{
+            'adopter_id': profile.adopter_id,
+            'name': profile.name,
+            'status': profile.status,
+            'region': profile.region,
+            'size': profile.preferences.get('size') or '',
+            'gender': profile.preferences.get('gender') or '',
+            'age': profile.preferences.get('age') or '',
+            'foster_region': profile.preferences.get('region') or '',
+            'period': profile.preferences.get('period') if profile.preferences.get('period') is not None else '',
+            'query_text': profile.query_text,
+            'signature': profile_signature(profile),
+        } for profile, _ in embedded])
+        
+        if self.matrix is not None and len(self.matrix):
+            self.matrix = np.vstack([self.matrix, new_matrix])
+            self.adopters = pd.concat([self.adopters, new_adopters], ignore_index=True)
+        else:
+            self.matrix = new_matrix
+            self.adopters = new_adopters
+        
+        self.manifest = {
+            'model': processor.model,
+            'embedding_dim': int(self.matrix.shape[1]),
+            'adopters': len(self.adopters),
+            'updated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        self._refresh_preferences()
+        self.save()
+        print(f"👥 신청자 임베딩 추가: {len(embedded)}명 → 전체 {len(self.adopters)}명")
+        if affected_uids:
+            self.sync_animals(processor, affected_uids)
+        return len(embedded)
+    
+    def remove_adopters(self, adopter_ids) -> List:
+        """신청자 행렬/표와 상위 신청자 테이블에서 삭제
+        
+        Returns:
+            삭제된 신청자가 상위 목록에 있던 동물 uid 목록 (다시 매칭해야 순위가 채워짐)
+        """
+        adopter_ids = [int(adopter_id) for adopter_id in adopter_ids]
+        if not adopter_ids or not self.ready:
+            return []
+        
+        affected = set()
+        with self.conn:
+            for adopter_id in adopter_ids:
+                affected.update(uid for (uid,) in self.conn.execute(
+                    "SELECT animal_uid FROM best_adopters WHERE adopter_id = ?", (adopter_id,)))
+            self.conn.executemany("DELETE FROM best_adopters WHERE adopter_id = ?",
+                                  [(adopter_id,) for adopter_id in adopter_ids])
+        
+        keep = ~np.isin(self.adopter_ids, adopter_ids)
+        self.matrix = self.matrix[keep]
+        self.adopters = self.adopters[keep].reset_index(drop=True)
+        self.manifest['adopters'] = len(self.adopters)
+        self._refresh_preferences()
+        self.save()
+        print(f"👥 신청자 제외: {int((~keep).sum())}명 (철회/현황 변경) → 전체 {len(self.adopters)}명")
+        return sorted(affected)
+    
+    def _check_compatible(self, processor):
+        """신청자 행렬과 동물 임베딩 저장소의 모델/차원이 같은지 확인"""
+        animal_dim = processor.normalized_embeddings.shape[1]
+        if self.manifest.get('model') != processor.model or self.matrix.shape[1] != animal_dim:
+            raise ValueError(f"신청자 행렬({self.manifest.get('model')}, {self.matrix.shape[1]}차원)이 "
+                             f"임베딩 저장소({processor.model}, {animal_dim}차원)와 다릅니다. "
+                             f"{self.store_dir}를 지우고 다시 생성하세요.")
+    
+    def compatible_mask(self, features) -> np.ndarray:
+        """(신청자 수, 동물 수) 하드 필터 호환 마스크 (신청자가 원한 크기/성별/나이/임보 지역/기간을 만족하는 동물만 True)"""
+        size = self.size_pref[:, None]
+        gender = self.gender_pref[:, None]
+        age = self.age_pref[:, None]
+        young = features.age_mask('어린')[None, :]
+        senior = features.age_mask('고령')[None, :]
+        
+        mask = (size == NO_PREFERENCE) | (size == features.size[None, :])
+        mask &= (gender == NO_PREFERENCE) | (gender == features.gender[None, :])
+        mask &= (age == 0) | ((age == AGE_PREF_CODES['어린']) & young) | ((age == AGE_PREF_CODES['고령']) & senior)
+        
+        # 임보 가능 지역/최소 임보 기간을 모르는 동물은 제외하지 않음 (AnimalFeatures.residual_mask와 같은 기준)
+        region = self.region_pref[:, None]
+        foster_region = features.foster_region[None, :]
+        mask &= (region == REGION_UNKNOWN) | (foster_region == REGION_UNKNOWN) | ((foster_region & region) != 0)
+        min_period = features.min_period[None, :]
+        mask &= (min_period < 0) | (min_period <= self.period_pref[:, None])
+        return mask
+    
+    def score_animals(self, animal_vectors: np.ndarray, features) -> List:
+        """동물 k마리에 대한 동물별 상위 신청자 [(adopter_id 배열, 유사도 배열), ...]"""
+        scores = self.matrix @ np.asarray(animal_vectors, dtype=np.float32).T
+        scores[~self.compatible_mask(features)] = -np.inf
+        
+        results = []
+        for j in range(scores.shape[1]):
+            column = scores[:, j]
+            top = top_k_indices(column, self.top_n)
+            top = top[np.isfinite(column[top])]
+            results.append((self.adopter_ids[top], column[top]))
+        return results
+    
+    def _upsert(self, uids, results):
+        """동물별 상위 신청자 행 교체 (해당 동물 행만 삭제 후 삽입)"""
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        rows = [(str(uid), rank, int(adopter_id), float(score), now)
+                for uid, (adopter_ids, scores) in zip(uids, results)
+                for rank, (adopter_id, score) in enumerate(zip(adopter_ids, scores), 1)]
+        with self.conn:
+            self.conn.executemany("DELETE FROM best_adopters WHERE animal_uid = ?", [(str(uid),) for uid in uids])
+            self.conn.executemany("INSERT INTO best_adopters VALUES (?, ?, ?, ?, ?)", rows)
+        return len(rows)
+    
+    def sync_animals(self, processor, uids, block_size: int = 1024) -> int:
+        """신규/변경 동물만 점수화해서 테이블에 반영 (비용은 신규 동물 수 x 신청자 수)"""
+        if not self.ready or not len(uids):
+            return 0
+        self._check_compatible(processor)
+        
+        rows = np.flatnonzero(processor.processed_df['uid'].isin(list(uids)).to_numpy())
+        matched_uids = processor.processed_df['uid'].to_numpy()[rows]
+        
+        written = 0
+        for start in range(0, len(rows), block_size):
+            block = rows[start:start + block_size]
+            results = self.score_animals(processor.normalized_embeddings[block], processor.features.take(block))
+            written += self._upsert(matched_uids[start:start + block_size], results)
+        
+        print(f"🤝 역매칭 갱신: 동물 {len(rows)}마리 x 신청자 {len(self.adopters)}명 → {written}행")
+        return len(rows)
+    
+    def remove_animals(self, uids) -> int:
+        """임보가능 상태가 아닌 동물의 행 삭제"""
+        if not len(uids):
+            return 0
+        with self.conn:
+            cursor = self.conn.executemany("DELETE FROM best_adopters WHERE animal_uid = ?",
+                                           [(str(uid),) for uid in uids])
+        return cursor.rowcount
+    
+    def rebuild_table(self, processor, block_size: int = 1024) -> int:
+        """저장소의 입양 가능 동물 전체로 테이블 재생성 (최초 생성/신청자 대량 추가 후)"""
+        with self.conn:
+            self.conn.execute("DELETE FROM best_adopters")
+        available = processor.processed_df.loc[processor.features.available, 'uid']
+        return self.sync_animals(processor, available.tolist(), block_size)
+    
+    def best_adopters(self, uid) -> List[Dict]:
+        """동물 한 마리의 상위 신청자 목록"""
+        cursor = self.conn.execute(
+            "SELECT rank, adopter_id, similarity, matched_at FROM best_adopters WHERE animal_uid = ? ORDER BY rank",
+            (str(uid),)
+        )
+        adopters = self.adopters.set_index('adopter_id') if self.ready else None
+        results = []
+        for rank, adopter_id, similarity, matched_at in cursor.fetchall():
+            result = {'rank': rank, 'adopter_id': adopter_id, 'similarity': similarity, 'matched_at': matched_at}
+            if adopters is not None and adopter_id in adopters.index:
+                result.update(adopters.loc[adopter_id, ['name', 'status', 'region']].to_dict())
+            results.append(result)
+        return results
+    
+    def close(self):
+        self.conn.close()
+
+
+# 사용 예시
+if __name__ == "__main__":
+    import argparse
+    from config import Config
+    from embedding_processor import GPTEmbeddingProcessor
+    from embedding_cache import QueryEmbeddingCache
+    
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="상담 설문 신청자 일괄 매칭")
+    parser.add_argument('survey', nargs='?', default=os.path.join(script_dir, '..', DEFAULT_SURVEY_FILE))
+    parser.add_argument('--store', default=os.path.join(script_dir, 'animal_embeddings'))
+    parser.add_argument('--top-n', type=int, default=10)
+    parser.add_argument('--output', default=os.path.join(script_dir, 'adopter_matches.csv'))
+    parser.add_argument('--reverse', action='store_true', help="동물별 상위 신청자 테이블 생성")
+    args = parser.parse_args()
+    
+    profiles = build_profiles(load_survey(args.survey))
+    print(f"📋 설문 응답 → 매칭 대상 신청자 {len(profiles)}명")
+    
+    processor = GPTEmbeddingProcessor(
+        api_key=Config.OPENAI_API_KEY,
+        model=Config.OPENAI_MODEL,
+        query_cache=QueryEmbeddingCache(os.path.join(script_dir, 'query_cache.pkl'),
+                                        max_entries=max(Config.QUERY_CACHE_MAX_ENTRIES, len(profiles) * 2),
+                                        ttl_seconds=Config.QUERY_CACHE_TTL_SECONDS),
+    )
+    processor.load_embeddings(args.store)
+    if args.reverse:
+        matcher = ReverseMatcher(os.path.join(script_dir, REVERSE_INDEX_DIR), top_n=Config.REVERSE_MATCH_TOP_N)
+        matcher.add_adopters(processor, profiles)
+        matcher.rebuild_table(processor)
+        matcher.close()
+    else:
+        match_adopters(processor, profiles, args.output, top_n=args.top_n)
+    processor.query_cache.save()
@@ -0,0 +1,230 @@
+"""
+동물 필터용 파생 컬럼 모듈
+몸무게, 출생 연월, 나이(개월), 성별, 크기, 입양 가능 여부, 임보 가능 지역/최소 임보 기간을 로드 시 한 번만 계산해서
+NumPy 배열로 보관한다. 하드 필터는 이 배열에 대한 비교 연산만 수행한다.
+"""
+
+import re
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+# 크기 구분 (apply_hard_filters 기준: 소형 <7kg, 중형 7-20kg, 대형 ≥20kg)
+SIZE_UNKNOWN, SIZE_SMALL, SIZE_MEDIUM, SIZE_LARGE = -1, 0, 1, 2
+SIZE_CODES = {'소형': SIZE_SMALL, '중형': SIZE_MEDIUM, '대형': SIZE_LARGE}
+SMALL_MAX_WEIGHT = 7
+MEDIUM_MAX_WEIGHT = 20
+
+GENDER_UNKNOWN, GENDER_MALE, GENDER_FEMALE = -1, 0, 1
+GENDER_CODES = {'남': GENDER_MALE, '여': GENDER_FEMALE}
+
+# 나이 구분 (개월 수 기준, 달력에 따라 자동으로 이동)
+YOUNG_MAX_MONTHS = 36    # 3살 미만
+SENIOR_MIN_MONTHS = 108  # 9살 이상
+
+AVAILABLE_STATE = '임보가능'
+
+BIRTH_PATTERN = re.compile(r'(\d{4})\D{0,2}(\d{1,2})?')
+
+# 임보 가능 지역 (addinfo12, '서울,경기,충청도' / '전국') → 지역별 비트, 미상은 0 (지역 조건에서 제외하지 않음)
+FOSTER_REGIONS = ('서울', '경기', '강원', '충청', '전라', '경상')
+REGION_BITS = {region: 1 << i for i, region in enumerate(FOSTER_REGIONS)}
+REGION_UNKNOWN = 0
+NATIONWIDE_BITS = (1 << len(FOSTER_REGIONS)) - 1
+
+# 임보 기간 조건 (addinfo13 + addinfo13sub01 + addinfo13sub02, '3 개월 이상') → 최소 임보 기간(개월), 미상은 -1
+PERIOD_COLUMNS = ('addinfo13', 'addinfo13sub01', 'addinfo13sub02')
+PERIOD_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*(개월|달|년|주)?')
+PERIOD_UNIT_MONTHS = {'개월': 1, '달': 1, '년': 12, '주': 0.25, '': 1}
+
+
+def parse_birth(value):
+    """'2020', '202003추정', '2020년 추정', '2020.03' 형태의 출생 정보를 (연도, 월)로 변환"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None, None
+
+    value_str = str(value).replace("추정", "").strip()
+    match = BIRTH_PATTERN.match(value_str)
+    if not match:
+        return None, None
+
+    year = int(match.group(1))
+    # 월 정보가 있으면 사용, 없으면 1월로 기본 처리 (DBLoader.EDA.calculate_age와 동일)
+    month = int(match.group(2)) if match.group(2) else 1
+    if not 1 <= month <= 12:
+        month = 1
+    return year, month
+
+
+def parse_foster_regions(value) -> int:
+    """'서울,경기,충청도' → 서울|경기|충청 비트, '전국' → 전체 비트, 미상 → 0"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return REGION_UNKNOWN
+    text = str(value)
+    if '전국' in text:
+        return NATIONWIDE_BITS
+    bits = REGION_UNKNOWN
+    for region, bit in REGION_BITS.items():
+        if region in text:
+            bits |= bit
+    return bits
+
+
+def parse_min_period(value) -> int:
+    """'3 개월 이상', '1년', '2 개월 이하' 등에서 최소 임보 기간(개월), '이하'는 0, 미상은 -1"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return -1
+    text = str(value)
+    match = PERIOD_PATTERN.search(text)
+    if not match:
+        return -1
+    if '이하' in text or '이내' in text:
+        return 0
+    return int(round(float(match.group(1)) * PERIOD_UNIT_MONTHS[match.group(2) or '']))
+
+
+def calculate_age_months(year, month, today: Optional[datetime] = None):
+    """출생 연월 기준 현재 나이(개월)"""
+    if year is None:
+        return None
+    today = today or datetime.today()
+    return (today.year - year) * 12 + (today.month - month)
+
+
+class AnimalFeatures:
+    """processed_df 행 순서와 정렬된 필터용 배열 묶음"""
+
+    def __init__(self, weight, birth_year, age_months, gender, size, available, foster_region=None,
+                 min_period=None):
+        rows = len(available)
+        self.weight = weight            # float32, 미상은 NaN
+        self.birth_year = birth_year    # int16, 미상은 0
+        self.age_months = age_months    # int16, 미상은 -1
+        self.gender = gender            # int8 (GENDER_*)
+        self.size = size                # int8 (SIZE_*)
+        self.available = available      # bool
+        # uint8 (REGION_BITS 조합), 미상은 0
+        self.foster_region = foster_region if foster_region is not None else np.zeros(rows, dtype=np.uint8)
+        # int16 (개월), 미상은 -1
+        self.min_period = min_period if min_period is not None else np.full(rows, -1, dtype=np.int16)
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, today: Optional[datetime] = None) -> 'AnimalFeatures':
+        today = today or datetime.today()
+        rows = len(df)
+
+        weight = pd.to_numeric(df['addinfo07'], errors='coerce').to_numpy(dtype=np.float32) \
+            if 'addinfo07' in df.columns else np.full(rows, np.nan, dtype=np.float32)
+
+        size = np.full(rows, SIZE_UNKNOWN, dtype=np.int8)
+        size[weight < SMALL_MAX_WEIGHT] = SIZE_SMALL
+        size[(weight >= SMALL_MAX_WEIGHT) & (weight < MEDIUM_MAX_WEIGHT)] = SIZE_MEDIUM
+        size[weight >= MEDIUM_MAX_WEIGHT] = SIZE_LARGE
+
+        birth_year = np.zeros(rows, dtype=np.int16)
+        age_months = np.full(rows, -1, dtype=np.int16)
+        if 'addinfo05' in df.columns:
+            # 같은 표기가 반복되는 경우가 많아 고유값 단위로 파싱
+            parsed = {value: parse_birth(value) for value in pd.unique(df['addinfo05'])}
+            for i, value in enumerate(df['addinfo05']):
+                year, month = parsed[value]
+                if year is not None:
+                    birth_year[i] = year
+                    age_months[i] = max(0, calculate_age_months(year, month, today))
+
+        gender = df['addinfo03'].map(GENDER_CODES).fillna(GENDER_UNKNOWN).to_numpy(dtype=np.int8) \
+            if 'addinfo03' in df.columns else np.full(rows, GENDER_UNKNOWN, dtype=np.int8)
+
+        available = (df['state'] == AVAILABLE_STATE).to_numpy() \
+            if 'state' in df.columns else np.ones(rows, dtype=bool)
+
+        foster_region = np.zeros(rows, dtype=np.uint8)
+        if 'addinfo12' in df.columns:
+            parsed = {value: parse_foster_regions(value) for value in pd.unique(df['addinfo12'])}
+            foster_region = df['addinfo12'].map(parsed).to_numpy(dtype=np.uint8)
+
+        min_period = np.full(rows, -1, dtype=np.int16)
+        period_columns = [column for column in PERIOD_COLUMNS if column in df.columns]
+        if period_columns:
+            period_text = df[period_columns].fillna('').astype(str).agg(' '.join, axis=1)
+            parsed = {value: parse_min_period(value) for value in pd.unique(period_text)}
+            min_period = period_text.map(parsed).to_numpy(dtype=np.int16)
+
+        return cls(weight, birth_year, age_months, gender, size, available, foster_region, min_period)
+
+    def take(self, order: np.ndarray) -> 'AnimalFeatures':
+        """행 순서를 바꾼 새 배열 묶음"""
+        return AnimalFeatures(self.weight[order], self.birth_year[order], self.age_months[order],
+                              self.gender[order], self.size[order], self.available[order],
+                              self.foster_region[order], self.min_period[order])
+
+    def __len__(self) -> int:
+        return len(self.available)
+
+    def size_mask(self, size_label: str) -> np.ndarray:
+        return self.size == SIZE_CODES[size_label]
+
+    def gender_mask(self, gender_label: str) -> np.ndarray:
+        return self.gender == GENDER_CODES.get(gender_label, GENDER_UNKNOWN)
+
+    def age_mask(self, age_label: str, start: int = None, stop: int = None) -> np.ndarray:
+        """나이 조건 마스크 (start/stop을 주면 해당 행 구간만 계산)"""
+        return self._age_condition(self.age_months[start:stop], age_label)
+    
+    def age_mask_at(self, age_label: str, rows: np.ndarray) -> np.ndarray:
+        """주어진 행 번호들에 대한 나이 조건 마스크 (ANN 후보 필터용)"""
+        return self._age_condition(self.age_months[rows], age_label)
+    
+    @staticmethod
+    def _age_condition(age_months: np.ndarray, age_label: str) -> np.ndarray:
+        known = age_months >= 0
+        if age_label == '어린':
+            return known & (age_months < YOUNG_MAX_MONTHS)
+        if age_label == '고령':
+            return known & (age_months >= SENIOR_MIN_MONTHS)
+        return np.ones(len(age_months), dtype=bool)
+
+    @staticmethod
+    def has_residual_conditions(preferences: Dict) -> bool:
+        """파티션 정렬 키(입양 가능/크기/성별)로 표현되지 않는 조건(나이/임보 지역/임보 기간)이 있는지"""
+        return bool(preferences.get('age') or preferences.get('region')) or preferences.get('period') is not None
+
+    def residual_mask(self, preferences: Dict, start: int = None, stop: int = None) -> np.ndarray:
+        """나이/임보 지역/임보 기간 조건 마스크 (start/stop을 주면 해당 행 구간만 계산)"""
+        return self._residual_condition(preferences, slice(start, stop))
+
+    def residual_mask_at(self, preferences: Dict, rows: np.ndarray) -> np.ndarray:
+        """주어진 행 번호들에 대한 나이/임보 지역/임보 기간 조건 마스크 (ANN/어휘 검색 후보 필터용)"""
+        return self._residual_condition(preferences, rows)
+
+    def _residual_condition(self, preferences: Dict, index) -> np.ndarray:
+        age_months = self.age_months[index]
+        mask = self._age_condition(age_months, preferences.get('age'))
+        if preferences.get('region'):
+            # 임보 가능 지역을 모르는 동물은 제외하지 않음
+            region = self.foster_region[index]
+            mask &= (region == REGION_UNKNOWN) | ((region & REGION_BITS.get(preferences['region'], 0)) != 0)
+        if preferences.get('period') is not None:
+            # 신청자가 가능한 최대 기간 ≥ 동물의 최소 임보 기간 (미상은 제외하지 않음)
+            min_period = self.min_period[index]
+            mask &= (min_period < 0) | (min_period <= preferences['period'])
+        return mask
+
+    def hard_filter_mask(self, preferences: Dict, available_only: bool = True) -> np.ndarray:
+        """선호도(size/gender/age/region/period)와 입양 가능 여부를 결합한 마스크"""
+        mask = self.available.copy() if available_only else np.ones(len(self), dtype=bool)
+        if preferences.get('size'):
+            mask &= self.size_mask(preferences['size'])
+        if preferences.get('gender'):
+            mask &= self.gender_mask(preferences['gender'])
+        if self.has_residual_conditions(preferences):
+            mask &= self.residual_mask(preferences)
+        return mask
+
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in (self.weight, self.birth_year, self.age_months,
+                                              self.gender, self.size, self.available,
+                                              self.foster_region, self.min_period))
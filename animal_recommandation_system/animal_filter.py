@@ -8,25 +8,398 @@
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Optional, Union, Tuple
+from collections import OrderedDict, namedtuple
+from itertools import chain
 import re
+import threading
+
+
+# 요청 태그/성격 목록별 계산 결과 캐시 크기 (사용자 입력이 키라서 상한을 둠)
+QUERY_CACHE_SIZE = 256
+
+
+# 컬럼 통계로 추정할 수 없는 조건의 통과 비율 (dict 컬럼이 있는 동물 중)
+DEFAULT_SELECTIVITY = {
+    'behavior_traits': 0.5,
+    'health_requirements': 0.7,
+    'care_preferences': 0.7,
+}
+
+# 필터 계획의 한 단계: 추정 통과 비율과 (AnimalColumns, 위치 배열) → boolean 마스크 함수
+FilterStep = namedtuple('FilterStep', ['name', 'selectivity', 'mask'])
+
+
+def _cache_get(cache: OrderedDict, key):
+    """LRU 캐시 조회 (있으면 최근 사용으로 이동)"""
+    value = cache.get(key)
+    if value is not None:
+        try:
+            cache.move_to_end(key)
+        except KeyError:
+            pass  # 공유 인스턴스(Streamlit 세션들)에서 다른 스레드가 방금 제거
+    return value
+
+
+def _cache_put(cache: OrderedDict, key, value, max_entries: int):
+    """LRU 캐시 저장 (max_entries를 넘으면 오래된 것부터 제거, 0이면 저장 안 함)"""
+    if max_entries <= 0:
+        return value
+    cache[key] = value
+    while len(cache) > max_entries:
+        try:
+            cache.popitem(last=False)
+        except KeyError:
+            break
+    return value
+
+
+def _animal_tags(hashtags):
+    """hashtags 컬럼 값 → 태그 목록 (비어 있거나 결측이면 빈 튜플)"""
+    if hashtags is None or (isinstance(hashtags, float) and np.isnan(hashtags)):
+        return ()
+    return hashtags if len(hashtags) else ()
+
+
+class TagBitsetIndex:
+    """해시태그 어휘 + 태그별 동물 bitset
+    
+    태그 i를 가진 동물 위치가 bits[i]의 비트로 들어 있고 (np.packbits, little 비트 순서),
+    요청 태그 하나에 대응하는 동물 = 요청 태그와 포함 관계(a in b 또는 b in a)인 어휘 태그들의 bitset 합집합.
+    포함 관계와 합집합은 요청된 태그에 대해서만 계산하고 LRU 캐시(cache_size개)에 둔다.
+    """
+    
+    def __init__(self, hashtags_column, cache_size: int = QUERY_CACHE_SIZE):
+        self.n_animals = len(hashtags_column)
+        self.cache_size = cache_size
+        tag_lists = [_animal_tags(hashtags) for hashtags in hashtags_column]
+        lengths = np.fromiter(map(len, tag_lists), dtype=np.int64, count=self.n_animals)
+        self.has_tags = lengths > 0
+        
+        # 어휘 = 처음 나온 순서의 고유 태그
+        tag_ids, tags = pd.factorize(pd.Series(list(chain.from_iterable(tag_lists)), dtype=object))
+        self.tags = list(tags)
+        self.vocabulary = {tag: i for i, tag in enumerate(self.tags)}
+        
+        # 태그별 bitset (동물 8마리 = 1바이트)
+        tag_ids = tag_ids.astype(np.int64)
+        positions = np.repeat(np.arange(self.n_animals, dtype=np.int64), lengths)
+        
+        # 태그별 동물 수 (한 동물의 중복 태그는 한 번, 선택도 추정용)
+        distinct = np.unique(tag_ids * max(self.n_animals, 1) + positions)
+        self.tag_counts = np.bincount(distinct // max(self.n_animals, 1), minlength=len(self.tags))
+        self.bits = np.zeros((len(self.tags), (self.n_animals + 7) // 8), dtype=np.uint8)
+        np.bitwise_or.at(self.bits, (tag_ids, positions >> 3), (1 << (positions & 7)).astype(np.uint8))
+        
+        self._related = OrderedDict()     # 요청 태그 → 포함 관계 어휘 태그 번호
+        self._query_bits = OrderedDict()  # 요청 태그 → bitset 합집합
+    
+    def related_tags(self, tag) -> np.ndarray:
+        """요청 태그와 포함 관계인 어휘 태그 번호 (처음 요청 때 어휘를 한 번 훑고 캐시)"""
+        related = _cache_get(self._related, tag)
+        if related is None:
+            related = np.array([i for i, animal_tag in enumerate(self.tags) if tag in animal_tag or animal_tag in tag],
+                               dtype=np.int64)
+            _cache_put(self._related, tag, related, self.cache_size)
+        return related
+    
+    def tag_bits(self, tag) -> np.ndarray:
+        """요청 태그 하나에 대응하는 동물 bitset (관계 태그 bitset 합집합, 캐시)"""
+        bits = _cache_get(self._query_bits, tag)
+        if bits is None:
+            related = self.related_tags(tag)
+            if len(related):
+                bits = np.bitwise_or.reduce(self.bits[related], axis=0)
+            else:
+                bits = np.zeros(self.bits.shape[1], dtype=np.uint8)
+            _cache_put(self._query_bits, tag, bits, self.cache_size)
+        return bits
+    
+    def to_mask(self, bits, positions: Optional[np.ndarray] = None) -> np.ndarray:
+        """bitset → boolean 마스크 (positions를 주면 그 위치의 비트만 읽음)"""
+        if positions is None:
+            return np.unpackbits(bits, count=self.n_animals, bitorder='little').astype(bool)
+        return ((bits[positions >> 3] >> (positions & 7).astype(np.uint8)) & 1).astype(bool)
+    
+    def any_mask(self, required_tags, positions: Optional[np.ndarray] = None) -> np.ndarray:
+        """요청 태그 중 하나라도 대응하는 태그가 있는 동물 (OR 조건)"""
+        bits = np.zeros(self.bits.shape[1], dtype=np.uint8)
+        for tag in required_tags:
+            bits |= self.tag_bits(tag)
+        return self.to_mask(bits, positions)
+    
+    def any_fraction(self, required_tags) -> float:
+        """any_mask 통과 비율 추정 (관계 태그별 동물 수 합, 마스크는 만들지 않음)"""
+        related = [self.related_tags(tag) for tag in required_tags]
+        related = np.unique(np.concatenate(related)) if related else np.empty(0, dtype=np.int64)
+        return min(1.0, float(self.tag_counts[related].sum()) / max(self.n_animals, 1))
+    
+    def match_counts(self, traits) -> np.ndarray:
+        """동물별로 대응하는 요청 태그 수 (요청 목록의 중복 태그는 각각 셈)"""
+        counts = np.zeros(self.n_animals, dtype=np.int64)
+        for trait in traits:
+            counts += self.to_mask(self.tag_bits(trait))
+        return counts
+
+
+class CategoryCodes:
+    """범주형 컬럼의 정수 코드 (isin/== 마스크와 값 비율 통계용)"""
+    
+    def __init__(self, values):
+        self.codes, categories = pd.factorize(pd.Series(values, dtype=object))
+        self.categories = pd.Index(categories, dtype=object)
+        self.counts = np.bincount(self.codes[self.codes >= 0], minlength=len(self.categories))
+        self.n = len(self.codes)
+    
+    def _mask_for(self, matched, positions: Optional[np.ndarray] = None) -> np.ndarray:
+        """범주별 일치 여부 → 행 마스크 (positions를 주면 그 위치의 코드만 조회)"""
+        lookup = np.append(matched, False)   # 코드 -1(결측)은 마지막 칸
+        return lookup[self.codes if positions is None else self.codes[positions]]
+    
+    def isin_mask(self, values, positions: Optional[np.ndarray] = None) -> np.ndarray:
+        return self._mask_for(self.categories.isin(list(values)), positions)
+    
+    def equals_mask(self, value, positions: Optional[np.ndarray] = None) -> np.ndarray:
+        return self._mask_for(np.array([category == value for category in self.categories], dtype=bool), positions)
+    
+    def isin_fraction(self, values) -> float:
+        return float(self.counts[self.categories.isin(list(values))].sum()) / max(self.n, 1)
+    
+    def equals_fraction(self, value) -> float:
+        matched = np.array([category == value for category in self.categories], dtype=bool)
+        return float(self.counts[matched].sum()) / max(self.n, 1) if len(matched) else 0.0
+
+
+def _range_fraction(sorted_values: np.ndarray, low, high, n: int) -> float:
+    """정렬된 값 배열에서 low 이상 high 이하 비율"""
+    count = np.searchsorted(sorted_values, high, side='right') - np.searchsorted(sorted_values, low, side='left')
+    return max(int(count), 0) / max(n, 1)
+
+
+def _normalize_criterion(value):
+    """필터 조건 값 → 해시 가능한 정규형 (목록은 순서 무관, dict는 키 정렬)"""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _normalize_criterion(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(sorted((_normalize_criterion(item) for item in value), key=repr))
+    return value
+
+
+def _lower_text(value) -> Optional[str]:
+    """값이 있으면 소문자 문자열, 없으면(falsy) None"""
+    return str(value).lower() if value else None
+
+
+class AnimalColumns:
+    """dict 컬럼(care_conditions, behavior_traits, health_info)을 펼친 동물별 배열
+    
+    set_animals에서 한 번 만들고, 필터/점수 계산은 이 배열에 대한 마스크 연산으로 한다.
+    값의 의미는 원래 dict 조건과 같다 (없거나 falsy인 값은 조건 검사를 건너뜀).
+    """
+    
+    def __init__(self, animals: pd.DataFrame):
+        n = len(animals)
+        self.n_animals = n
+        
+        def column(name):
+            return animals[name].tolist() if name in animals.columns else [None] * n
+        
+        def numeric(name):
+            if name not in animals.columns:
+                return np.full(n, np.nan)
+            return pd.to_numeric(animals[name], errors='coerce').to_numpy(dtype=np.float64)
+        
+        self.ages = numeric('age')
+        self.weights = numeric('weight')
+        self.sorted_ages = np.sort(self.ages[~np.isnan(self.ages)])
+        self.sorted_weights = np.sort(self.weights[~np.isnan(self.weights)])
+        
+        # 범주형 컬럼 코드, 해시태그 bitset
+        self.status = CategoryCodes(column('status'))
+        self.available_positions = np.flatnonzero(self.status.equals_mask('임보가능'))
+        self.rescue_location = CategoryCodes(column('rescue_location'))
+        self.gender = CategoryCodes(column('gender'))
+        self.care_type = CategoryCodes(column('care_type'))
+        self.neutered = CategoryCodes(column('neutered'))
+        self.hashtags = TagBitsetIndex(column('hashtags'))
+        
+        # care_conditions: 전국 여부, 임보 기간, 픽업 방식(multi-hot), 가능 가정 유형(multi-hot), 추가 조건 텍스트
+        care = column('care_conditions')
+        self.care_is_dict = np.array([isinstance(c, dict) for c in care], dtype=bool)
+        care = [c if isinstance(c, dict) else {} for c in care]
+        self.nationwide = np.array([c.get('region') == '전국' for c in care], dtype=bool)
+        self.duration = pd.to_numeric(pd.Series([c.get('duration') or None for c in care], dtype=object),
+                                      errors='coerce').to_numpy(dtype=np.float64)  # falsy 기간은 NaN (검사 생략)
+        pickups = [c.get('pickup') or None for c in care]
+        self.has_pickup = np.array([p is not None for p in pickups], dtype=bool)
+        self.pickups = TagBitsetIndex([p if isinstance(p, (list, tuple, set)) else None for p in pickups])
+        self.pickup_text = np.array([p if p is not None and not isinstance(p, (list, tuple, set)) else None
+                                     for p in pickups], dtype=object)  # 문자열로 저장된 픽업 정보
+        self.has_pickup_text = np.array([p is not None for p in self.pickup_text], dtype=bool)
+        self.suitable_homes = TagBitsetIndex([c.get('suitable_homes') for c in care])
+        self.care_text = np.array([_lower_text(c.get('additional_conditions')) for c in care], dtype=object)
+        
+        # behavior_traits: 특성별 값 (None이면 NaN, 특성 키가 있고 값이 None이 아닌지 별도 보관)
+        behavior = column('behavior_traits')
+        self.behavior_is_dict = np.array([isinstance(b, dict) for b in behavior], dtype=bool)
+        self.behavior_values = {}
+        self.behavior_present = {}
+        for position, traits in enumerate(behavior):
+            if not isinstance(traits, dict):
+                continue
+            for trait_name, value in traits.items():
+                if trait_name not in self.behavior_values:
+                    self.behavior_values[trait_name] = np.full(n, np.nan)
+                    self.behavior_present[trait_name] = np.zeros(n, dtype=bool)
+                if value is None:
+                    continue
+                self.behavior_present[trait_name][position] = True
+                try:
+                    self.behavior_values[trait_name][position] = value
+                except (TypeError, ValueError):
+                    pass  # 숫자가 아닌 값은 NaN (범위/점수 비교에서 제외)
+        
+        # health_info: 예방접종 수, 병력 텍스트
+        health = column('health_info')
+        self.health_is_dict = np.array([isinstance(h, dict) for h in health], dtype=bool)
+        health = [h if isinstance(h, dict) else {} for h in health]
+        self.vaccination_count = np.array([len(h['vaccination']) if h.get('vaccination') else 0 for h in health],
+                                          dtype=np.int64)
+        self.medical_text = np.array([_lower_text(h.get('medical_history')) for h in health], dtype=object)
+    
+    def trait_values(self, trait_name: str) -> np.ndarray:
+        """행동 특성 하나의 동물별 값 (없으면 NaN)"""
+        values = self.behavior_values.get(trait_name)
+        return values if values is not None else np.full(self.n_animals, np.nan)
+    
+    def trait_present(self, trait_name: str) -> np.ndarray:
+        present = self.behavior_present.get(trait_name)
+        return present if present is not None else np.zeros(self.n_animals, dtype=bool)
+    
+    def pickup_mask(self, method, positions: Optional[np.ndarray] = None) -> np.ndarray:
+        """픽업 방식 목록에 method가 있는 동물 (문자열로 저장된 경우는 부분 문자열)"""
+        if positions is None:
+            positions = np.arange(self.n_animals)
+        tag_id = self.pickups.vocabulary.get(method)
+        mask = (self.pickups.to_mask(self.pickups.bits[tag_id], positions) if tag_id is not None
+                else np.zeros(len(positions), dtype=bool))
+        for i in np.flatnonzero(self.has_pickup_text[positions]):
+            mask[i] = method in self.pickup_text[positions[i]]
+        return mask
+    
+    @staticmethod
+    def contains_any(texts: np.ndarray, conditions) -> np.ndarray:
+        """소문자 텍스트 배열(None은 제외)에 조건 중 하나라도 들어 있는지"""
+        series = pd.Series(texts, dtype=object)
+        mask = np.zeros(len(texts), dtype=bool)
+        for condition in conditions:
+            mask |= series.str.contains(condition.lower(), regex=False, na=False).to_numpy(dtype=bool)
+        return mask
+    
+    def nbytes(self) -> int:
+        arrays = [self.ages, self.weights, self.sorted_ages, self.sorted_weights, self.hashtags.bits, self.care_is_dict,
+                  self.nationwide, self.duration, self.has_pickup, self.has_pickup_text, self.pickups.bits,
+                  self.suitable_homes.bits, self.behavior_is_dict, self.health_is_dict, self.vaccination_count]
+        arrays += list(self.behavior_values.values()) + list(self.behavior_present.values())
+        return sum(a.nbytes for a in arrays)
 
 
 class AnimalFilter:
     """임시보호 동물 필터링 클래스"""
     
-    def __init__(self, animals: Optional[pd.DataFrame] = None):
-        self.animals = animals if animals is not None else pd.DataFrame()
-        self.filtered_results = pd.DataFrame()
+    # 조건별로 필요한 동물 데이터 컬럼 (없으면 조건이 아무 동물에도 맞지 않거나 점수가 상수가 됨)
+    FILTER_COLUMNS = {
+        'region': ('rescue_location',),
+        'gender': ('gender',),
+        'care_type': ('care_type',),
+        'age_range': ('age',),
+        'weight_range': ('weight',),
+        'neutered': ('neutered',),
+        'hashtags': ('hashtags',),
+        'suitable_homes': ('care_conditions',),
+        'behavior_traits': ('behavior_traits',),
+        'health_requirements': ('health_info',),
+        'care_preferences': ('care_conditions',),
+    }
+    SCORE_COLUMNS = {
+        'region': ('rescue_location',),
+        'age_preference': ('age',),
+        'size_preference': ('weight',),
+        'personality_traits': ('hashtags',),
+        'behavior_preferences': ('behavior_traits',),
+    }
+    
+    def __init__(self, animals: Optional[pd.DataFrame] = None, cache_size: int = 64):
+        """
+        Args:
+            cache_size: 필터 조건별 결과(행 위치)를 보관할 LRU 캐시 크기 (0이면 캐시 미사용)
+        """
+        self._local = threading.local()
+        self.cache_size = cache_size
+        self.set_animals(animals if animals is not None else pd.DataFrame())
+    
+    @property
+    def filtered_results(self) -> pd.DataFrame:
+        """현재 스레드의 마지막 필터 결과 (Streamlit 세션들이 인스턴스를 공유해도 서로의 결과가 섞이지 않음)"""
+        results = getattr(self._local, 'filtered_results', None)
+        return results if results is not None else pd.DataFrame()
+    
+    @filtered_results.setter
+    def filtered_results(self, results: pd.DataFrame):
+        self._local.filtered_results = results
     
     def set_animals(self, animals: pd.DataFrame) -> 'AnimalFilter':
-        """동물 데이터 설정"""
+        """동물 데이터 설정 (해시태그 bitset 색인과 dict 컬럼을 펼친 배열을 한 번 만들어 둠)"""
         self.animals = animals
+        self._personality_counts = OrderedDict()  # 성격 태그 목록 → 동물별 일치 수
+        self._filter_cache = OrderedDict()  # 정규화한 필터 조건 → 통과한 행 위치
+        
+        # dict/범주형 컬럼을 펼친 배열 (행 순서 = self.animals 위치)
+        self.columns = AnimalColumns(animals)
+        self.tag_index = self.columns.hashtags if 'hashtags' in animals.columns else None
         return self
     
+    def _columns_for(self, animals: pd.DataFrame):
+        """animals 행에 대응하는 (AnimalColumns, 위치) — self.animals에서 온 행이 아니면 임시로 펼침"""
+        positions = self._positions(animals)
+        if positions is None:
+            return AnimalColumns(animals), np.arange(len(animals))
+        return self.columns, positions
+    
+    def _positions(self, animals: pd.DataFrame) -> Optional[np.ndarray]:
+        """animals(self.animals의 부분 집합) 행의 self.animals 내 위치 (대응할 수 없으면 None)"""
+        if animals is self.animals:
+            return np.arange(len(animals))
+        index = self.animals.index
+        if not index.is_unique:
+            return None
+        positions = index.get_indexer(animals.index)
+        return None if (positions < 0).any() else positions
+    
+    def missing_columns(self, filter_criteria: Optional[Dict] = None, preferences: Optional[Dict] = None) -> List[str]:
+        """필터 조건/소프트 선호도에 필요한데 동물 데이터에 없는 컬럼 목록"""
+        required = []
+        for name in self._active_criteria(filter_criteria or {}):
+            required += self.FILTER_COLUMNS.get(name, ())
+        for name in (preferences or {}):
+            required += self.SCORE_COLUMNS.get(name, ())
+        return sorted(set(column for column in required if column not in self.animals.columns))
+    
+    def _position_of(self, label) -> Optional[int]:
+        """self.animals 행 라벨 → 위치 (라벨이 없거나 중복이면 None)"""
+        index = self.animals.index
+        if not index.is_unique or label not in index:
+            return None
+        return index.get_loc(label)
+    
     def apply_filters(self, filter_criteria: Dict) -> pd.DataFrame:
         """
         복합 필터 적용
         
+        조건을 마스크 단계(compile_filter_plan)로 바꿔 통과 비율이 낮은 단계부터 적용하고,
+        각 단계는 앞 단계를 통과한 행 위치의 값만 조회한다 (해시태그/가정 유형은 요청 태그 bitset
+        합집합을 만든 뒤 그 위치의 비트만 읽음). 데이터프레임은 마지막에 한 번만 만든다.
+        같은 조건이 다시 들어오면 인스턴스의 LRU 캐시에 있는 행 위치를 그대로 사용한다.
+        
         Args:
             filter_criteria: 필터링 조건 딕셔너리
             
@@ -36,55 +409,101 @@ class AnimalFilter:
         if self.animals.empty:
             return pd.DataFrame()
         
-        # 기본 상태 필터 (임보가능한 동물만)
-        results = self.animals[self.animals['status'] == '임보가능'].copy()
-        
-        # 각 필터 조건 적용
-        if 'region' in filter_criteria and filter_criteria['region']:
-            results = self._filter_by_region(results, filter_criteria['region'])
-        
-        if 'gender' in filter_criteria and filter_criteria['gender']:
-            results = self._filter_by_gender(results, filter_criteria['gender'])
-        
-        if 'care_type' in filter_criteria and filter_criteria['care_type']:
-            results = self._filter_by_care_type(results, filter_criteria['care_type'])
-        
-        if 'age_range' in filter_criteria and filter_criteria['age_range']:
-            results = self._filter_by_age_range(results, filter_criteria['age_range'])
-        
-        if 'weight_range' in filter_criteria and filter_criteria['weight_range']:
-            results = self._filter_by_weight_range(results, filter_criteria['weight_range'])
-        
-        if 'neutered' in filter_criteria and filter_criteria['neutered'] is not None:
-            results = self._filter_by_neutered(results, filter_criteria['neutered'])
-        
-        if 'hashtags' in filter_criteria and filter_criteria['hashtags']:
-            results = self._filter_by_hashtags(results, filter_criteria['hashtags'])
-        
-        if 'suitable_homes' in filter_criteria and filter_criteria['suitable_homes']:
-            results = self._filter_by_suitable_homes(results, filter_criteria['suitable_homes'])
-        
-        if 'behavior_traits' in filter_criteria and filter_criteria['behavior_traits']:
-            results = self._filter_by_behavior_traits(results, filter_criteria['behavior_traits'])
-        
-        if 'health_requirements' in filter_criteria and filter_criteria['health_requirements']:
-            results = self._filter_by_health_requirements(results, filter_criteria['health_requirements'])
-        
-        if 'care_preferences' in filter_criteria and filter_criteria['care_preferences']:
-            results = self._filter_by_care_preferences(results, filter_criteria['care_preferences'])
+        key = self._criteria_key(filter_criteria)
+        positions = _cache_get(self._filter_cache, key)
+        if positions is None:
+            positions = self.run_filter_plan(self.compile_filter_plan(filter_criteria))
+            positions.setflags(write=False)
+            _cache_put(self._filter_cache, key, positions, self.cache_size)
         
+        results = self.animals.iloc[positions]
         self.filtered_results = results
         return results
     
+    @staticmethod
+    def _active_criteria(filter_criteria: Dict) -> Dict:
+        """적용할 조건만 (빈 값 제외, 중성화 여부는 None만 제외)"""
+        return {
+            name: value for name, value in filter_criteria.items()
+            if (value is not None if name == 'neutered' else bool(value))
+        }
+    
+    def _criteria_key(self, filter_criteria: Dict):
+        return _normalize_criterion(self._active_criteria(filter_criteria))
+    
+    def compile_filter_plan(self, filter_criteria: Dict) -> List[FilterStep]:
+        """필터 조건 → 추정 통과 비율 오름차순 마스크 단계 목록
+        
+        통과 비율은 컬럼 통계로만 추정한다 (범주별 개수, 정렬된 나이/몸무게, 태그별 동물 수).
+        """
+        columns = self.columns
+        n = columns.n_animals
+        criteria = self._active_criteria(filter_criteria)
+        
+        def isin_step(name, codes, values):
+            values = [values] if isinstance(values, str) else values
+            return FilterStep(name, codes.isin_fraction(values), lambda c, p: getattr(c, name).isin_mask(values, p))
+        
+        steps = []
+        for name, value in criteria.items():
+            if name == 'region':
+                regions = [value] if isinstance(value, str) else value
+                selectivity = min(1.0, columns.rescue_location.isin_fraction(regions) + float(columns.nationwide.mean()))
+                steps.append(FilterStep(name, selectivity, lambda c, p, v=value: self._region_mask(c, p, v)))
+            elif name == 'gender':
+                steps.append(isin_step('gender', columns.gender, value))
+            elif name == 'care_type':
+                steps.append(isin_step('care_type', columns.care_type, value))
+            elif name == 'age_range':
+                selectivity = _range_fraction(columns.sorted_ages, value.get('min', 0), value.get('max', 100), n)
+                steps.append(FilterStep(name, selectivity, lambda c, p, v=value: self._range_mask(c.ages, p, v)))
+            elif name == 'weight_range':
+                selectivity = _range_fraction(columns.sorted_weights, value.get('min', 0), value.get('max', 100), n)
+                steps.append(FilterStep(name, selectivity, lambda c, p, v=value: self._range_mask(c.weights, p, v)))
+            elif name == 'neutered':
+                steps.append(FilterStep(name, columns.neutered.equals_fraction(value),
+                                        lambda c, p, v=value: c.neutered.equals_mask(v, p)))
+            elif name == 'hashtags':
+                steps.append(FilterStep(name, columns.hashtags.any_fraction(value),
+                                        lambda c, p, v=value: c.hashtags.any_mask(v, p)))
+            elif name == 'suitable_homes':
+                steps.append(FilterStep(name, columns.suitable_homes.any_fraction(value),
+                                        lambda c, p, v=value: self._suitable_homes_mask(c, p, v)))
+            elif name == 'behavior_traits':
+                steps.append(FilterStep(name, float(columns.behavior_is_dict.mean()) * DEFAULT_SELECTIVITY[name],
+                                        lambda c, p, v=value: self._behavior_traits_mask(c, p, v)))
+            elif name == 'health_requirements':
+                steps.append(FilterStep(name, float(columns.health_is_dict.mean()) * DEFAULT_SELECTIVITY[name],
+                                        lambda c, p, v=value: self._health_requirements_mask(c, p, v)))
+            elif name == 'care_preferences':
+                steps.append(FilterStep(name, float(columns.care_is_dict.mean()) * DEFAULT_SELECTIVITY[name],
+                                        lambda c, p, v=value: self._care_preferences_mask(c, p, v)))
+        
+        return sorted(steps, key=lambda step: step.selectivity)
+    
+    def run_filter_plan(self, plan: List[FilterStep], positions: Optional[np.ndarray] = None) -> np.ndarray:
+        """필터 계획 실행: 시작 위치(기본: 임보가능 행)에서 단계별로 통과한 위치만 남김
+        
+        Returns:
+            통과한 self.animals 행 위치 (오름차순)
+        """
+        if positions is None:
+            positions = self.columns.available_positions
+        for step in plan:
+            if not len(positions):
+                break
+            positions = positions[step.mask(self.columns, positions)]
+        return np.array(positions)
+    
     def _filter_by_region(self, animals: pd.DataFrame, regions: Union[str, List[str]]) -> pd.DataFrame:
         """지역별 필터링"""
+        return animals[self._region_mask(*self._columns_for(animals), regions)]
+    
+    @staticmethod
+    def _region_mask(columns: AnimalColumns, positions: np.ndarray, regions: Union[str, List[str]]) -> np.ndarray:
         if isinstance(regions, str):
             regions = [regions]
-        
-        return animals[
-            animals['rescue_location'].isin(regions) | 
-            animals['care_conditions'].apply(lambda x: x.get('region') == '전국' if isinstance(x, dict) else False)
-        ]
+        return columns.rescue_location.isin_mask(regions, positions) | columns.nationwide[positions]
     
     def _filter_by_gender(self, animals: pd.DataFrame, genders: Union[str, List[str]]) -> pd.DataFrame:
         """성별 필터링"""
@@ -100,143 +519,109 @@ class AnimalFilter:
     
     def _filter_by_age_range(self, animals: pd.DataFrame, age_range: Dict[str, int]) -> pd.DataFrame:
         """나이 범위 필터링"""
-        min_age = age_range.get('min', 0)
-        max_age = age_range.get('max', 100)
-        
-        return animals[
-            (animals['age'] >= min_age) & 
-            (animals['age'] <= max_age) & 
-            animals['age'].notna()
-        ]
+        columns, positions = self._columns_for(animals)
+        return animals[self._range_mask(columns.ages, positions, age_range)]
     
     def _filter_by_weight_range(self, animals: pd.DataFrame, weight_range: Dict[str, float]) -> pd.DataFrame:
         """몸무게 범위 필터링"""
-        min_weight = weight_range.get('min', 0)
-        max_weight = weight_range.get('max', 100)
-        
-        return animals[
-            (animals['weight'] >= min_weight) & 
-            (animals['weight'] <= max_weight) & 
-            animals['weight'].notna()
-        ]
+        columns, positions = self._columns_for(animals)
+        return animals[self._range_mask(columns.weights, positions, weight_range)]
+    
+    @staticmethod
+    def _range_mask(values: np.ndarray, positions: np.ndarray, value_range: Dict) -> np.ndarray:
+        """min 이상 max 이하 (값이 없으면 제외)"""
+        values = values[positions]
+        return (values >= value_range.get('min', 0)) & (values <= value_range.get('max', 100))
     
     def _filter_by_neutered(self, animals: pd.DataFrame, neutered: bool) -> pd.DataFrame:
         """중성화 여부 필터링"""
         return animals[animals['neutered'] == neutered]
     
     def _filter_by_hashtags(self, animals: pd.DataFrame, required_hashtags: List[str]) -> pd.DataFrame:
-        """해시태그 필터링 (OR 조건)"""
-        def has_matching_hashtag(hashtags):
-            if not hashtags:
-                return False
-            return any(
-                any(tag in animal_tag or animal_tag in tag for animal_tag in hashtags)
-                for tag in required_hashtags
-            )
-        
-        return animals[animals['hashtags'].apply(has_matching_hashtag)]
+        """해시태그 필터링 (OR 조건, 요청 태그별 bitset 합집합)"""
+        columns, positions = self._columns_for(animals)
+        return animals[columns.hashtags.any_mask(required_hashtags, positions)]
     
     def _filter_by_suitable_homes(self, animals: pd.DataFrame, home_types: List[str]) -> pd.DataFrame:
-        """적합한 가정 유형 필터링"""
-        def matches_home_type(care_conditions):
-            if not isinstance(care_conditions, dict) or 'suitable_homes' not in care_conditions:
-                return False
-            suitable_homes = care_conditions['suitable_homes']
-            if not suitable_homes:
-                return False
-            return any(
-                any(home_type in suitable_home or suitable_home in home_type 
-                    for suitable_home in suitable_homes)
-                for home_type in home_types
-            )
-        
-        return animals[animals['care_conditions'].apply(matches_home_type)]
+        """적합한 가정 유형 필터링 (가정 유형 multi-hot bitset, 부분 문자열 관계)"""
+        return animals[self._suitable_homes_mask(*self._columns_for(animals), home_types)]
+    
+    @staticmethod
+    def _suitable_homes_mask(columns: AnimalColumns, positions: np.ndarray, home_types: List[str]) -> np.ndarray:
+        return columns.suitable_homes.any_mask(home_types, positions)
     
     def _filter_by_behavior_traits(self, animals: pd.DataFrame, trait_requirements: Dict) -> pd.DataFrame:
         """행동 특성 필터링"""
-        def meets_behavior_requirements(behavior_traits):
-            if not isinstance(behavior_traits, dict):
-                return False
+        return animals[self._behavior_traits_mask(*self._columns_for(animals), trait_requirements)]
+    
+    @staticmethod
+    def _behavior_traits_mask(columns: AnimalColumns, positions: np.ndarray, trait_requirements: Dict) -> np.ndarray:
+        mask = columns.behavior_is_dict[positions].copy()
+        
+        for trait_name, requirement in trait_requirements.items():
+            # 값이 없는(None) 특성은 검사하지 않음
+            values = columns.trait_values(trait_name)[positions]
+            failed = np.zeros(len(positions), dtype=bool)
             
-            for trait_name, requirement in trait_requirements.items():
-                animal_value = behavior_traits.get(trait_name)
-                
-                if animal_value is None:
-                    continue
-                
-                # 범위 조건 (min, max)
-                if 'min' in requirement and animal_value < requirement['min']:
-                    return False
-                if 'max' in requirement and animal_value > requirement['max']:
-                    return False
-                
-                # 정확한 값 조건
-                if 'exact' in requirement and animal_value != requirement['exact']:
-                    return False
+            # 범위 조건 (min, max)
+            if 'min' in requirement:
+                failed |= values < requirement['min']
+            if 'max' in requirement:
+                failed |= values > requirement['max']
             
-            return True
+            # 정확한 값 조건
+            if 'exact' in requirement:
+                failed |= values != requirement['exact']
+            
+            mask &= ~(failed & columns.trait_present(trait_name)[positions])
         
-        return animals[animals['behavior_traits'].apply(meets_behavior_requirements)]
+        return mask
     
     def _filter_by_health_requirements(self, animals: pd.DataFrame, health_reqs: Dict) -> pd.DataFrame:
         """건강 요구사항 필터링"""
-        def meets_health_requirements(health_info):
-            if not isinstance(health_info, dict):
-                return False
-            
-            # 예방접종 완성도 확인
-            if 'min_vaccinations' in health_reqs and health_info.get('vaccination'):
-                vaccination_count = len(health_info['vaccination'])
-                if vaccination_count < health_reqs['min_vaccinations']:
-                    return False
-            
-            # 병력이 없는 동물만 원하는 경우
-            if health_reqs.get('no_medical_history', False) and health_info.get('medical_history'):
-                return False
-            
-            # 특정 질병 제외
-            if 'exclude_conditions' in health_reqs and health_info.get('medical_history'):
-                medical_history = str(health_info['medical_history']).lower()
-                has_excluded_condition = any(
-                    condition.lower() in medical_history
-                    for condition in health_reqs['exclude_conditions']
-                )
-                if has_excluded_condition:
-                    return False
-            
-            return True
+        return animals[self._health_requirements_mask(*self._columns_for(animals), health_reqs)]
+    
+    @staticmethod
+    def _health_requirements_mask(columns: AnimalColumns, positions: np.ndarray, health_reqs: Dict) -> np.ndarray:
+        mask = columns.health_is_dict[positions].copy()
+        medical_text = columns.medical_text[positions]
         
-        return animals[animals['health_info'].apply(meets_health_requirements)]
+        # 예방접종 완성도 확인 (접종 기록이 없으면 검사 생략)
+        if 'min_vaccinations' in health_reqs:
+            counts = columns.vaccination_count[positions]
+            mask &= ~((counts > 0) & (counts < health_reqs['min_vaccinations']))
+        
+        # 병력이 없는 동물만 원하는 경우
+        if health_reqs.get('no_medical_history', False):
+            mask &= pd.isna(medical_text)
+        
+        # 특정 질병 제외
+        if 'exclude_conditions' in health_reqs:
+            mask &= ~AnimalColumns.contains_any(medical_text, health_reqs['exclude_conditions'])
+        
+        return mask
     
     def _filter_by_care_preferences(self, animals: pd.DataFrame, care_prefs: Dict) -> pd.DataFrame:
         """임보 조건 선호도 필터링"""
-        def meets_care_preferences(care_conditions):
-            if not isinstance(care_conditions, dict):
-                return False
-            
-            # 임보 기간 조건
-            if 'max_duration' in care_prefs and care_conditions.get('duration'):
-                if care_conditions['duration'] > care_prefs['max_duration']:
-                    return False
-            
-            # 픽업 방식 조건
-            if 'pickup_method' in care_prefs and care_conditions.get('pickup'):
-                if care_prefs['pickup_method'] not in care_conditions['pickup']:
-                    return False
-            
-            # 추가 조건 제외 사항
-            if 'exclude_conditions' in care_prefs and care_conditions.get('additional_conditions'):
-                additional_conditions = str(care_conditions['additional_conditions']).lower()
-                has_excluded_condition = any(
-                    condition.lower() in additional_conditions
-                    for condition in care_prefs['exclude_conditions']
-                )
-                if has_excluded_condition:
-                    return False
-            
-            return True
+        return animals[self._care_preferences_mask(*self._columns_for(animals), care_prefs)]
+    
+    @staticmethod
+    def _care_preferences_mask(columns: AnimalColumns, positions: np.ndarray, care_prefs: Dict) -> np.ndarray:
+        mask = columns.care_is_dict[positions].copy()
+        
+        # 임보 기간 조건 (기간이 없으면 검사 생략, NaN 비교는 False)
+        if 'max_duration' in care_prefs:
+            mask &= ~(columns.duration[positions] > care_prefs['max_duration'])
         
-        return animals[animals['care_conditions'].apply(meets_care_preferences)]
+        # 픽업 방식 조건 (픽업 정보가 없으면 검사 생략)
+        if 'pickup_method' in care_prefs:
+            mask &= ~columns.has_pickup[positions] | columns.pickup_mask(care_prefs['pickup_method'], positions)
+        
+        # 추가 조건 제외 사항
+        if 'exclude_conditions' in care_prefs:
+            mask &= ~AnimalColumns.contains_any(columns.care_text[positions], care_prefs['exclude_conditions'])
+        
+        return mask
     
     def apply_soft_filtering(self, preferences: Dict, threshold: float = 0.3) -> pd.DataFrame:
         """
@@ -254,13 +639,9 @@ class AnimalFilter:
         if available_animals.empty:
             return pd.DataFrame()
         
-        # 각 동물에 대해 매치 점수 계산
-        match_scores = []
-        for idx, animal in available_animals.iterrows():
-            score = self._calculate_match_score(animal, preferences)
-            match_scores.append(score)
-        
-        available_animals['match_score'] = match_scores
+        # 각 동물에 대해 매치 점수 계산 (컬럼 배열 연산, _calculate_match_score와 같은 값)
+        positions = np.flatnonzero((self.animals['status'] == '임보가능').to_numpy())
+        available_animals['match_score'] = self.match_scores(positions, preferences)
         
         # 임계값 이상인 동물만 필터링하고 점수순으로 정렬
         filtered_animals = available_animals[available_animals['match_score'] >= threshold]
@@ -268,6 +649,93 @@ class AnimalFilter:
         
         return self.filtered_results
     
+    def match_scores(self, positions: np.ndarray, preferences: Dict) -> np.ndarray:
+        """self.animals 위치별 소프트 매치 점수 (_calculate_match_score와 같은 순서로 더해서 값이 같음)"""
+        total_score = np.zeros(len(positions))
+        total_weight = 0
+        
+        weights = preferences.get('weights', {})
+        components = [
+            ('region', 'region', self._region_scores),
+            ('age_preference', 'age', lambda p, pref: self._range_scores(self.columns.ages[p], pref)),
+            ('size_preference', 'size', lambda p, pref: self._range_scores(self.columns.weights[p], pref)),
+            ('personality_traits', 'personality', self._personality_scores),
+            ('behavior_preferences', 'behavior', self._behavior_scores),
+        ]
+        for key, weight_name, score_func in components:
+            if key in preferences:
+                weight = weights.get(weight_name, 1)
+                total_score += score_func(positions, preferences[key]) * weight
+                total_weight += weight
+        
+        if total_weight <= 0:
+            return np.zeros(len(positions), dtype=np.int64)
+        return total_score / total_weight
+    
+    def _region_scores(self, positions: np.ndarray, preferred_regions: List[str]) -> np.ndarray:
+        """지역 점수 배열 (전국 임보 가능이거나 구조 지역이 선호 지역이면 1.0)"""
+        if 'rescue_location' not in self.animals.columns:
+            in_region = np.zeros(len(positions), dtype=bool)
+        elif isinstance(preferred_regions, str):
+            locations = self.animals['rescue_location'].to_numpy()[positions]
+            in_region = np.array([isinstance(l, str) and l in preferred_regions for l in locations], dtype=bool)
+        else:
+            in_region = self.animals['rescue_location'].isin(preferred_regions).to_numpy()[positions]
+        return (self.columns.nationwide[positions] | in_region).astype(np.float64)
+    
+    @staticmethod
+    def _range_scores(values: np.ndarray, preference: Dict) -> np.ndarray:
+        """선호 범위 1.0, 허용 범위 0.7, 그 밖 0.0, 값 불명 0.5 (나이/크기 공통)"""
+        preferred = preference.get('preferred', {})
+        acceptable = preference.get('acceptable', {})
+        
+        scores = np.zeros(len(values))
+        in_acceptable = (acceptable.get('min', 0) <= values) & (values <= acceptable.get('max', 100))
+        in_preferred = (preferred.get('min', 0) <= values) & (values <= preferred.get('max', 100))
+        scores[in_acceptable] = 0.7
+        scores[in_preferred] = 1.0
+        scores[np.isnan(values)] = 0.5
+        return scores
+    
+    def _personality_scores(self, positions: np.ndarray, personality_traits: List[str]) -> np.ndarray:
+        """성격 점수 배열 (일치 태그 수 / 요청 태그 수, 태그가 없는 동물은 0.5)"""
+        if self.tag_index is None or not personality_traits:
+            return np.full(len(positions), 0.5)
+        
+        scores = self._personality_match_counts(personality_traits)[positions] / len(personality_traits)
+        scores[~self.tag_index.has_tags[positions]] = 0.5
+        return scores
+    
+    def _behavior_scores(self, positions: np.ndarray, behavior_prefs: Dict) -> np.ndarray:
+        """행동 특성 점수 배열 (특성별 일치 1.0 / 허용 0.7 / 거리 기반, 값이 있는 특성 평균)"""
+        total_score = np.zeros(len(positions))
+        valid_traits = np.zeros(len(positions), dtype=np.int64)
+        
+        for trait_name, preference in behavior_prefs.items():
+            values = self.columns.trait_values(trait_name)[positions]
+            valid = ~np.isnan(values)
+            
+            ideal = preference.get('ideal')
+            acceptable = [value for value in preference.get('acceptable', []) if value is not None]
+            
+            if ideal is None:
+                scores = np.ones(len(values))
+            else:
+                # 거리 기반 점수 (1-5 스케일에서)
+                scores = np.maximum(0, 1 - np.abs(values - ideal) / 4)
+            scores[np.isin(values, acceptable)] = 0.7
+            if ideal is not None:
+                scores[values == ideal] = 1.0
+            
+            total_score += np.where(valid, scores, 0)
+            valid_traits += valid
+        
+        scores = np.full(len(positions), 0.5)
+        has_valid = valid_traits > 0
+        scores[has_valid] = total_score[has_valid] / valid_traits[has_valid]
+        scores[~self.columns.behavior_is_dict[positions]] = 0.5
+        return scores
+    
     def _calculate_match_score(self, animal: pd.Series, preferences: Dict) -> float:
         """동물과 사용자 선호도 간 매치 점수 계산"""
         total_score = 0
@@ -358,13 +826,27 @@ class AnimalFilter:
         hashtags = animal.get('hashtags', [])
         if not hashtags:
             return 0.5
+        if not personality_traits:
+            return 0.5
         
-        matches = [
-            trait for trait in personality_traits
-            if any(trait in tag or tag in trait for tag in hashtags)
-        ]
+        position = self._position_of(animal.name) if self.tag_index is not None else None
+        if position is None:
+            matches = [
+                trait for trait in personality_traits
+                if any(trait in tag or tag in trait for tag in hashtags)
+            ]
+            return len(matches) / len(personality_traits)
         
-        return len(matches) / len(personality_traits) if personality_traits else 0.5
+        return self._personality_match_counts(personality_traits)[position] / len(personality_traits)
+    
+    def _personality_match_counts(self, personality_traits: List[str]) -> np.ndarray:
+        """동물별 일치 성격 태그 수 (같은 요청 태그 목록이면 재사용)"""
+        key = tuple(personality_traits)
+        counts = _cache_get(self._personality_counts, key)
+        if counts is None:
+            counts = _cache_put(self._personality_counts, key, self.tag_index.match_counts(personality_traits),
+                                QUERY_CACHE_SIZE)
+        return counts
     
     def _calculate_behavior_score(self, animal: pd.Series, behavior_prefs: Dict) -> float:
         """행동 특성 점수 계산"""
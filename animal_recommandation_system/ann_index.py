@@ -0,0 +1,194 @@
+"""
+근사 최근접 이웃(ANN) 인덱스 모듈
+정규화된 임베딩 행렬에 대한 IVF-flat 인덱스 (NumPy 구현, 추가 의존성 없음)
+
+    1. 학습 샘플에 구면 k-means를 돌려 중심 벡터(리스트)를 만든다.
+    2. 모든 행을 가장 가까운 중심의 리스트에 배정한다 (리스트 안의 행 번호는 오름차순).
+    3. 검색 시 쿼리와 가까운 n_probe개 리스트의 행만 내적한다.
+
+행렬이 PartitionedIndex 순서(입양 가능 → 크기 → 성별)로 정렬되어 있으므로
+필터 조건은 행 구간으로 주어지고, 리스트의 행 번호를 searchsorted로 잘라서 적용한다.
+"""
+
+import os
+from typing import Optional
+
+import numpy as np
+
+from vector_index import top_k_indices
+
+
+INDEX_FILE = 'ivf_index.npz'
+
+
+def default_n_lists(rows: int) -> int:
+    """행 수 기준 기본 리스트 수 (√N, 최소 1)"""
+    return max(1, int(np.sqrt(rows)))
+
+
+def assign_to_centroids(matrix, centroids: np.ndarray, block_size: int = 8192) -> np.ndarray:
+    """각 행을 내적이 가장 큰 중심에 배정 (memmap도 블록 단위로 읽음)"""
+    labels = np.empty(len(matrix), dtype=np.int32)
+    for start in range(0, len(matrix), block_size):
+        block = np.asarray(matrix[start:start + block_size], dtype=np.float32)
+        labels[start:start + block_size] = np.argmax(block @ centroids.T, axis=1)
+    return labels
+
+
+def spherical_kmeans(sample: np.ndarray, n_lists: int, n_iter: int = 10, seed: int = 0) -> np.ndarray:
+    """코사인 기준 k-means (중심도 단위 벡터로 유지)"""
+    rng = np.random.default_rng(seed)
+    n_lists = min(n_lists, len(sample))
+    centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+    
+    for _ in range(n_iter):
+        labels = assign_to_centroids(sample, centroids)
+        
+        # 라벨 순으로 정렬한 뒤 구간 합으로 중심 갱신
+        order = np.argsort(labels, kind='stable')
+        counts = np.bincount(labels, minlength=n_lists)
+        present = np.flatnonzero(counts)
+        starts = np.concatenate(([0], np.cumsum(counts[present])[:-1]))
+        centroids[present] = np.add.reduceat(sample[order], starts, axis=0)
+        
+        # 비어 있는 리스트는 임의의 샘플로 다시 시작
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            centroids[empty] = sample[rng.choice(len(sample), len(empty), replace=False)]
+        
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids /= norms
+    
+    return centroids
+
+
+class IVFFlatIndex:
+    """IVF-flat 인덱스 (벡터는 원본 행렬을 그대로 참조하고 행 번호만 보관)"""
+    
+    def __init__(self, centroids: np.ndarray, labels: np.ndarray):
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.n_lists = len(self.centroids)
+        self.rows = len(labels)
+        
+        # 리스트별 행 번호 (CSR 형태: list_offsets[l]:list_offsets[l + 1])
+        self.list_rows = np.argsort(labels, kind='stable').astype(np.int64)
+        counts = np.bincount(labels, minlength=self.n_lists)
+        self.list_offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+    
+    @classmethod
+    def build(cls, matrix, n_lists: Optional[int] = None, n_iter: int = 10,
+              sample_size: Optional[int] = None, seed: int = 0) -> 'IVFFlatIndex':
+        """정규화된 행렬로 인덱스 생성
+        
+        Args:
+            n_lists: 리스트 수 (None이면 √N)
+            sample_size: k-means 학습 샘플 수 (None이면 리스트당 64개)
+        """
+        n_lists = n_lists or default_n_lists(len(matrix))
+        sample_size = min(len(matrix), sample_size or n_lists * 64)
+        
+        rng = np.random.default_rng(seed)
+        sample_rows = np.sort(rng.choice(len(matrix), sample_size, replace=False))
+        sample = np.asarray(matrix[sample_rows], dtype=np.float32)
+        
+        centroids = spherical_kmeans(sample, n_lists, n_iter=n_iter, seed=seed)
+        return cls(centroids, assign_to_centroids(matrix, centroids))
+    
+    @classmethod
+    def from_centroids(cls, matrix, centroids: np.ndarray) -> 'IVFFlatIndex':
+        """기존 중심으로 행만 다시 배정 (데이터 증분 반영 시 k-means 재학습 없이 사용)"""
+        return cls(centroids, assign_to_centroids(matrix, centroids))
+    
+    def list_sizes(self) -> np.ndarray:
+        return np.diff(self.list_offsets)
+    
+    def _filter_rows(self, rows: np.ndarray, ranges) -> np.ndarray:
+        """오름차순 행 번호에서 (start, stop) 구간에 속하는 것만 선택"""
+        if ranges is None:
+            return rows
+        bounds = np.asarray(ranges, dtype=np.int64).ravel()
+        cuts = np.searchsorted(rows, bounds)
+        return np.concatenate([rows[cuts[i]:cuts[i + 1]] for i in range(0, len(cuts), 2)])
+    
+    def search(self, matrix, query, top_k, ranges=None, residual_rows=None, n_probe: int = 16):
+        """가까운 리스트만 탐색하는 근사 검색
+        
+        Args:
+            ranges: 후보 행 구간 [(start, stop), ...] (None이면 전체)
+            residual_rows: 행 번호 배열 → boolean 마스크를 돌려주는 함수 (나이 등 구간으로 표현되지 않는 조건)
+            n_probe: 탐색할 리스트 수. 조건을 만족하는 행이 top_k보다 적으면 다음 리스트까지 넓힌다.
+        
+        Returns:
+            (전체 행 기준 상위 인덱스, 유사도, 실제로 내적한 후보 수)
+        """
+        probe_order = np.argsort(self.centroids @ query)[::-1]
+        n_probe = max(1, min(n_probe, self.n_lists))
+        
+        selected = []
+        found = 0
+        probed = 0
+        while probed < self.n_lists and (probed < n_probe or found < top_k):
+            list_id = probe_order[probed]
+            probed += 1
+            
+            rows = self.list_rows[self.list_offsets[list_id]:self.list_offsets[list_id + 1]]
+            rows = self._filter_rows(rows, ranges)
+            if residual_rows is not None and len(rows):
+                rows = rows[residual_rows(rows)]
+            if len(rows):
+                selected.append(rows)
+                found += len(rows)
+        
+        if not found:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32), 0
+        
+        # 행 번호를 정렬해서 memmap을 앞에서부터 읽도록 함
+        candidates = np.sort(np.concatenate(selected))
+        scores = np.asarray(matrix[candidates], dtype=np.float32) @ query
+        order = top_k_indices(scores, top_k)
+        return candidates[order], scores[order], len(candidates)
+    
+    def nbytes(self) -> int:
+        return self.centroids.nbytes + self.list_rows.nbytes + self.list_offsets.nbytes
+    
+    def save(self, store_dir: str, matrix_checksum: str = ''):
+        """임베딩 저장소 디렉토리에 인덱스 저장 (행렬 체크섬으로 짝을 맞춤)"""
+        labels = np.empty(self.rows, dtype=np.int32)
+        labels[self.list_rows] = np.repeat(np.arange(self.n_lists, dtype=np.int32), self.list_sizes())
+        
+        path = os.path.join(store_dir, INDEX_FILE)
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, centroids=self.centroids, labels=labels, matrix_checksum=np.array(matrix_checksum))
+        os.replace(tmp_path, path)
+    
+    @classmethod
+    def load(cls, store_dir: str, matrix_checksum: str = None) -> Optional['IVFFlatIndex']:
+        """저장된 인덱스 로드 (파일이 없거나 행렬 체크섬이 다르면 None)"""
+        path = os.path.join(store_dir, INDEX_FILE)
+        if not os.path.exists(path):
+            return None
+        
+        with np.load(path, allow_pickle=False) as data:
+            if matrix_checksum is not None and str(data['matrix_checksum']) != matrix_checksum:
+                return None
+            return cls(data['centroids'], data['labels'])
+
+
+# 사용 예시
+if __name__ == "__main__":
+    import time
+    from vector_index import normalize_rows, normalize_vector
+    
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((200, 256), dtype=np.float32)
+    matrix = normalize_rows(centers[rng.integers(0, 200, 50000)] + 0.5 * rng.standard_normal((50000, 256), dtype=np.float32))
+    
+    start = time.perf_counter()
+    index = IVFFlatIndex.build(matrix)
+    print(f"🏗️  인덱스 생성: {index.n_lists}개 리스트, {time.perf_counter() - start:.2f}초")
+    
+    query = normalize_vector(matrix[123] + 0.1 * rng.standard_normal(256, dtype=np.float32))
+    exact = top_k_indices(matrix @ query, 10)
+    approx, _, scanned = index.search(matrix, query, 10, n_probe=8)
+    print(f"🔍 탐색 {scanned:,}행 / 전체 {len(matrix):,}행, recall@10 = {len(np.intersect1d(exact, approx)) / 10:.2f}")
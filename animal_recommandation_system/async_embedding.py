@@ -0,0 +1,341 @@
+"""
+비동기 대량 임베딩 엔진
+RPM/TPM 한도를 토큰 버킷으로 관리하면서 여러 배치 요청을 동시에 보낸다.
+"""
+
+import re
+import time
+import asyncio
+import hashlib
+import concurrent.futures
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import Config
+from token_utils import TokenEstimator, plan_embedding_requests
+
+
+def parse_reset_duration(value) -> Optional[float]:
+    """'1s', '6m0s', '20ms' 형태의 rate limit 리셋 시간을 초 단위로 변환"""
+    if value is None:
+        return None
+
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    total = 0.0
+    matched = False
+    for amount, unit in re.findall(r'([\d.]+)(ms|h|m|s)', value):
+        matched = True
+        amount = float(amount)
+        if unit == 'ms':
+            total += amount / 1000
+        elif unit == 's':
+            total += amount
+        elif unit == 'm':
+            total += amount * 60
+        elif unit == 'h':
+            total += amount * 3600
+    return total if matched else None
+
+
+RETRYABLE_ERRORS = {'RateLimitError', 'APITimeoutError', 'APIConnectionError', 'InternalServerError'}
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """같은 입력으로 다시 보내면 성공할 수 있는 오류인지 (한도 초과, 타임아웃, 서버 오류)"""
+    if type(error).__name__ in RETRYABLE_ERRORS:
+        return True
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    status_code = getattr(error, 'status_code', None)
+    return status_code is not None and status_code >= 500
+
+
+PERMANENT_ERRORS = {'BadRequestError', 'UnprocessableEntityError'}
+PERMANENT_STATUS_CODES = {400, 413, 422}
+
+
+def is_permanent_error(error) -> bool:
+    """입력이 바뀌지 않으면 다시 보내도 계속 실패하는 오류인지 (입력 길이 초과 등 400 계열)
+
+    예외 객체 또는 last_errors에 기록한 'TypeName: message' 문자열을 받는다.
+    """
+    if isinstance(error, str):
+        return error.split(':', 1)[0] in PERMANENT_ERRORS
+    if type(error).__name__ in PERMANENT_ERRORS:
+        return True
+    return getattr(error, 'status_code', None) in PERMANENT_STATUS_CODES
+
+
+class TokenBucket:
+    """분당 한도를 초 단위로 채워 넣는 토큰 버킷"""
+
+    def __init__(self, limit_per_minute: float):
+        self.capacity = float(limit_per_minute)
+        self.refill_rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1) -> None:
+        """요청량만큼 토큰이 쌓일 때까지 대기 후 차감"""
+        # 이벤트 루프 안에서 락을 만들어야 Python 3.8/3.9에서도 루프가 어긋나지 않음
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        amount = min(float(amount), self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.refill_rate)
+
+    def sync(self, remaining, reset_seconds: Optional[float] = None) -> None:
+        """서버가 알려준 잔여 한도가 더 적으면 버킷을 그에 맞춤"""
+        if remaining is None:
+            return
+
+        self._refill()
+        remaining = float(remaining)
+        if remaining < self.tokens:
+            self.tokens = remaining
+        # 한도가 완전히 소진된 경우 서버 리셋 시점 전에는 요청하지 않도록 음수 잔량으로 표시
+        if remaining <= 0 and reset_seconds:
+            self.tokens = min(self.tokens, -reset_seconds * self.refill_rate)
+
+
+class OpenAIEmbeddingBackend:
+    """OpenAI 비동기 클라이언트 (응답 헤더까지 함께 반환)"""
+
+    def __init__(self, client=None):
+        if client is None:
+            import openai
+            client = openai.AsyncOpenAI(api_key=openai.api_key)
+        self.client = client
+
+    async def embed(self, texts: List[str], model: str, dimensions: Optional[int] = None) -> Tuple[List[List[float]], Dict]:
+        kwargs = {'model': model, 'input': texts, 'encoding_format': 'float'}
+        if dimensions:
+            kwargs['dimensions'] = dimensions
+
+        raw = await self.client.embeddings.with_raw_response.create(**kwargs)
+        response = raw.parse()
+        return [data.embedding for data in response.data], dict(raw.headers)
+
+
+class FakeEmbeddingBackend:
+    """네트워크 없이 처리량을 측정하기 위한 가짜 임베딩 백엔드"""
+
+    def __init__(self, dimensions: int = 3072, latency: float = 0.2,
+                 rpm_limit: int = 3000, tpm_limit: int = 1000000, failure_rate: float = 0.0,
+                 bad_inputs=None, seed: int = 0):
+        self.dimensions = dimensions
+        self.latency = latency
+        self.rpm_limit = rpm_limit
+        self.tpm_limit = tpm_limit
+        self.failure_rate = failure_rate
+        self.bad_inputs = set(bad_inputs or [])
+        self._rng = np.random.default_rng(seed)
+        self.requests = 0
+        self.tokens = 0
+        self._window_start = time.monotonic()
+        self._window_requests = 0
+        self._window_tokens = 0
+
+    def vector_for(self, text: str, dimensions: Optional[int] = None) -> np.ndarray:
+        """텍스트 해시로 결정되는 단위 벡터"""
+        seed = int(hashlib.sha256(text.encode('utf-8')).hexdigest()[:16], 16)
+        vector = np.random.default_rng(seed).standard_normal(dimensions or self.dimensions)
+        return vector / np.linalg.norm(vector)
+
+    async def embed(self, texts: List[str], model: str, dimensions: Optional[int] = None) -> Tuple[List[List[float]], Dict]:
+        await asyncio.sleep(self.latency)
+        if self.failure_rate and self._rng.random() < self.failure_rate:
+            raise ConnectionError("fake backend failure")
+        if self.bad_inputs.intersection(texts):
+            raise ValueError("fake backend rejected input")
+
+        now = time.monotonic()
+        if now - self._window_start >= 60:
+            self._window_start = now
+            self._window_requests = 0
+            self._window_tokens = 0
+
+        used_tokens = sum(len(text) for text in texts)
+        self.requests += 1
+        self.tokens += used_tokens
+        self._window_requests += 1
+        self._window_tokens += used_tokens
+
+        reset = f"{max(0.0, 60 - (now - self._window_start)):.3f}s"
+        headers = {
+            'x-ratelimit-limit-requests': str(self.rpm_limit),
+            'x-ratelimit-limit-tokens': str(self.tpm_limit),
+            'x-ratelimit-remaining-requests': str(max(0, self.rpm_limit - self._window_requests)),
+            'x-ratelimit-remaining-tokens': str(max(0, self.tpm_limit - self._window_tokens)),
+            'x-ratelimit-reset-requests': reset,
+            'x-ratelimit-reset-tokens': reset,
+        }
+        return [self.vector_for(text, dimensions).tolist() for text in texts], headers
+
+
+class AsyncEmbeddingEngine:
+    """동시 요청 수와 RPM/TPM 한도를 지키며 배치 임베딩을 병렬 처리"""
+
+    def __init__(self, model: str, backend=None, embedding_dim: int = 3072, dimensions: Optional[int] = None,
+                 max_in_flight: int = None, rpm_limit: int = None, tpm_limit: int = None,
+                 batch_size: int = None, max_tokens_per_request: int = None, max_retries: int = 5,
+                 estimator: Optional[TokenEstimator] = None):
+        self.model = model
+        self.backend = backend
+        self.embedding_dim = embedding_dim
+        self.dimensions = dimensions
+        self.max_in_flight = max_in_flight or Config.EMBEDDING_MAX_IN_FLIGHT
+        self.rpm_limit = rpm_limit or Config.EMBEDDING_RPM_LIMIT
+        self.tpm_limit = tpm_limit or Config.EMBEDDING_TPM_LIMIT
+        self.batch_size = batch_size or Config.EMBEDDING_MAX_INPUTS_PER_REQUEST
+        self.max_tokens_per_request = max_tokens_per_request or Config.EMBEDDING_MAX_TOKENS_PER_REQUEST
+        self.max_retries = max_retries
+        self.estimator = estimator or TokenEstimator()
+        self.stats = {'requests': 0, 'retries': 0, 'rate_limited': 0, 'bisections': 0, 'failed_inputs': 0}
+        self.last_errors: Dict[int, str] = {}
+
+    def _get_backend(self):
+        if self.backend is None:
+            self.backend = OpenAIEmbeddingBackend()
+        return self.backend
+
+    def plan(self, texts: List[str]) -> Dict:
+        """토큰 예산 기준 배치 계획 (입력 수는 batch_size 이하)"""
+        return plan_embedding_requests(
+            texts, self.estimator,
+            max_tokens_per_request=self.max_tokens_per_request,
+            max_inputs_per_request=self.batch_size,
+        )
+
+    def _sync_limits(self, headers: Dict, request_bucket: TokenBucket, token_bucket: TokenBucket) -> None:
+        if not headers:
+            return
+        headers = {k.lower(): v for k, v in headers.items()}
+        request_bucket.sync(headers.get('x-ratelimit-remaining-requests'),
+                            parse_reset_duration(headers.get('x-ratelimit-reset-requests')))
+        token_bucket.sync(headers.get('x-ratelimit-remaining-tokens'),
+                          parse_reset_duration(headers.get('x-ratelimit-reset-tokens')))
+
+    async def _embed_batch(self, texts: List[str], tokens: int, semaphore, request_bucket, token_bucket):
+        backend = self._get_backend()
+
+        for attempt in range(self.max_retries):
+            await request_bucket.acquire(1)
+            await token_bucket.acquire(tokens)
+
+            async with semaphore:
+                try:
+                    self.stats['requests'] += 1
+                    vectors, headers = await backend.embed(texts, self.model, self.dimensions)
+                    self._sync_limits(headers, request_bucket, token_bucket)
+                    return vectors
+                except Exception as e:
+                    error = e
+
+            # 입력 자체가 잘못된 경우 재시도하지 않고 호출 측에서 배치를 나눔
+            if not is_retryable_error(error) or attempt == self.max_retries - 1:
+                break
+
+            self.stats['retries'] += 1
+            headers = getattr(getattr(error, 'response', None), 'headers', None)
+            if headers:
+                self._sync_limits(dict(headers), request_bucket, token_bucket)
+
+            if type(error).__name__ == 'RateLimitError':
+                self.stats['rate_limited'] += 1
+                retry_after = parse_reset_duration(headers.get('retry-after')) if headers else None
+                await asyncio.sleep(retry_after or 2 ** attempt)
+            else:
+                await asyncio.sleep(min(2 ** attempt * 0.5, 10))
+
+        raise error
+
+    async def embed_async(self, texts: List[str], progress=None, plan: Optional[Dict] = None) -> Tuple[np.ndarray, List[int]]:
+        """입력 순서대로 임베딩 행렬과 실패 인덱스 반환 (실패 사유는 last_errors에 기록)"""
+        result = np.zeros((len(texts), self.embedding_dim), dtype=np.float32)
+        self.last_errors = {}
+        if not texts:
+            return result, []
+
+        plan = plan or self.plan(texts)
+        texts = plan['texts']  # 입력당 토큰 한도에 맞게 자른 텍스트
+        token_counts = plan['token_counts']
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        request_bucket = TokenBucket(self.rpm_limit)
+        token_bucket = TokenBucket(self.tpm_limit)
+
+        async def run(batch_indices):
+            batch_texts = [texts[i] for i in batch_indices]
+            try:
+                tokens = sum(token_counts[i] for i in batch_indices)
+                vectors = await self._embed_batch(batch_texts, tokens, semaphore, request_bucket, token_bucket)
+                result[batch_indices] = np.asarray(vectors, dtype=np.float32)
+            except Exception as e:
+                # 한도 초과/연결 오류로 재시도를 다 쓴 배치는 나눠도 요청만 늘어나므로 배치 전체를 실패 처리
+                if len(batch_indices) == 1 or is_retryable_error(e):
+                    self.stats['failed_inputs'] += len(batch_indices)
+                    for i in batch_indices:
+                        self.last_errors[i] = f"{type(e).__name__}: {e}"
+                    return
+
+                # 입력 자체가 거부된 배치는 반으로 나눠 재귀적으로 재시도 (문제 입력 하나가 나머지를 막지 않도록)
+                self.stats['bisections'] += 1
+                middle = len(batch_indices) // 2
+                await asyncio.gather(run(batch_indices[:middle]), run(batch_indices[middle:]))
+
+        async def run_planned(batch_indices):
+            await run(batch_indices)
+            if progress is not None:
+                progress.update(1)
+
+        await asyncio.gather(*(run_planned(batch) for batch in plan['batches']))
+
+        return result, sorted(self.last_errors)
+
+    def embed(self, texts: List[str], progress=None, plan: Optional[Dict] = None) -> Tuple[np.ndarray, List[int]]:
+        """동기 코드에서 호출하는 진입점"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.embed_async(texts, progress, plan))
+
+        # 이미 이벤트 루프가 돌고 있으면(Jupyter, Streamlit 등) 별도 스레드에서 실행
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, self.embed_async(texts, progress, plan)).result()
+
+
+# 사용 예시: 네트워크 없이 동시 요청 수별 처리량 측정
+if __name__ == "__main__":
+    sample_texts = [f"테스트 동물 {i}는 활발하고 사람을 좋아합니다." * (1 + i % 50) for i in range(2000)]
+
+    for in_flight in [1, 4, 8, 16]:
+        backend = FakeEmbeddingBackend(dimensions=256, latency=0.2, tpm_limit=10000000,
+                                       bad_inputs=sample_texts[::500])
+        engine = AsyncEmbeddingEngine(
+            model="fake", backend=backend, embedding_dim=256,
+            max_in_flight=in_flight, rpm_limit=3000, tpm_limit=10000000,
+            batch_size=100, max_tokens_per_request=20000
+        )
+        start = time.perf_counter()
+        vectors, failed = engine.embed(sample_texts)
+        elapsed = time.perf_counter() - start
+        print(f"동시 요청 {in_flight:>2}개: {len(sample_texts) / elapsed:,.0f} texts/s "
+              f"({backend.requests}회 요청, 분할 {engine.stats['bisections']}회, {elapsed:.2f}s, 실패 {len(failed)}개)")
@@ -0,0 +1,354 @@
+"""
+추천 시스템 마이크로 벤치마크
+합성 데이터로 검색 경로의 지연 시간을 측정한다. API 호출은 하지 않는다.
+
+사용법:
+    python benchmark.py topk [--dim 3072] [--rows 1000 10000 100000]
+    python benchmark.py ann [--dim 3072] [--rows 100000] [--store data/embeddings]
+    python benchmark.py int8 [--dim 3072] [--rows 100000] [--store data/embeddings]
+    python benchmark.py soft [--rows 10000 100000]
+    python benchmark.py fused [--dim 256] [--rows 10000 100000]
+"""
+
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from vector_index import normalize_rows, normalize_vector, top_k_indices, PartitionedIndex
+from ann_index import IVFFlatIndex
+from quantization import Int8Quantizer
+from animal_features import AnimalFeatures
+from animal_filter import AnimalFilter
+from hybrid_search import weighted_fusion
+from fused_scoring import FusedScorer, MatchPreferences
+
+
+def make_synthetic_embeddings(rows, dim, seed=0):
+    """단위 벡터로 이루어진 합성 임베딩 행렬"""
+    rng = np.random.default_rng(seed)
+    matrix = rng.standard_normal((rows, dim), dtype=np.float32)
+    return normalize_rows(matrix)
+
+
+def make_clustered_embeddings(rows, dim, clusters=256, noise=0.6, seed=0):
+    """군집 구조가 있는 합성 임베딩 (실제 공고 임베딩처럼 비슷한 설명끼리 모임)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim), dtype=np.float32)
+    matrix = centers[rng.integers(0, clusters, rows)]
+    matrix += noise * rng.standard_normal((rows, dim), dtype=np.float32)
+    return normalize_rows(matrix)
+
+
+def make_synthetic_features(rows, seed=0):
+    """입양 가능 여부/크기/성별을 무작위로 배정한 필터 배열"""
+    rng = np.random.default_rng(seed)
+    return AnimalFeatures(
+        weight=rng.uniform(1, 35, rows).astype(np.float32),
+        birth_year=np.full(rows, 2020, dtype=np.int16),
+        age_months=rng.integers(1, 180, rows).astype(np.int16),
+        gender=rng.integers(0, 2, rows).astype(np.int8),
+        size=rng.integers(0, 3, rows).astype(np.int8),
+        available=rng.random(rows) < 0.7,
+    )
+
+
+SYNTHETIC_HASHTAGS = ['애교쟁이', '사람좋아', '산책좋아', '겁많음', '활발', '조용함', '순둥이', '똑똑이',
+                      '얌전함', '개냥이', '분리불안', '분리불안없음', '식탐', '사람', '애교']
+SYNTHETIC_REGIONS = ['서울', '경기', '인천', '부산', '대구', '광주', '대전', '충남', '전북', '경북']
+
+
+def make_synthetic_animals(rows, seed=0):
+    """AnimalFilter용 합성 동물 데이터 (결측값과 dict 컬럼 포함)"""
+    rng = np.random.default_rng(seed)
+    ages = rng.integers(0, 16, rows).astype(float)
+    ages[rng.random(rows) < 0.05] = np.nan
+    weights = rng.uniform(1, 35, rows).round(1)
+    weights[rng.random(rows) < 0.05] = np.nan
+    
+    def hashtags():
+        count = rng.integers(0, 5)
+        return list(rng.choice(SYNTHETIC_HASHTAGS, count, replace=False))
+    
+    def behavior_traits():
+        if rng.random() < 0.1:
+            return None
+        return {trait: int(rng.integers(1, 6)) for trait in ('affection', 'human_friendly', 'barking')
+                if rng.random() < 0.9}
+    
+    return pd.DataFrame({
+        'id': np.arange(rows).astype(str),
+        'status': rng.choice(['임보가능', '입양완료'], rows, p=[0.7, 0.3]),
+        'gender': rng.choice(['male', 'female'], rows),
+        'age': ages,
+        'weight': weights,
+        'care_type': rng.choice(['일반임보', '단기임보'], rows),
+        'rescue_location': rng.choice(SYNTHETIC_REGIONS, rows),
+        'neutered': rng.random(rows) < 0.5,
+        'hashtags': [hashtags() for _ in range(rows)],
+        'care_conditions': [{'region': '전국' if rng.random() < 0.2 else '', 'duration': int(rng.integers(1, 13))}
+                            for _ in range(rows)],
+        'behavior_traits': [behavior_traits() for _ in range(rows)],
+    })
+
+
+def time_call(func, repeat=20):
+    """함수 실행 시간 중앙값 (ms)"""
+    func()  # 워밍업
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def benchmark_topk(row_counts=(1000, 10000, 100000), dim=3072, top_k=10, repeat=20):
+    """sklearn cosine_similarity + 전체 argsort 대비 정규화 행렬 내적 + argpartition"""
+    from sklearn.metrics.pairwise import cosine_similarity
+    
+    print(f"\n⏱️  top-{top_k} 검색 벤치마크 (차원 {dim})")
+    print(f"{'행 수':>10} | {'기존(ms)':>10} | {'개선(ms)':>10} | {'배속':>6} | 결과 일치")
+    print("-" * 60)
+    
+    results = []
+    for rows in row_counts:
+        matrix = make_synthetic_embeddings(rows, dim)
+        query = np.random.default_rng(rows).standard_normal(dim, dtype=np.float32)
+        
+        def baseline():
+            similarities = cosine_similarity(query.reshape(1, -1), matrix).flatten()
+            return similarities.argsort()[-top_k:][::-1]
+        
+        def optimized():
+            similarities = matrix @ normalize_vector(query)
+            return top_k_indices(similarities, top_k)
+        
+        baseline_ms = time_call(baseline, repeat)
+        optimized_ms = time_call(optimized, repeat)
+        same = np.array_equal(baseline(), optimized())
+        
+        print(f"{rows:>10,} | {baseline_ms:>10.2f} | {optimized_ms:>10.2f} | {baseline_ms / optimized_ms:>5.1f}x | {same}")
+        results.append({'rows': rows, 'baseline_ms': baseline_ms, 'optimized_ms': optimized_ms, 'same_topk': same})
+    
+    return results
+
+
+def benchmark_ann(rows=100000, dim=3072, top_k=10, probes=(1, 4, 8, 16, 32, 64),
+                  queries=50, store=None):
+    """IVF-flat 근사 검색의 recall@k와 지연 시간 (구간 전수 검색 대비)"""
+    if store:
+        from embedding_store import load_store
+        matrix, df, _, _ = load_store(store)
+        features = AnimalFeatures.from_dataframe(df)
+        print(f"\n📂 저장소 사용: {store} ({len(matrix):,}행 x {matrix.shape[1]}차원)")
+    else:
+        matrix = make_clustered_embeddings(rows, dim)
+        features = make_synthetic_features(rows)
+    
+    # 서빙 경로와 같게 파티션 순서로 정렬
+    order = PartitionedIndex.partition_order(features)
+    matrix = normalize_rows(np.asarray(matrix)[order])
+    features = features.take(order)
+    partitioned = PartitionedIndex(features)
+    
+    start = time.perf_counter()
+    index = IVFFlatIndex.build(matrix)
+    build_s = time.perf_counter() - start
+    print(f"\n🏗️  IVF 인덱스: {index.n_lists}개 리스트, 생성 {build_s:.1f}초, 메타데이터 {index.nbytes() / 1024 / 1024:.1f} MB")
+    
+    rng = np.random.default_rng(1)
+    query_rows = rng.choice(len(matrix), queries, replace=False)
+    query_vectors = [normalize_vector(matrix[i] + 0.3 * rng.standard_normal(matrix.shape[1], dtype=np.float32))
+                     for i in query_rows]
+    
+    scenarios = {
+        '필터 없음': partitioned.candidate_ranges(available_only=False),
+        '입양가능': partitioned.candidate_ranges(available_only=True),
+        '입양가능+소형+여': partitioned.candidate_ranges(available_only=True, size=0, gender=1),
+    }
+    
+    results = []
+    for name, ranges in scenarios.items():
+        candidates = sum(stop - start for start, stop in ranges)
+        exact = [PartitionedIndex.search(matrix, q, top_k, ranges)[0] for q in query_vectors]
+        exact_ms = time_call(lambda: [PartitionedIndex.search(matrix, q, top_k, ranges) for q in query_vectors], 3) / queries
+        
+        print(f"\n⏱️  {name} (후보 {candidates:,}행) - 전수 검색 {exact_ms:.2f} ms/쿼리")
+        print(f"{'n_probe':>8} | {'ms/쿼리':>8} | {'배속':>6} | {'recall@' + str(top_k):>10} | 탐색 행 비율")
+        print("-" * 60)
+        
+        for n_probe in probes:
+            approx = [index.search(matrix, q, top_k, ranges, n_probe=n_probe) for q in query_vectors]
+            recall = np.mean([len(np.intersect1d(e, a[0])) / max(1, len(e)) for e, a in zip(exact, approx)])
+            scanned = np.mean([a[2] for a in approx]) / max(1, candidates)
+            ann_ms = time_call(lambda: [index.search(matrix, q, top_k, ranges, n_probe=n_probe) for q in query_vectors], 3) / queries
+            
+            print(f"{n_probe:>8} | {ann_ms:>8.2f} | {exact_ms / ann_ms:>5.1f}x | {recall:>10.3f} | {scanned:.1%}")
+            results.append({'scenario': name, 'n_probe': n_probe, 'ms': ann_ms, 'exact_ms': exact_ms,
+                            'recall': float(recall), 'scanned_ratio': float(scanned)})
+    
+    return results
+
+
+def benchmark_int8(rows=100000, dim=3072, top_k=10, reranks=(50, 100, 200, 500), queries=50, store=None):
+    """int8 1차 스캔 + 원본 재정렬 대비 float32 전수 검색: 메모리, 지연 시간, top-k 일치율"""
+    if store:
+        from embedding_store import load_store
+        matrix, _, _, _ = load_store(store)
+        matrix = normalize_rows(matrix)
+        print(f"\n📂 저장소 사용: {store} ({len(matrix):,}행 x {matrix.shape[1]}차원)")
+    else:
+        matrix = make_clustered_embeddings(rows, dim)
+    
+    start = time.perf_counter()
+    quantizer = Int8Quantizer.fit(matrix)
+    build_s = time.perf_counter() - start
+    
+    float64_mb = matrix.size * 8 / 1024 / 1024
+    float32_mb = matrix.nbytes / 1024 / 1024
+    int8_mb = quantizer.nbytes() / 1024 / 1024
+    print(f"\n🗜️  int8 양자화: 생성 {build_s:.1f}초")
+    print(f"   메모리: float64 pickle {float64_mb:.1f} MB → float32 {float32_mb:.1f} MB → int8 {int8_mb:.1f} MB "
+          f"({float32_mb / int8_mb:.1f}x / {float64_mb / int8_mb:.1f}x)")
+    
+    rng = np.random.default_rng(1)
+    query_vectors = [normalize_vector(matrix[i] + 0.3 * rng.standard_normal(matrix.shape[1], dtype=np.float32))
+                     for i in rng.choice(len(matrix), queries, replace=False)]
+    ranges = [(0, len(matrix))]
+    
+    exact = [PartitionedIndex.search(matrix, q, top_k, ranges)[0] for q in query_vectors]
+    exact_ms = time_call(lambda: [PartitionedIndex.search(matrix, q, top_k, ranges) for q in query_vectors], 3) / queries
+    print(f"\n⏱️  float32 전수 검색 {exact_ms:.2f} ms/쿼리")
+    print(f"{'재정렬':>8} | {'ms/쿼리':>8} | {'배속':>6} | {'top-' + str(top_k) + ' 일치':>10} | 순서까지 일치")
+    print("-" * 60)
+    
+    results = []
+    for rerank in reranks:
+        approx = [quantizer.search(matrix, q, top_k, ranges, rerank=rerank)[0] for q in query_vectors]
+        agreement = np.mean([len(np.intersect1d(e, a)) / top_k for e, a in zip(exact, approx)])
+        identical = np.mean([np.array_equal(e, a) for e, a in zip(exact, approx)])
+        int8_ms = time_call(lambda: [quantizer.search(matrix, q, top_k, ranges, rerank=rerank) for q in query_vectors], 3) / queries
+        
+        print(f"{rerank:>8} | {int8_ms:>8.2f} | {exact_ms / int8_ms:>5.1f}x | {agreement:>10.3f} | {identical:.1%}")
+        results.append({'rerank': rerank, 'ms': int8_ms, 'exact_ms': exact_ms, 'agreement': float(agreement),
+                        'identical': float(identical), 'int8_mb': int8_mb, 'float32_mb': float32_mb})
+    
+    return results
+
+
+def benchmark_soft_filter(row_counts=(10000, 100000), repeat=5):
+    """AnimalFilter 소프트 점수: 행별 _calculate_match_score 대비 컬럼 배열 연산 (점수 완전 일치 확인)"""
+    preferences = {
+        'region': ['서울', '경기'],
+        'age_preference': {'preferred': {'min': 2, 'max': 5}, 'acceptable': {'min': 1, 'max': 8}},
+        'size_preference': {'preferred': {'min': 3.0, 'max': 10.0}, 'acceptable': {'min': 0, 'max': 50}},
+        'personality_traits': ['애교', '사람좋아', '조용함'],
+        'behavior_preferences': {
+            trait: {'ideal': ideal, 'acceptable': [max(1, ideal - 1), ideal, min(5, ideal + 1)]}
+            for trait, ideal in (('affection', 4), ('human_friendly', 5), ('barking', 2))
+        },
+        'weights': {'age': 1.5, 'size': 1.2, 'personality': 1.8, 'behavior': 1.3},
+    }
+    
+    print(f"\n⏱️  소프트 필터링 점수 벤치마크")
+    print(f"{'행 수':>10} | {'기존(ms)':>10} | {'개선(ms)':>10} | {'배속':>7} | 점수 일치")
+    print("-" * 62)
+    
+    results = []
+    for rows in row_counts:
+        animal_filter = AnimalFilter(make_synthetic_animals(rows))
+        available = animal_filter.animals[animal_filter.animals['status'] == '임보가능']
+        positions = np.flatnonzero((animal_filter.animals['status'] == '임보가능').to_numpy())
+        
+        # 기준 구현: 해시태그 bitset 없이 행별 부분 문자열 비교 (개선 경로와 코드를 공유하지 않음)
+        reference = AnimalFilter(animal_filter.animals)
+        reference.tag_index = None
+        
+        def baseline():
+            return np.array([reference._calculate_match_score(animal, preferences)
+                             for _, animal in available.iterrows()])
+        
+        def optimized():
+            return animal_filter.match_scores(positions, preferences)
+        
+        baseline_ms = time_call(baseline, 1)
+        optimized_ms = time_call(optimized, repeat)
+        same = np.array_equal(baseline(), optimized())
+        
+        print(f"{rows:>10,} | {baseline_ms:>10.1f} | {optimized_ms:>10.2f} | {baseline_ms / optimized_ms:>6.0f}x | {same}")
+        results.append({'rows': rows, 'baseline_ms': baseline_ms, 'optimized_ms': optimized_ms, 'identical': same})
+    
+    return results
+
+
+def benchmark_fused(row_counts=(10000, 100000), dim=256, top_k=10, repeat=5):
+    """하드 필터 + 소프트 점수 + 유사도: 두 랭커 결과를 데이터프레임 join 대비 FusedScorer 단일 패스"""
+    preferences = MatchPreferences(
+        hard_filters={'neutered': True, 'weight_range': {'min': 0, 'max': 20}, 'hashtags': ['애교', '활발함', '조용함']},
+        soft={
+            'region': ['서울', '경기'],
+            'age_preference': {'preferred': {'min': 2, 'max': 5}, 'acceptable': {'min': 1, 'max': 8}},
+            'personality_traits': ['애교', '사람좋아'],
+            'behavior_preferences': {'barking': {'ideal': 2, 'acceptable': [1, 2, 3]}},
+        },
+        min_match_score=0.3,
+    )
+    
+    print(f"\n⏱️  융합 점수 벤치마크 (dim={dim}, top_k={top_k})")
+    print(f"{'행 수':>10} | {'join(ms)':>10} | {'단일 패스(ms)':>13} | {'배속':>7} | 상위 일치")
+    print("-" * 66)
+    
+    results = []
+    for rows in row_counts:
+        animal_filter = AnimalFilter(make_synthetic_animals(rows), cache_size=0)  # 필터 결과 캐시 없이 비교
+        embeddings = normalize_rows(make_synthetic_embeddings(rows, dim))
+        query_vector = normalize_vector(embeddings[0] + embeddings[1])
+        scorer = FusedScorer(animal_filter, embeddings)
+        
+        def baseline():
+            hard = animal_filter.apply_filters(preferences.hard_filters)
+            soft = animal_filter.apply_soft_filtering(preferences.soft, threshold=preferences.min_match_score)
+            joined = hard[[]].join(soft['match_score'], how='inner').sort_index()
+            positions = animal_filter.animals.index.get_indexer(joined.index)
+            similarities = (embeddings[positions] @ query_vector).astype(np.float64)
+            scores = weighted_fusion(similarities, joined['match_score'].to_numpy(), preferences.dense_weight)
+            return positions[top_k_indices(scores, top_k)]
+        
+        def optimized():
+            return scorer.score(preferences, query_vector, top_k).rows
+        
+        baseline_ms = time_call(baseline, repeat)
+        optimized_ms = time_call(optimized, repeat)
+        same = np.array_equal(baseline(), optimized())
+        
+        print(f"{rows:>10,} | {baseline_ms:>10.1f} | {optimized_ms:>13.2f} | {baseline_ms / optimized_ms:>6.1f}x | {same}")
+        results.append({'rows': rows, 'baseline_ms': baseline_ms, 'optimized_ms': optimized_ms, 'identical': same})
+    
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="추천 시스템 마이크로 벤치마크")
+    parser.add_argument('name', choices=['topk', 'ann', 'int8', 'soft', 'fused'])
+    parser.add_argument('--dim', type=int, default=3072)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--store', default=None, help="합성 데이터 대신 사용할 임베딩 저장소 디렉토리 (ann, int8)")
+    args = parser.parse_args()
+    
+    if args.name == 'topk':
+        benchmark_topk(args.rows, args.dim, args.top_k)
+    elif args.name == 'ann':
+        benchmark_ann(args.rows[0], args.dim, args.top_k, store=args.store)
+    elif args.name == 'int8':
+        benchmark_int8(args.rows[0], args.dim, args.top_k, store=args.store)
+    elif args.name == 'soft':
+        benchmark_soft_filter(args.rows)
+    elif args.name == 'fused':
+        benchmark_fused(args.rows, args.dim, args.top_k)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,7 +13,59 @@ class Config:
     # OpenAI
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
     OPENAI_MODEL = "text-embedding-3-large"
+    EMBEDDING_DIMENSIONS = None  # None이면 모델 기본 차원(3072), 256/512/1024 등으로 줄일 수 있음
     
     # Files
     DATA_FILE = "data/animals.pkl"
-    EMBEDDING_FILE = "data/embeddings.pkl"
\ No newline at end of file
+    EMBEDDING_FILE = "data/embeddings"
+    EMBEDDING_STORE_DTYPE = "float32"  # 메모리를 더 줄이려면 "float16"
+    EMBEDDING_QUANTIZE = False  # True면 int8 행렬로 1차 스캔하고 원본(memmap)으로 재정렬
+    QUANTIZED_RERANK_CANDIDATES = 200
+    EMBEDDING_CACHE_FILE = "data/embedding_cache.pkl"
+    EMBEDDING_CACHE_MAX_ENTRIES = 50000
+    QUERY_CACHE_FILE = "data/query_cache.pkl"
+    QUERY_CACHE_MAX_ENTRIES = 1000
+    QUERY_CACHE_TTL_SECONDS = 7 * 24 * 3600  # 모델이 같으면 쿼리 임베딩은 변하지 않으므로 길게 유지
+    
+    # Embedding API 한도
+    EMBEDDING_MAX_IN_FLIGHT = 8
+    EMBEDDING_RPM_LIMIT = 3000
+    EMBEDDING_TPM_LIMIT = 1000000
+    EMBEDDING_MAX_TOKENS_PER_REQUEST = 300000
+    EMBEDDING_MAX_INPUTS_PER_REQUEST = 2048
+    EMBEDDING_MAX_TOKENS_PER_INPUT = 8191
+    
+    # 토크나이저가 없을 때 사용하는 글자당 토큰 비율 (cl100k_base, 한국어 공고 문장 기준)
+    EMBEDDING_HANGUL_TOKENS_PER_CHAR = 1.2
+    EMBEDDING_OTHER_TOKENS_PER_CHAR = 0.3
+    
+    # 근사 최근접 이웃(IVF-flat) 검색
+    ANN_MIN_ROWS = 50000           # 이보다 작은 카탈로그는 전수 검색만 사용
+    ANN_N_LISTS = None             # None이면 √N
+    ANN_N_PROBE = 16
+    ANN_EXACT_THRESHOLD = 20000    # 필터 후 후보가 이 이하이면 전수 검색
+    
+    # 증분 동기화 기준 컬럼 (이 컬럼이 워터마크 이후인 임보가능 행만 가져옴)
+    # 수정 시각 컬럼이 있으면 그 컬럼으로 바꿔야 등록일 이전 동물의 수정도 반영됨
+    SYNC_TIMESTAMP_COLUMN = "d_regis"
+    
+    # 신규 동물 → 신청자 역매칭
+    REVERSE_MATCH_TOP_N = 10       # 동물별로 보관할 상위 신청자 수
+    
+    # 추천 경로 계측 (sink: log, jsonl, prometheus). 기본은 메모리 집계만 (요청마다 출력/파일 기록 없음)
+    INSTRUMENTATION_SINKS = ()
+    METRICS_JSONL_FILE = "recommendation_metrics.jsonl"
+    PROMETHEUS_PORT = 9108
+    
+    # 로컬 어휘 검색 (임베딩 API 실패/지연 시 대체 검색)
+    LEXICAL_FALLBACK = True
+    QUERY_EMBEDDING_DEADLINE_SECONDS = 3.0   # 쿼리 임베딩이 이 시간을 넘기면 어휘 검색으로 응답
+    QUERY_EMBEDDING_RETRIES = 1              # 한도 초과/서버 오류 시 남은 시간 안에서 재시도할 횟수
+    
+    # 하이브리드 검색 (임베딩 유사도 + 어휘/해시태그 posting 점수 융합)
+    HYBRID_SEARCH = False
+    HYBRID_FUSION = "rrf"           # rrf 또는 weighted
+    HYBRID_CANDIDATES = 50          # dense/sparse 각각에서 융합에 넘길 상위 후보 수
+    HYBRID_RRF_K = 60
+    HYBRID_DENSE_WEIGHT = 0.7       # weighted 방식의 dense 비중
+    HYBRID_HASHTAG_WEIGHT = 2.0     # sparse 점수에서 해시태그 idf에 곱하는 비중 (BM25 점수에 더함)
\ No newline at end of file
@@ -220,6 +220,12 @@ class AnimalDataProcessorForGPT:
         # 1. 데이터 로딩
         df = self.load_data(file_path)
         
+        return self.process_dataframe(df)
+    
+    def process_dataframe(self, df):
+        """이미 로드된 데이터프레임 전처리 (증분 갱신 시 신규 행만 처리할 때 사용)"""
+        df = df.reset_index(drop=True)
+        
         # 2. 기본 정리
         df = self.basic_cleaning(df)
         
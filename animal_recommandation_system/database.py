@@ -33,4 +33,44 @@ class Database:
             print(f"📊 신규 데이터: {len(df)}마리")
             return df
         finally:
-            conn.close()
\ No newline at end of file
+            conn.close()
+    
+    def get_changed_data(self, last_update, column='d_regis'):
+        """기준 시점 이후 등록/수정된 임보가능 동물 데이터 가져오기 (column: 등록일 또는 수정일 컬럼)"""
+        if not column.isidentifier():
+            raise ValueError(f"잘못된 동기화 기준 컬럼: {column}")
+        
+        conn = pymysql.connect(**self.config)
+        try:
+            query = f"SELECT * FROM homeprotection WHERE state = %s AND {column} > %s"
+            df = pd.read_sql(query, conn, params=['임보가능', last_update])
+            print(f"📊 {column} 기준 신규/변경 데이터: {len(df)}마리")
+            return df
+        finally:
+            conn.close()
+    
+    def get_available_uids(self):
+        """현재 임보가능 상태인 동물 uid 목록 가져오기"""
+        conn = pymysql.connect(**self.config)
+        try:
+            query = "SELECT uid FROM homeprotection WHERE state = %s"
+            df = pd.read_sql(query, conn, params=['임보가능'])
+            return set(df['uid'].tolist())
+        finally:
+            conn.close()
+    
+    def get_data_by_uids(self, uids):
+        """지정한 uid의 동물 데이터 가져오기"""
+        uids = list(uids)
+        if not uids:
+            return pd.DataFrame()
+        
+        conn = pymysql.connect(**self.config)
+        try:
+            placeholders = ', '.join(['%s'] * len(uids))
+            query = f"SELECT * FROM homeprotection WHERE uid IN ({placeholders})"
+            df = pd.read_sql(query, conn, params=uids)
+            print(f"📊 uid 지정 데이터: {len(df)}마리")
+            return df
+        finally:
+            conn.close()
@@ -0,0 +1,235 @@
+"""
+임베딩 차원 축소 모듈
+이미 임베딩된 저장소를 낮은 차원으로 줄이고, 전체 차원 대비 추천 순위가 얼마나 유지되는지 보고한다.
+
+    truncate  앞쪽 d개 성분만 남기고 다시 정규화.
+              text-embedding-3 계열은 API의 dimensions=d 결과와 같으므로
+              이후 쿼리/신규 동물은 dimensions=d로 바로 요청한다.
+    pca       저장소 샘플로 학습한 주성분 투영. 쿼리/신규 동물은 전체 차원으로 받아서 같은 투영을 적용한다.
+
+사용법:
+    python dimension_reduction.py report <저장소> [--dims 256 512 1024] [--method truncate|pca]
+    python dimension_reduction.py reduce <원본 저장소> <새 저장소> --dims 512 [--method truncate|pca]
+"""
+
+import os
+import time
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from vector_index import normalize_rows, top_k_indices
+from embedding_store import load_store, save_store
+
+
+# 모델별 기본 출력 차원 (dimensions 파라미터를 주지 않았을 때)
+NATIVE_DIMENSIONS = {
+    'text-embedding-3-large': 3072,
+    'text-embedding-3-small': 1536,
+    'text-embedding-ada-002': 1536,
+}
+# dimensions 파라미터로 차원을 줄일 수 있는 모델
+SHORTENABLE_MODELS = ('text-embedding-3-large', 'text-embedding-3-small')
+
+PROJECTION_FILE = 'projection.npz'
+REDUCTION_METHODS = ('truncate', 'pca')
+
+
+def native_dimensions(model: str, default: int = 3072) -> int:
+    """모델 기본 출력 차원"""
+    return NATIVE_DIMENSIONS.get(model, default)
+
+
+def truncate_embeddings(matrix, dims: int) -> np.ndarray:
+    """앞쪽 dims개 성분만 남기고 행 단위 재정규화"""
+    if dims > matrix.shape[1]:
+        raise ValueError(f"축소 차원({dims})이 원본 차원({matrix.shape[1]})보다 큽니다.")
+    return normalize_rows(matrix[:, :dims])
+
+
+class PCAProjection:
+    """주성분 투영 (평균 제거 → 성분 행렬 곱 → 재정규화)"""
+    
+    def __init__(self, mean: np.ndarray, components: np.ndarray, explained_variance: float = None):
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.components = np.asarray(components, dtype=np.float32)  # (축소 차원, 원본 차원)
+        self.explained_variance = explained_variance
+    
+    @property
+    def source_dim(self) -> int:
+        return self.components.shape[1]
+    
+    @property
+    def dims(self) -> int:
+        return self.components.shape[0]
+    
+    @classmethod
+    def fit(cls, matrix, dims: int, sample_size: int = 20000, seed: int = 0) -> 'PCAProjection':
+        """행렬 샘플의 공분산 고유분해로 상위 dims개 주성분 학습"""
+        if dims > matrix.shape[1]:
+            raise ValueError(f"축소 차원({dims})이 원본 차원({matrix.shape[1]})보다 큽니다.")
+        
+        rng = np.random.default_rng(seed)
+        rows = np.sort(rng.choice(len(matrix), min(sample_size, len(matrix)), replace=False))
+        sample = np.asarray(matrix[rows], dtype=np.float64)
+        
+        mean = sample.mean(axis=0)
+        sample -= mean
+        covariance = sample.T @ sample / max(1, len(sample) - 1)
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        
+        # eigh는 오름차순이므로 뒤에서부터 dims개
+        top = np.argsort(eigenvalues)[::-1][:dims]
+        explained = float(eigenvalues[top].sum() / max(eigenvalues.sum(), 1e-12))
+        return cls(mean, eigenvectors[:, top].T, explained)
+    
+    def transform(self, matrix, block_size: int = 8192) -> np.ndarray:
+        """원본 차원 벡터(1차원 또는 행렬)를 축소 차원 단위 벡터로 변환"""
+        single = np.ndim(matrix) == 1
+        matrix = np.atleast_2d(matrix)
+        
+        reduced = np.empty((len(matrix), self.dims), dtype=np.float32)
+        for start in range(0, len(matrix), block_size):
+            block = np.asarray(matrix[start:start + block_size], dtype=np.float32)
+            reduced[start:start + block_size] = (block - self.mean) @ self.components.T
+        reduced = normalize_rows(reduced)
+        
+        return reduced[0] if single else reduced
+    
+    def save(self, store_dir: str):
+        np.savez(os.path.join(store_dir, PROJECTION_FILE), mean=self.mean, components=self.components,
+                 explained_variance=np.array(self.explained_variance or 0.0))
+    
+    @classmethod
+    def load(cls, store_dir: str) -> 'PCAProjection':
+        with np.load(os.path.join(store_dir, PROJECTION_FILE), allow_pickle=False) as data:
+            return cls(data['mean'], data['components'], float(data['explained_variance']))
+
+
+def reduce_matrix(matrix, dims: int, method: str = 'truncate'):
+    """축소 행렬과 (pca일 때) 투영 객체"""
+    if method not in REDUCTION_METHODS:
+        raise ValueError(f"지원하지 않는 축소 방식: {method} (가능: {REDUCTION_METHODS})")
+    if method == 'truncate':
+        return truncate_embeddings(matrix, dims), None
+    
+    projection = PCAProjection.fit(matrix, dims)
+    return projection.transform(matrix), projection
+
+
+def reduce_store(source_dir: str, target_dir: str, dims: int, method: str = 'truncate',
+                 dtype: Optional[str] = None) -> Dict:
+    """전체 차원 저장소를 축소 차원 저장소로 변환 (API 재호출 없음)"""
+    if os.path.abspath(source_dir) == os.path.abspath(target_dir):
+        raise ValueError("원본과 다른 디렉토리에 저장해야 합니다.")
+    
+    matrix, df, _, manifest = load_store(source_dir)
+    if manifest.get('reduction'):
+        raise ValueError(f"이미 축소된 저장소입니다: {source_dir} ({manifest['reduction']})")
+    
+    source_dim = manifest['embedding_dim']
+    print(f"📉 임베딩 차원 축소: {source_dim} → {dims} ({method}) {source_dir} → {target_dir}")
+    if method == 'truncate' and manifest['model'] not in SHORTENABLE_MODELS:
+        print(f"   ⚠️  {manifest['model']}은 dimensions 파라미터를 지원하지 않아 쿼리와 차원이 맞지 않을 수 있습니다.")
+    
+    reduced, projection = reduce_matrix(matrix, dims, method)
+    
+    reduction = {'method': method, 'source_dimensions': source_dim}
+    if method == 'truncate':
+        # API에 dimensions=dims로 요청한 결과와 같은 벡터
+        request_dimensions = dims
+    else:
+        request_dimensions = manifest.get('dimensions')
+        reduction['explained_variance'] = projection.explained_variance
+    
+    os.makedirs(target_dir, exist_ok=True)
+    if projection is not None:
+        projection.save(target_dir)
+    
+    new_manifest = save_store(
+        target_dir, reduced, df, manifest['model'], dtype=dtype or manifest['dtype'],
+        extra={'normalized': True, 'dimensions': request_dimensions, 'reduction': reduction}
+    )
+    
+    before = manifest['rows'] * source_dim * np.dtype(manifest['dtype']).itemsize / 1024 / 1024
+    after = new_manifest['rows'] * dims * np.dtype(new_manifest['dtype']).itemsize / 1024 / 1024
+    print(f"✅ 축소 완료: 행렬 {before:.1f} MB → {after:.1f} MB")
+    return new_manifest
+
+
+def ranking_overlap_report(matrix, dims_list: Sequence[int] = (256, 512, 1024), method: str = 'truncate',
+                           top_k: int = 10, n_queries: int = 200, queries=None, seed: int = 0) -> Dict:
+    """축소 차원별 상위 k개가 전체 차원 결과와 얼마나 겹치는지 보고
+    
+    Args:
+        queries: 전체 차원 쿼리 벡터 (None이면 저장된 동물 n_queries마리를 쿼리로 사용, 자기 자신은 제외)
+    
+    Returns:
+        {차원: {'overlap': 평균 overlap@k, 'top1': 1위 일치율, 'ms': 쿼리당 검색 시간, 'matrix_mb': 행렬 크기}}
+    """
+    full = normalize_rows(matrix)
+    rng = np.random.default_rng(seed)
+    
+    exclude = None
+    if queries is None:
+        exclude = rng.choice(len(full), min(n_queries, len(full)), replace=False)
+        queries = full[exclude]
+    queries = normalize_rows(np.atleast_2d(queries))
+    
+    def rank(target, query_vectors):
+        ranked = []
+        for i, query in enumerate(query_vectors):
+            scores = target @ query
+            if exclude is not None:
+                scores[exclude[i]] = -np.inf
+            ranked.append(top_k_indices(scores, top_k))
+        return ranked
+    
+    start = time.perf_counter()
+    reference = rank(full, queries)
+    full_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    
+    print(f"\n📏 차원 축소 순위 비교 ({method}, 동물 {len(full):,}마리, 쿼리 {len(queries)}개, top-{top_k})")
+    print(f"{'차원':>6} | {'overlap@' + str(top_k):>10} | {'1위 일치':>8} | {'ms/쿼리':>8} | {'행렬(MB)':>9}")
+    print("-" * 56)
+    print(f"{full.shape[1]:>6} | {1.0:>10.3f} | {1.0:>8.3f} | {full_ms:>8.2f} | {full.nbytes / 1024 / 1024:>9.1f}")
+    
+    report = {}
+    for dims in dims_list:
+        if dims >= full.shape[1]:
+            continue
+        reduced, projection = reduce_matrix(full, dims, method)
+        reduced_queries = projection.transform(queries) if projection is not None else truncate_embeddings(queries, dims)
+        
+        start = time.perf_counter()
+        ranked = rank(reduced, reduced_queries)
+        ms = (time.perf_counter() - start) * 1000 / len(queries)
+        
+        overlap = float(np.mean([len(np.intersect1d(a, b)) / top_k for a, b in zip(reference, ranked)]))
+        top1 = float(np.mean([a[0] == b[0] for a, b in zip(reference, ranked)]))
+        report[dims] = {'overlap': overlap, 'top1': top1, 'ms': ms, 'matrix_mb': reduced.nbytes / 1024 / 1024}
+        print(f"{dims:>6} | {overlap:>10.3f} | {top1:>8.3f} | {ms:>8.2f} | {reduced.nbytes / 1024 / 1024:>9.1f}")
+    
+    return report
+
+
+# 사용 예시
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="임베딩 차원 축소")
+    parser.add_argument('command', choices=['report', 'reduce'])
+    parser.add_argument('source', help="전체 차원 임베딩 저장소 디렉토리")
+    parser.add_argument('target', nargs='?', help="축소 저장소 디렉토리 (reduce)")
+    parser.add_argument('--dims', type=int, nargs='+', default=[256, 512, 1024])
+    parser.add_argument('--method', choices=REDUCTION_METHODS, default='truncate')
+    parser.add_argument('--top-k', type=int, default=10)
+    args = parser.parse_args()
+    
+    if args.command == 'report':
+        store_matrix, _, _, _ = load_store(args.source)
+        ranking_overlap_report(store_matrix, args.dims, args.method, args.top_k)
+    else:
+        if not args.target:
+            parser.error("reduce에는 새 저장소 디렉토리가 필요합니다.")
+        reduce_store(args.source, args.target, args.dims[0], args.method)
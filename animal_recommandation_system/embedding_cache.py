@@ -0,0 +1,241 @@
+"""
+임베딩 캐시 모듈
+(모델, 차원, 임베딩 텍스트 해시) 단위로 임베딩 벡터를 디스크에 보관해서
+변경된 동물만 API를 호출하도록 한다.
+사용자 쿼리 임베딩은 QueryEmbeddingCache(LRU + TTL)에 따로 보관한다.
+"""
+
+import os
+import time
+import pickle
+import hashlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """내용 해시 기반 영속 임베딩 캐시 (LRU 방식 크기 제한)"""
+
+    def __init__(self, cache_path: Optional[str] = None, max_entries: int = 50000):
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Tuple[str, int, str], np.ndarray]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._dirty = False
+
+        if cache_path and os.path.exists(cache_path):
+            self.load()
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        """임베딩 텍스트의 SHA-256 해시"""
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def make_key(self, model: str, dimensions: int, text: str) -> Tuple[str, int, str]:
+        """캐시 키 생성: (모델, 차원, 텍스트 해시)"""
+        return (model, int(dimensions), self.text_hash(text))
+
+    def get(self, model: str, dimensions: int, text: str) -> Optional[np.ndarray]:
+        """캐시 조회 (조회된 항목은 최근 사용으로 갱신)"""
+        key = self.make_key(model, dimensions, text)
+        vector = self._entries.get(key)
+        if vector is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return vector
+
+    def put(self, model: str, dimensions: int, text: str, vector) -> None:
+        """캐시 저장 (최대 개수를 넘으면 가장 오래 사용하지 않은 항목부터 제거)"""
+        key = self.make_key(model, dimensions, text)
+        self._entries[key] = np.asarray(vector, dtype=np.float32)
+        self._entries.move_to_end(key)
+        self._dirty = True
+        self._evict()
+
+    def lookup_many(self, model: str, dimensions: int, texts: List[str]) -> Tuple[Dict[int, np.ndarray], List[int]]:
+        """여러 텍스트를 한 번에 조회해서 (히트 인덱스→벡터, 미스 인덱스 목록) 반환"""
+        found = {}
+        missing = []
+        for i, text in enumerate(texts):
+            vector = self.get(model, dimensions, text)
+            if vector is None:
+                missing.append(i)
+            else:
+                found[i] = vector
+        return found, missing
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def load(self) -> None:
+        """디스크에서 캐시 로드"""
+        with open(self.cache_path, 'rb') as f:
+            data = pickle.load(f)
+
+        self._entries = OrderedDict(data.get('entries', {}))
+        self._evict()
+        self._dirty = False
+        print(f"📦 임베딩 캐시 로드: {len(self._entries):,}개 ({self.cache_path})")
+
+    def save(self, force: bool = False) -> None:
+        """변경 사항이 있으면 캐시를 디스크에 저장"""
+        if not self.cache_path or (not self._dirty and not force):
+            return
+
+        cache_dir = os.path.dirname(self.cache_path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        # 저장 중 중단되어도 기존 캐시가 깨지지 않도록 임시 파일에 쓴 뒤 교체
+        tmp_path = self.cache_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'entries': self._entries, 'max_entries': self.max_entries}, f)
+        os.replace(tmp_path, self.cache_path)
+        self._dirty = False
+
+    def clear(self) -> None:
+        """캐시 전체 삭제"""
+        self._entries.clear()
+        self._dirty = True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        """캐시 히트/미스 통계"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'size_mb': sum(v.nbytes for v in self._entries.values()) / 1024 / 1024,
+        }
+
+
+class QueryEmbeddingCache:
+    """사용자 쿼리 임베딩 캐시 (LRU + TTL, 선택적으로 디스크에 보관)
+
+    키는 (모델, 차원, preprocess_user_query로 정제한 쿼리)이고,
+    ttl_seconds가 지난 항목은 조회 시 만료 처리한다.
+    """
+
+    def __init__(self, cache_path: Optional[str] = None, max_entries: int = 1000,
+                 ttl_seconds: Optional[float] = 7 * 24 * 3600, autosave_every: int = 20):
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.autosave_every = autosave_every
+        self._entries: 'OrderedDict[Tuple[str, int, str], Tuple[float, np.ndarray]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self._unsaved = 0
+
+        if cache_path and os.path.exists(cache_path):
+            self.load()
+
+    @staticmethod
+    def make_key(model: str, dimensions: int, query: str) -> Tuple[str, int, str]:
+        return (model, int(dimensions), query)
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def get(self, model: str, dimensions: int, query: str) -> Optional[np.ndarray]:
+        """캐시 조회 (만료된 항목은 삭제하고 미스로 처리)"""
+        key = self.make_key(model, dimensions, query)
+        entry = self._entries.get(key)
+        if entry is not None and self._expired(entry[0], time.time()):
+            del self._entries[key]
+            self.expirations += 1
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, model: str, dimensions: int, query: str, vector) -> None:
+        """캐시 저장 (autosave_every개 추가될 때마다 디스크에 기록)"""
+        key = self.make_key(model, dimensions, query)
+        self._entries[key] = (time.time(), np.asarray(vector, dtype=np.float32))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+        self._unsaved += 1
+        if self.autosave_every and self._unsaved >= self.autosave_every:
+            self.save()
+
+    def purge_expired(self) -> int:
+        """만료된 항목 일괄 삭제"""
+        now = time.time()
+        expired = [key for key, (created_at, _) in self._entries.items() if self._expired(created_at, now)]
+        for key in expired:
+            del self._entries[key]
+        self.expirations += len(expired)
+        return len(expired)
+
+    def load(self) -> None:
+        """디스크에서 캐시 로드 (만료된 항목은 제외)"""
+        with open(self.cache_path, 'rb') as f:
+            data = pickle.load(f)
+
+        self._entries = OrderedDict(data.get('entries', {}))
+        self.purge_expired()
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self._unsaved = 0
+        print(f"📦 쿼리 임베딩 캐시 로드: {len(self._entries):,}개 ({self.cache_path})")
+
+    def save(self, force: bool = False) -> None:
+        """변경 사항이 있으면 캐시를 디스크에 저장"""
+        if not self.cache_path or (not self._unsaved and not force):
+            return
+
+        cache_dir = os.path.dirname(self.cache_path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        tmp_path = self.cache_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'entries': self._entries, 'max_entries': self.max_entries}, f)
+        os.replace(tmp_path, self.cache_path)
+        self._unsaved = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Tuple[str, int, str]) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and not self._expired(entry[0], time.time())
+
+    def stats(self) -> Dict:
+        """쿼리 캐시 히트/미스 통계"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'expirations': self.expirations,
+            'evictions': self.evictions,
+        }
@@ -1,30 +1,83 @@
 import pandas as pd
 import numpy as np
 import openai
-from sklearn.metrics.pairwise import cosine_similarity
 import pickle
 import time
 import re
 from tqdm import tqdm
 import warnings
+from embedding_cache import EmbeddingCache, QueryEmbeddingCache
+from async_embedding import AsyncEmbeddingEngine, is_permanent_error
+from token_utils import print_plan_report
+from repair_queue import RepairQueue
+from embedding_store import save_store, load_store, is_embedding_store
+from vector_index import normalize_rows, normalize_vector, top_k_indices, PartitionedIndex
+from ann_index import IVFFlatIndex
+from quantization import Int8Quantizer
+from lexical_index import LexicalIndex, HashtagIndex, nonzero_scores, restrict_to_ranges
+from hybrid_search import fuse
+from dimension_reduction import PCAProjection, native_dimensions
+from recommendation_result import ResultColumns
+from instrumentation import Instrumentation
+from animal_features import AnimalFeatures, SIZE_CODES, GENDER_CODES
+from config import Config
 warnings.filterwarnings('ignore')
 
 class GPTEmbeddingProcessor:
-    def __init__(self, api_key=None, model="text-embedding-3-large"):
+    def __init__(self, api_key=None, model="text-embedding-3-large", cache=None, engine=None, repair_queue=None,
+                 dimensions=None, query_cache=None, instrumentation=None):
         """
         GPT 임베딩 기반 벡터화 프로세서
+        
+        Args:
+            cache: EmbeddingCache 객체 또는 캐시 파일 경로 (None이면 캐시 미사용)
+            engine: 대량 임베딩용 AsyncEmbeddingEngine (None이면 Config 한도로 생성)
+            repair_queue: 임베딩 실패 동물을 보관할 RepairQueue 객체 또는 파일 경로
+            dimensions: API에 요청할 출력 차원 (None이면 모델 기본 차원, text-embedding-3 계열만 지원)
+            query_cache: 사용자 쿼리 임베딩용 QueryEmbeddingCache 객체 또는 파일 경로 (None이면 미사용)
         """
         if api_key:
             openai.api_key = api_key
         
         self.model = model
         self.embeddings = None
+        self.normalized_embeddings = None  # 검색용 L2 정규화 행렬 (로드 시 1회 계산)
+        self.features = None  # 필터용 파생 배열 (AnimalFeatures)
+        self.index = None  # 파티션 구간 인덱스 (PartitionedIndex)
+        self.ann_index = None  # 대형 카탈로그용 근사 검색 인덱스 (IVFFlatIndex, ANN_MIN_ROWS 이상일 때만)
+        self.quantizer = None  # int8 양자화 행렬 (EMBEDDING_QUANTIZE일 때 1차 스캔용)
+        self.result_columns = None  # 결과 필드별 컬럼 배열 (ResultColumns, 첫 추천 때 생성)
+        self.lexical_index = None  # 임베딩 API 실패/지연 시 대체 검색용 글자 n-gram BM25 색인
+        self.hashtag_index = None  # 하이브리드 검색용 해시태그(addinfo08) posting 색인
+        self._query_client = None  # 제한 시간 있는 쿼리 임베딩 요청용 클라이언트 (재시도는 직접 처리)
         self.processed_df = None
-        self.embedding_dim = 3072
+        self.dimensions = dimensions
+        self.request_dim = dimensions or native_dimensions(model)  # API가 돌려주는 차원
+        self.embedding_dim = self.request_dim  # 저장/검색 차원 (PCA 축소 저장소면 더 작음)
+        self.projection = None  # PCA 축소 저장소의 투영 (쿼리/신규 동물에 같은 투영 적용)
+        self.reduction = None  # 저장소 manifest의 차원 축소 정보
+        
+        if isinstance(cache, str):
+            cache = EmbeddingCache(cache)
+        self.cache = cache
+        self.engine = engine or AsyncEmbeddingEngine(model=model, embedding_dim=self.request_dim, dimensions=dimensions)
+        
+        if isinstance(repair_queue, str):
+            repair_queue = RepairQueue(repair_queue)
+        self.repair_queue = repair_queue
+        
+        if isinstance(query_cache, str):
+            query_cache = QueryEmbeddingCache(query_cache)
+        self.query_cache = query_cache
+        
+        # 단계별 지연 시간/카운터 (sink가 없으면 메모리에만 수집)
+        self.instrumentation = instrumentation or Instrumentation()
         
         print(f"🤖 GPT 임베딩 프로세서 초기화")
         print(f"   - 모델: {model}")
-        print(f"   - 임베딩 차원: {self.embedding_dim}")
+        print(f"   - 임베딩 차원: {self.embedding_dim}" + (" (dimensions 파라미터로 축소)" if dimensions else ""))
+        if self.cache is not None:
+            print(f"   - 임베딩 캐시: {len(self.cache):,}개")
     
     def create_embedding_text(self, row):
         """동물 정보를 임베딩용 자연어 텍스트로 변환"""
@@ -131,71 +184,50 @@ class GPTEmbeddingProcessor:
         """단일 텍스트의 임베딩 생성"""
         for attempt in range(max_retries):
             try:
+                kwargs = {'dimensions': self.dimensions} if self.dimensions else {}
                 response = openai.embeddings.create(
                     model=self.model,
                     input=text,
-                    encoding_format="float"
+                    encoding_format="float",
+                    **kwargs
                 )
                 return response.data[0].embedding
             
             except openai.RateLimitError:
+                self.instrumentation.increment('api_retries')
                 print(f"   Rate limit reached, waiting {2**attempt} seconds...")
                 time.sleep(2**attempt)
             except Exception as e:
                 print(f"   Error on attempt {attempt + 1}: {str(e)}")
                 if attempt == max_retries - 1:
                     print(f"   Failed to get embedding after {max_retries} attempts")
+                    self.instrumentation.increment('api_failures')
                     return None
+                self.instrumentation.increment('api_retries')
                 time.sleep(1)
         
         return None
     
-    def get_embeddings_batch(self, texts, batch_size=100):
-        """배치로 임베딩 생성 (비용 및 속도 최적화)"""
-        print(f"\n🚀 GPT 임베딩 생성 중 (배치 크기: {batch_size})")
+    def get_embeddings_batch(self, texts, batch_size=None):
+        """배치로 임베딩 생성 (토큰 예산 기준으로 묶은 배치를 비동기 엔진으로 동시에 요청)"""
+        if batch_size:
+            self.engine.batch_size = batch_size
         
-        embeddings = []
-        failed_indices = []
+        # 실행 전 토큰 수/요청 수 사전 보고
+        plan = self.engine.plan(texts)
+        print_plan_report(plan)
         
-        # 배치 단위로 처리
-        for i in tqdm(range(0, len(texts), batch_size), desc="임베딩 생성"):
-            batch_texts = texts[i:i+batch_size]
-            
-            try:
-                # 배치 요청
-                response = openai.embeddings.create(
-                    model=self.model,
-                    input=batch_texts,
-                    encoding_format="float"
-                )
-                
-                # 결과 저장
-                batch_embeddings = [data.embedding for data in response.data]
-                embeddings.extend(batch_embeddings)
-                
-                # API 요청 제한 고려
-                time.sleep(0.1)  # 100ms 대기
-                
-            except Exception as e:
-                print(f"\n❌ 배치 {i//batch_size + 1} 실패: {str(e)}")
-                
-                # 개별 처리로 fallback
-                print("   개별 처리로 재시도...")
-                for j, text in enumerate(batch_texts):
-                    embedding = self.get_embedding(text)
-                    if embedding:
-                        embeddings.append(embedding)
-                    else:
-                        embeddings.append(np.zeros(self.embedding_dim))
-                        failed_indices.append(i + j)
-                
-                time.sleep(1)  # 실패 시 더 긴 대기
+        print(f"\n🚀 GPT 임베딩 생성 중 (요청당 최대 {self.engine.batch_size}개, 동시 요청: {self.engine.max_in_flight})")
+        
+        with tqdm(total=plan['num_requests'], desc="임베딩 생성") as progress:
+            embeddings, failed_indices = self.engine.embed(texts, progress=progress, plan=plan)
         
         print(f"✅ 임베딩 생성 완료")
         print(f"   - 성공: {len(embeddings) - len(failed_indices)}개")
         print(f"   - 실패: {len(failed_indices)}개")
+        print(f"   - API 요청: {self.engine.stats['requests']}회 (재시도 {self.engine.stats['retries']}회)")
         
-        return np.array(embeddings), failed_indices
+        return embeddings, failed_indices
     
     def process_animal_data(self, df):
         """동물 데이터 전체 처리"""
@@ -221,30 +253,423 @@ class GPTEmbeddingProcessor:
         print(f"   - 평균 길이: {np.mean(text_lengths):.0f}자")
         print(f"   - 최대 길이: {max(text_lengths)}자")
         
-        # 2. GPT 임베딩 생성
-        embeddings, failed_indices = self.get_embeddings_batch(embedding_texts)
+        # 2. GPT 임베딩 생성 (캐시에 없는 텍스트만 API 호출)
+        embeddings, failures = self.embed_texts_with_cache(embedding_texts)
+        
+        # 3. 결과 저장 (실패한 동물은 복구 대기열로 보내고 검색 대상에서 제외)
+        processed_df = df.copy()
+        processed_df['embedding_text'] = embedding_texts
+        processed_df, embeddings = self._exclude_failed(processed_df, embeddings, failures)
         
-        # 3. 결과 저장
         self.embeddings = embeddings
-        self.processed_df = df.copy()
-        self.processed_df['embedding_text'] = embedding_texts
+        self.processed_df = processed_df
+        self._refresh_index()
+        
+        return embeddings, processed_df['embedding_text'].tolist()
+    
+    def embed_texts_with_cache(self, texts):
+        """캐시 히트는 재사용하고 미스만 API로 임베딩해서 전체 행렬 구성
+        
+        Returns:
+            (임베딩 행렬, {실패 인덱스: 실패 사유})
+        """
+        if self.cache is None:
+            embeddings, failed_indices = self.get_embeddings_batch(texts)
+            return self._project(embeddings), {i: self.engine.last_errors.get(i, '') for i in failed_indices}
+        
+        # 캐시는 API 응답 그대로(요청 차원) 보관하고 투영은 마지막에 적용
+        found, missing = self.cache.lookup_many(self.model, self.request_dim, texts)
+        print(f"📦 임베딩 캐시: 히트 {len(found)}개, 미스 {len(missing)}개")
+        
+        # 같은 텍스트가 여러 번 나오면 한 번만 요청
+        unique_texts = list(dict.fromkeys(texts[i] for i in missing))
+        fetched = {}
+        failed_texts = {}
+        if unique_texts:
+            new_embeddings, failed_indices = self.get_embeddings_batch(unique_texts)
+            failed = set(failed_indices)
+            for j, text in enumerate(unique_texts):
+                fetched[text] = new_embeddings[j]
+                # 실패한 항목은 캐시하지 않아 다음 실행에서 다시 시도
+                if j in failed:
+                    failed_texts[text] = self.engine.last_errors.get(j, '')
+                else:
+                    self.cache.put(self.model, self.request_dim, text, new_embeddings[j])
+            self.cache.save()
+        
+        matrix = np.empty((len(texts), self.request_dim), dtype=np.float64)
+        for i, vector in found.items():
+            matrix[i] = vector
+        for i in missing:
+            matrix[i] = fetched[texts[i]]
         
-        return embeddings, embedding_texts
+        failures = {i: failed_texts[texts[i]] for i in missing if texts[i] in failed_texts}
+        
+        stats = self.cache.stats()
+        print(f"   - 누적 히트율: {stats['hit_rate']*100:.1f}% (캐시 {stats['entries']:,}개, {stats['size_mb']:.1f} MB)")
+        
+        return self._project(matrix), failures
+    
+    def _project(self, embeddings):
+        """PCA 축소 저장소면 요청 차원 벡터를 저장 차원으로 투영"""
+        if self.projection is None:
+            return embeddings
+        return self.projection.transform(embeddings)
+    
+    def _exclude_failed(self, df, embeddings, failures):
+        """임베딩 실패 행을 복구 대기열에 넣고 나머지 행만 반환"""
+        df = df.reset_index(drop=True)
+        if not failures:
+            return df, embeddings
+        
+        failed_positions = sorted(failures)
+        if self.repair_queue is not None:
+            for position in failed_positions:
+                row = df.iloc[position]
+                record = row.drop(labels=['embedding_text']).to_dict()
+                self.repair_queue.add(self._repair_key(row), record, row['embedding_text'], failures[position],
+                                      permanent=is_permanent_error(failures[position]))
+            self.repair_queue.save()
+            print(f"🧰 임베딩 실패 {len(failed_positions)}마리 → 복구 대기열 (대기 중 {len(self.repair_queue)}개, 검색 제외)")
+        else:
+            print(f"⚠️  임베딩 실패 {len(failed_positions)}마리 검색 제외")
+        
+        keep_mask = np.ones(len(df), dtype=bool)
+        keep_mask[failed_positions] = False
+        
+        return df[keep_mask].reset_index(drop=True), embeddings[keep_mask]
+    
+    def embed_dataframe(self, df):
+        """일부 동물 데이터만 임베딩 (기존 저장소 상태는 변경하지 않음, 실패 행은 제외)"""
+        embedding_texts = [self.create_embedding_text(row) for _, row in df.iterrows()]
+        embeddings, failures = self.embed_texts_with_cache(embedding_texts)
+        
+        embedded_df = df.copy()
+        embedded_df['embedding_text'] = embedding_texts
+        
+        return self._exclude_failed(embedded_df, embeddings, failures)
     
-    def process_user_query(self, user_input):
-        """사용자 쿼리를 임베딩으로 변환"""
+    def changed_rows(self, df):
+        """저장소에 없거나 임베딩 텍스트 내용 해시가 저장된 행과 다른 행만 (등록일 이전 행의 수정 감지)
+        
+        해시는 임베딩 캐시와 같은 EmbeddingCache.text_hash라서, 내용이 같으면 다시 임베딩하지 않는다.
+        같은 텍스트로 API가 입력을 거부했던 동물(복구 대기열의 permanent 항목)도 텍스트가 바뀔 때까지 제외한다.
+        """
+        if 'uid' not in df.columns:
+            return df
+        
+        stored = {}
+        if self.processed_df is not None and 'embedding_text' in self.processed_df.columns:
+            stored = dict(zip(self.processed_df['uid'], self.processed_df['embedding_text'].map(EmbeddingCache.text_hash)))
+        
+        changed = []
+        for _, row in df.iterrows():
+            text = self.create_embedding_text(row)
+            rejected = self.repair_queue is not None and self.repair_queue.permanently_failed(row['uid'], text)
+            changed.append(not rejected and stored.get(row['uid']) != EmbeddingCache.text_hash(text))
+        return df[np.array(changed, dtype=bool)]
+    
+    def drain_repair_queue(self):
+        """복구 대기열의 동물을 다시 임베딩해서 성공한 동물만 저장소에 병합
+        
+        Returns:
+            복구된 동물 uid 목록 (역매칭 등 후속 갱신 대상)
+        """
+        if self.repair_queue is None:
+            return []
+        
+        pending = self.repair_queue.pending()
+        if not pending:
+            return []
+        
+        print(f"🧰 임베딩 복구 대기열 재처리: {len(pending)}마리")
+        pending_df = pd.DataFrame([entry['row'] for entry in pending])
+        
+        # 다시 실패한 동물은 _exclude_failed에서 시도 횟수가 늘어난 채로 대기열에 남음
+        embedded_df, embeddings = self.embed_dataframe(pending_df)
+        if len(embedded_df) > 0:
+            self.upsert_animals(embedded_df, embeddings)
+            self.repair_queue.remove(self._repair_key(row) for _, row in embedded_df.iterrows())
+        self.repair_queue.save()
+        
+        print(f"✅ 복구 완료: {len(embedded_df)}마리 (남은 대기 {len(self.repair_queue)}개)")
+        return embedded_df['uid'].dropna().tolist() if 'uid' in embedded_df.columns else []
+    
+    @staticmethod
+    def _repair_key(row):
+        """복구 대기열 키 (uid가 없으면 임베딩 텍스트 해시)"""
+        uid = row.get('uid', None)
+        if uid is None or pd.isna(uid):
+            return EmbeddingCache.text_hash(row['embedding_text'])
+        return uid
+    
+    def upsert_animals(self, df, embeddings):
+        """uid 기준으로 임베딩 저장소에 병합 (기존 uid는 교체, 신규 uid는 추가)"""
+        df = df.reset_index(drop=True)
+        embeddings = np.asarray(embeddings)
+        
+        if self.processed_df is None or self.embeddings is None:
+            self.processed_df = df
+            self.embeddings = embeddings
+            self._refresh_index()
+            return len(df), 0
+        
+        replaced_mask = self.processed_df['uid'].isin(df['uid']).values
+        keep_mask = ~replaced_mask
+        
+        self.processed_df = pd.concat(
+            [self.processed_df[keep_mask], df], ignore_index=True
+        )
+        self.embeddings = np.vstack([self.embeddings[keep_mask], embeddings.astype(self.embeddings.dtype)])
+        self._refresh_index()
+        
+        replaced = int(replaced_mask.sum())
+        print(f"🔄 임베딩 병합: 신규 {len(df) - replaced}마리, 갱신 {replaced}마리 → 전체 {len(self.processed_df)}마리")
+        return len(df) - replaced, replaced
+    
+    def _refresh_index(self, already_normalized=False, ann_index=None, quantizer=None, lexical_index=None):
+        """검색용 정규화 행렬과 필터용 파생 배열 갱신 (쿼리마다 다시 계산하지 않도록)
+        
+        Args:
+            ann_index: 저장소에서 불러온 IVFFlatIndex (행 순서가 현재 행렬과 같을 때만 전달)
+            quantizer: 저장소에서 불러온 Int8Quantizer (행 순서가 현재 행렬과 같을 때만 전달)
+            lexical_index: 저장소에서 불러온 LexicalIndex (행 순서가 현재 행렬과 같을 때만 전달)
+        """
+        self.result_columns = None
+        if self.embeddings is None:
+            self.normalized_embeddings = None
+        elif already_normalized:
+            self.normalized_embeddings = self.embeddings
+        else:
+            self.normalized_embeddings = normalize_rows(self.embeddings)
+        
+        if self.processed_df is None:
+            self.features = None
+            self.index = None
+            self.ann_index = None
+            self.quantizer = None
+            self.lexical_index = None
+            self.hashtag_index = None
+            return
+        
+        # 입양 가능 → 크기 → 성별 순으로 행을 물리 정렬 (저장소가 이미 이 순서면 복사 없음)
+        features = AnimalFeatures.from_dataframe(self.processed_df)
+        order = PartitionedIndex.partition_order(features)
+        if np.any(order != np.arange(len(order))):
+            self.processed_df = self.processed_df.iloc[order].reset_index(drop=True)
+            self.embeddings = self.embeddings[order]
+            self.normalized_embeddings = self.embeddings if already_normalized else self.normalized_embeddings[order]
+            features = features.take(order)
+            ann_index = None  # 행 순서가 바뀌었으므로 저장된 배정/양자화 행렬/어휘 색인은 사용할 수 없음
+            quantizer = None
+            lexical_index = None
+        
+        self.features = features
+        self.index = PartitionedIndex(features)
+        self._refresh_ann_index(ann_index)
+        self._refresh_quantizer(quantizer)
+        self._refresh_lexical_index(lexical_index)
+    
+    def _refresh_ann_index(self, loaded_index=None):
+        """카탈로그가 ANN_MIN_ROWS 이상이면 IVF 인덱스 준비 (기존 중심이 있으면 행 재배정만)"""
+        rows = len(self.processed_df)
+        if rows < Config.ANN_MIN_ROWS:
+            self.ann_index = None
+            return
+        
+        if loaded_index is not None and loaded_index.rows == rows:
+            self.ann_index = loaded_index
+        elif self.ann_index is not None:
+            self.ann_index = IVFFlatIndex.from_centroids(self.normalized_embeddings, self.ann_index.centroids)
+        else:
+            start = time.time()
+            self.ann_index = IVFFlatIndex.build(self.normalized_embeddings, n_lists=Config.ANN_N_LISTS)
+            print(f"🏗️  ANN 인덱스 생성: {self.ann_index.n_lists}개 리스트, {time.time() - start:.1f}초")
+    
+    def _refresh_quantizer(self, loaded_quantizer=None):
+        """EMBEDDING_QUANTIZE가 켜져 있으면 int8 행렬 준비 (정규화 행렬 1회 순회)"""
+        if not Config.EMBEDDING_QUANTIZE:
+            self.quantizer = None
+        elif loaded_quantizer is not None and len(loaded_quantizer.codes) == len(self.processed_df):
+            self.quantizer = loaded_quantizer
+        else:
+            self.quantizer = Int8Quantizer.fit(self.normalized_embeddings)
+            print(f"🗜️  int8 양자화 행렬 생성: {self.quantizer.nbytes() / 1024 / 1024:.1f} MB")
+    
+    def _refresh_lexical_index(self, loaded_index=None):
+        """LEXICAL_FALLBACK/HYBRID_SEARCH가 켜져 있으면 embedding_text/gpt_description 어휘 색인과 해시태그 색인 준비"""
+        columns = [c for c in ('embedding_text', 'gpt_description') if c in self.processed_df.columns]
+        if not (Config.LEXICAL_FALLBACK or Config.HYBRID_SEARCH) or not columns:
+            self.lexical_index = None
+            self.hashtag_index = None
+            return
+        
+        # 해시태그 색인은 몇십 ms면 만들어지므로 저장하지 않고 매번 생성
+        if 'addinfo08' in self.processed_df.columns:
+            self.hashtag_index = HashtagIndex.build(self.processed_df['addinfo08'].tolist())
+        else:
+            self.hashtag_index = None
+        
+        if loaded_index is not None and loaded_index.n_docs == len(self.processed_df):
+            self.lexical_index = loaded_index
+            return
+        
+        start = time.time()
+        texts = self.processed_df[columns[0]].fillna('').astype(str)
+        for column in columns[1:]:
+            texts = texts + ' ' + self.processed_df[column].fillna('').astype(str)
+        self.lexical_index = LexicalIndex.build(texts.tolist())
+        print(f"🔤 어휘 색인 생성: 색인어 {len(self.lexical_index.terms):,}개, "
+              f"{self.lexical_index.nbytes() / 1024 / 1024:.1f} MB, {time.time() - start:.1f}초")
+    
+    def retire_animals(self, uids):
+        """더 이상 임보가능 상태가 아닌 동물을 저장소에서 제거"""
+        if self.processed_df is None or not len(uids):
+            return 0
+        
+        if self.repair_queue is not None and self.repair_queue.remove(uids):
+            self.repair_queue.save()
+        
+        retire_mask = self.processed_df['uid'].isin(list(uids)).values
+        retired = int(retire_mask.sum())
+        if retired:
+            self.processed_df = self.processed_df[~retire_mask].reset_index(drop=True)
+            self.embeddings = self.embeddings[~retire_mask]
+            self._refresh_index()
+            print(f"📤 임보가능 상태가 아닌 동물 {retired}마리 제외")
+        
+        return retired
+    
+    def process_user_query(self, user_input, deadline=None, verbose=True):
+        """사용자 쿼리를 임베딩으로 변환
+        
+        Args:
+            deadline: 임베딩 API 요청 제한 시간(초). 넘기면 요청을 끊고 None을 돌려줌 (대체 검색용)
+            verbose: False면 실패/시간 초과 메시지를 출력하지 않음
+        """
         
         # 사용자 입력을 자연어로 정제
         processed_query = self.preprocess_user_query(user_input)
         
-        # 임베딩 생성
-        query_embedding = self.get_embedding(processed_query)
+        # 같은 쿼리는 캐시된 임베딩 재사용 (정제된 쿼리 기준)
+        query_embedding = None
+        if self.query_cache is not None:
+            query_embedding = self.query_cache.get(self.model, self.request_dim, processed_query)
+            self.instrumentation.increment('query_cache_hits' if query_embedding is not None else 'query_cache_misses')
         
+        # 임베딩 생성
         if query_embedding is None:
-            print("❌ 사용자 쿼리 임베딩 생성 실패")
-            return None
+            with self.instrumentation.span('embedding_api'):
+                query_embedding = self._get_query_embedding(processed_query, deadline, verbose)
+            
+            if query_embedding is None:
+                if verbose:
+                    print("❌ 사용자 쿼리 임베딩 생성 실패")
+                return None
+            
+            if self.query_cache is not None:
+                self.query_cache.put(self.model, self.request_dim, processed_query, query_embedding)
         
-        return np.array(query_embedding)
+        return self._project(np.array(query_embedding))
+    
+    def _get_query_embedding(self, processed_query, deadline=None, verbose=True):
+        """쿼리 임베딩 API 호출
+        
+        deadline이 있으면 요청 자체에 남은 시간을 timeout으로 건다. 한도 초과/서버 오류처럼
+        다시 보내면 될 수 있는 실패는 시간이 남아 있을 때만 QUERY_EMBEDDING_RETRIES번까지 재시도한다.
+        시간을 넘긴 요청은 클라이언트가 끊으므로 뒤따르는 쿼리가 밀리지 않는다.
+        """
+        if not deadline:
+            return self.get_embedding(processed_query)
+        
+        if self._query_client is None:
+            self._query_client = openai.OpenAI(api_key=openai.api_key, max_retries=0)
+        kwargs = {'dimensions': self.dimensions} if self.dimensions else {}
+        started = time.monotonic()
+        
+        for attempt in range(Config.QUERY_EMBEDDING_RETRIES + 1):
+            remaining = deadline - (time.monotonic() - started)
+            if remaining <= 0:
+                break
+            try:
+                response = self._query_client.embeddings.create(
+                    model=self.model,
+                    input=processed_query,
+                    encoding_format="float",
+                    timeout=remaining,
+                    **kwargs
+                )
+                return response.data[0].embedding
+            except openai.APITimeoutError:
+                break
+            except Exception as e:
+                retryable = isinstance(e, (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError))
+                if retryable and attempt < Config.QUERY_EMBEDDING_RETRIES:
+                    self.instrumentation.increment('api_retries')
+                    continue
+                if verbose:
+                    print(f"   쿼리 임베딩 요청 실패: {str(e)}")
+                self.instrumentation.increment('api_failures')
+                return None
+        
+        if verbose:
+            print(f"⏱️  쿼리 임베딩이 {deadline}초를 넘겨 대체 검색으로 응답합니다.")
+        self.instrumentation.increment('embedding_deadline_exceeded')
+        return None
+    
+    def embed_queries(self, user_inputs):
+        """여러 사용자 쿼리를 임베딩 (캐시 히트는 재사용, 미스는 토큰 기준 배치로 한 번에 요청)
+        
+        Returns:
+            쿼리 순서대로 임베딩 벡터 목록 (실패한 쿼리는 None)
+        """
+        processed = [self.preprocess_user_query(q) for q in user_inputs]
+        unique_queries = list(dict.fromkeys(processed))
+        
+        vectors = {}
+        if self.query_cache is not None:
+            for query in unique_queries:
+                vector = self.query_cache.get(self.model, self.request_dim, query)
+                if vector is not None:
+                    vectors[query] = vector
+        
+        missing = [q for q in unique_queries if q not in vectors]
+        if missing:
+            embeddings, failed_indices = self.engine.embed(missing)
+            failed = set(failed_indices)
+            for i, query in enumerate(missing):
+                if i in failed:
+                    continue
+                vectors[query] = embeddings[i]
+                if self.query_cache is not None:
+                    self.query_cache.put(self.model, self.request_dim, query, embeddings[i])
+            if failed:
+                print(f"❌ 쿼리 임베딩 실패 {len(failed)}개")
+        
+        return [self._project(np.asarray(vectors[q])) if q in vectors else None for q in processed]
+    
+    def warm_up_query_cache(self, queries):
+        """자주 쓰는 쿼리를 미리 임베딩해서 캐시에 채움 (캐시에 없는 쿼리만 한 번에 요청)"""
+        if self.query_cache is None or not queries:
+            return 0
+        
+        processed = list(dict.fromkeys(self.preprocess_user_query(q) for q in queries))
+        missing = [q for q in processed
+                   if QueryEmbeddingCache.make_key(self.model, self.request_dim, q) not in self.query_cache]
+        if not missing:
+            print(f"🔥 쿼리 캐시 워밍업: {len(processed)}개 모두 캐시됨")
+            return 0
+        
+        embeddings, failed_indices = self.engine.embed(missing)
+        failed = set(failed_indices)
+        for i, query in enumerate(missing):
+            if i not in failed:
+                self.query_cache.put(self.model, self.request_dim, query, embeddings[i])
+        self.query_cache.save()
+        
+        warmed = len(missing) - len(failed)
+        print(f"🔥 쿼리 캐시 워밍업: {warmed}개 임베딩 (실패 {len(failed)}개, 캐시 {len(self.query_cache)}개)")
+        return warmed
     
     def preprocess_user_query(self, user_input):
         """사용자 입력을 기본 정제만 수행 (GPT가 의미를 알아서 이해)"""
@@ -292,153 +717,280 @@ class GPTEmbeddingProcessor:
         
         return preferences
     
-    def apply_hard_filters(self, df, embeddings, preferences):
-        """물리적 조건으로 먼저 필터링"""
-        # 인덱스를 리셋해서 0부터 시작하도록 만들기
+    def apply_hard_filters(self, df, embeddings, preferences, verbose=False):
+        """물리적 조건(크기/성별/나이)으로 필터링 (검색 경로는 _filter_ranges의 행 구간을 사용)
+        
+        Returns:
+            (필터링된 데이터프레임, 같은 행의 임베딩)
+        """
         df_reset = df.reset_index(drop=True)
+        features = self.features if df is self.processed_df else AnimalFeatures.from_dataframe(df_reset)
+        mask = features.hard_filter_mask(preferences, available_only=False)
+        
+        if verbose:
+            print(f"🔍 하드 필터 적용: {len(df_reset)}마리 → {int(mask.sum())}마리 (조건: {preferences})")
         
-        mask = pd.Series([True] * len(df_reset))
+        return df_reset[mask].reset_index(drop=True), embeddings[mask]
+    
+    def _filter_ranges(self, preferences, available_only=True):
+        """하드 필터 조건을 파티션 행 구간과 구간 내 나이/임보 지역/임보 기간 마스크로 변환"""
+        ranges = self.index.candidate_ranges(
+            available_only=available_only,
+            size=SIZE_CODES.get(preferences['size']),
+            gender=GENDER_CODES.get(preferences['gender']) if preferences['gender'] else None,
+        )
+        residual_mask = None
+        if self.features.has_residual_conditions(preferences):
+            residual_mask = lambda start, stop: self.features.residual_mask(preferences, start, stop)
+        return ranges, residual_mask
+    
+    def _build_results(self, top_indices, top_scores, retrieval='dense'):
+        """상위 행 번호와 유사도를 추천 결과 레코드 목록으로 변환 (필드별 컬럼 take 1회, 행 단위 pandas 접근 없음)"""
+        if self.result_columns is None:
+            self.result_columns = ResultColumns(self.processed_df)
+        return self.result_columns.take(top_indices, top_scores, retrieval)
+    
+    def find_similar_animals_batch(self, user_queries, top_k=5, available_only=True, block_size=4096, verbose=False):
+        """여러 쿼리를 한 번에 추천 (쿼리 임베딩 일괄 요청 + 같은 하드 필터 조건끼리 행렬-행렬 곱)
         
-        print(f"🔍 하드 필터 적용 전: {len(df_reset)}마리")
+        Args:
+            block_size: 한 번에 읽는 임베딩 행 수 (추가 메모리는 block_size x 그룹 쿼리 수)
+            verbose: True면 그룹별 후보 수를 콘솔에 출력
         
-        # 크기 필터
-        if preferences['size']:
-            print(f"   크기 조건: {preferences['size']}")
-            
-            # 몸무게 데이터 확인 및 정리
-            weights = pd.to_numeric(df_reset['addinfo07'], errors='coerce')
-            
-            if preferences['size'] == '소형':
-                weight_mask = weights < 7
-                print(f"   소형 조건 (<7kg): {weight_mask.sum()}마리")
-            elif preferences['size'] == '중형':
-                weight_mask = (weights >= 7) & (weights < 20)
-                print(f"   중형 조건 (7-20kg): {weight_mask.sum()}마리")
-            elif preferences['size'] == '대형':
-                weight_mask = weights >= 20
-                print(f"   대형 조건 (≥20kg): {weight_mask.sum()}마리")
-            
-            mask = mask & weight_mask
-            print(f"   크기 필터 후: {mask.sum()}마리")
+        Returns:
+            쿼리 순서대로 find_similar_animals와 같은 형식의 결과 목록
+        """
+        if self.embeddings is None:
+            print("❌ 임베딩 데이터가 없습니다.")
+            return [[] for _ in user_queries]
+        
+        # 1. 하드 필터 조건이 같은 쿼리끼리 묶음
+        preferences = [self.extract_user_preferences(q) for q in user_queries]
+        groups = self._group_by_filters(preferences, available_only)
+        
+        # 2. 후보가 있는 쿼리만 한 번에 임베딩
+        needed = [i for group in groups.values() if group['ranges'] for i in group['members']]
+        query_vectors = [None] * len(user_queries)
+        for i, vector in zip(needed, self.embed_queries([user_queries[i] for i in needed])):
+            query_vectors[i] = vector
+        if verbose:
+            print(f"🔍 배치 쿼리 {len(user_queries)}개 → 필터 그룹 {len(groups)}개, 임베딩 {len(needed)}개")
+        
+        # 3. 그룹별 행렬-행렬 곱으로 상위 k개 선택 후 결과 정리
+        hits = self.search_batch(query_vectors, preferences, top_k, available_only, block_size, groups=groups,
+                                 verbose=verbose)
+        return [self._build_results(top_indices, top_scores) for top_indices, top_scores in hits]
+    
+    def _group_by_filters(self, preferences, available_only=True):
+        """하드 필터 조건(size, gender, age, region, period)이 같은 쿼리 묶음과 그 조건의 행 구간"""
+        groups = {}
+        for i, pref in enumerate(preferences):
+            key = (pref.get('size'), pref.get('gender'), pref.get('age'), pref.get('region'), pref.get('period'))
+            if key not in groups:
+                ranges, residual_mask = self._filter_ranges(pref, available_only)
+                groups[key] = {'members': [], 'ranges': ranges, 'residual_mask': residual_mask}
+            groups[key]['members'].append(i)
+        return groups
+    
+    def search_batch(self, query_vectors, preferences, top_k=5, available_only=True, block_size=4096, groups=None,
+                     verbose=False):
+        """이미 임베딩된 쿼리 벡터들을 하드 필터 그룹별로 검색
+        
+        Args:
+            query_vectors: 쿼리 벡터 목록 (None인 쿼리는 빈 결과)
+            preferences: 쿼리별 하드 필터 조건 딕셔너리 (size/gender/age, 선택적으로 region/period)
+        
+        Returns:
+            쿼리 순서대로 (전체 행 기준 상위 인덱스, 유사도) 목록
+        """
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+        hits = [empty] * len(query_vectors)
+        groups = groups or self._group_by_filters(preferences, available_only)
+        
+        # 그룹별로 행렬을 블록 단위로 한 번만 읽어 모든 쿼리 점수 계산
+        for key, group in groups.items():
+            members = [i for i in group['members'] if query_vectors[i] is not None]
+            if not group['ranges'] or not members:
+                continue
             
-        # 성별 필터
-        if preferences['gender']:
-            print(f"   성별 조건: {preferences['gender']}")
-            gender_mask = df_reset['addinfo03'] == preferences['gender']
-            mask = mask & gender_mask
-            print(f"   성별 필터 후: {mask.sum()}마리")
-        
-        # 나이 필터 (연도 기반)
-        if preferences['age']:
-            print(f"   나이 조건: {preferences['age']}")
-            if preferences['age'] == '어린':
-                age_mask = df_reset['addinfo05'].astype(str).str.contains('2024|2023', na=False)
-                print(f"   어린 동물 (2023-2024): {age_mask.sum()}마리")
-            elif preferences['age'] == '고령':
-                age_mask = df_reset['addinfo05'].astype(str).str.contains('2013|2014|2015|2016', na=False)
-                print(f"   고령 동물 (2013-2016): {age_mask.sum()}마리")
-            else:
-                age_mask = pd.Series([True] * len(df_reset))
+            query_matrix = np.vstack([normalize_vector(query_vectors[i]) for i in members])
+            group_hits, candidate_count = PartitionedIndex.search_many(
+                self.normalized_embeddings, query_matrix, top_k, group['ranges'], group['residual_mask'], block_size
+            )
+            if verbose:
+                print(f"   - 조건 {key}: 쿼리 {len(members)}개, 후보 {candidate_count}마리")
             
-            mask = mask & age_mask
-            print(f"   나이 필터 후: {mask.sum()}마리")
+            for i, hit in zip(members, group_hits):
+                hits[i] = hit
         
-        # 필터링된 결과 반환 (인덱스도 함께 맞춰서)
-        filtered_df = df_reset[mask].reset_index(drop=True)
-        filtered_embeddings = embeddings[mask.values]  # numpy 배열 인덱싱
+        return hits
+    
+    def _residual_rows(self, preferences):
+        """행 번호 배열용 나이/임보 지역/임보 기간 조건 마스크 함수 (ANN/어휘 검색 후보 필터, 조건이 없으면 None)"""
+        if not self.features.has_residual_conditions(preferences):
+            return None
+        return lambda rows: self.features.residual_mask_at(preferences, rows)
+    
+    def _search_candidates(self, query_vector, top_k, ranges, residual_mask, preferences):
+        """필터 구간 안에서 상위 k개 (후보가 많으면 ANN, int8 행렬이 있으면 양자화 스캔, 아니면 전수 검색)
         
-        print(f"🎯 최종 필터링 결과: {len(filtered_df)}마리")
+        Returns:
+            (상위 인덱스, 유사도, 후보 수, 필터링 요약 문구)
+        """
+        range_total = sum(stop - start for start, stop in ranges)
+        if self.ann_index is not None and range_total > Config.ANN_EXACT_THRESHOLD:
+            top_indices, top_scores, scanned = self.ann_index.search(
+                self.normalized_embeddings, query_vector, top_k, ranges, self._residual_rows(preferences),
+                n_probe=Config.ANN_N_PROBE
+            )
+            candidate_count = range_total if len(top_indices) else 0
+            filter_note = f"조건부합 후보 {range_total}마리 (ANN 탐색 {scanned}마리)"
+        elif self.quantizer is not None:
+            # int8 행렬로 1차 스캔 후 상위 후보만 원본 벡터로 재정렬
+            top_indices, top_scores, candidate_count = self.quantizer.search(
+                self.normalized_embeddings, query_vector, top_k, ranges, residual_mask,
+                rerank=Config.QUANTIZED_RERANK_CANDIDATES
+            )
+            filter_note = f"조건부합 {candidate_count}마리"
+        else:
+            top_indices, top_scores, candidate_count = PartitionedIndex.search(
+                self.normalized_embeddings, query_vector, top_k, ranges, residual_mask
+            )
+            filter_note = f"조건부합 {candidate_count}마리"
+        return top_indices, top_scores, candidate_count, filter_note
+    
+    def _sparse_scores(self, user_query, ranges=None, residual_rows=None):
+        """필터 구간 안 어휘 BM25 + 해시태그 점수 (문서 번호 오름차순)
+        
+        해시태그 대응에는 '#'이 남아 있는 원문 쿼리를, 어휘 색인에는 정제된 쿼리를 쓴다.
+        """
+        totals = self.lexical_index.totals(self.preprocess_user_query(user_query))
+        if self.hashtag_index is not None:
+            totals += Config.HYBRID_HASHTAG_WEIGHT * self.hashtag_index.totals(user_query)
+        return restrict_to_ranges(*nonzero_scores(totals), ranges, residual_rows)
+    
+    def _hybrid_candidates(self, user_query, query_vector, top_k, ranges, residual_mask, preferences):
+        """dense 상위 후보와 어휘/해시태그 점수를 HYBRID_FUSION 방식으로 합친 상위 k개
         
-        # 필터링 결과 샘플 확인
-        if len(filtered_df) > 0:
-            print("   필터링된 동물 샘플:")
-            for i in range(min(3, len(filtered_df))):
-                row = filtered_df.iloc[i]
-                print(f"   - {row['addinfo01']}: {row['addinfo07']}kg, {row['addinfo03']}")
+        Returns:
+            (상위 인덱스, 코사인 유사도, 후보 수, 필터링 요약 문구)
+        """
+        instrumentation = self.instrumentation
+        n_candidates = max(top_k, Config.HYBRID_CANDIDATES)
+        
+        with instrumentation.span('similarity'):
+            dense_rows, _, candidate_count, filter_note = self._search_candidates(
+                query_vector, n_candidates, ranges, residual_mask, preferences
+            )
+        with instrumentation.span('sparse_search'):
+            sparse_docs, sparse_scores = self._sparse_scores(user_query, ranges, self._residual_rows(preferences))
+        with instrumentation.span('fusion'):
+            top_indices, top_scores = fuse(
+                self.normalized_embeddings, query_vector, dense_rows, sparse_docs, sparse_scores, top_k,
+                method=Config.HYBRID_FUSION, n_candidates=n_candidates,
+                rrf_k=Config.HYBRID_RRF_K, dense_weight=Config.HYBRID_DENSE_WEIGHT
+            )
+        instrumentation.increment('sparse_matches', len(sparse_docs))
+        return top_indices, top_scores, candidate_count, f"{filter_note}, 어휘/태그 일치 {len(sparse_docs)}마리"
+    
+    def find_similar_animals(self, user_query, top_k=5, available_only=True, verbose=False, hybrid=None):
+        """하드 필터 + 성격 유사도 매칭
         
-        return filtered_df, filtered_embeddings
+        Args:
+            verbose: True면 필터 단계와 추천 결과를 콘솔에 출력 (서빙/배치 경로는 False로 출력 없음)
+            hybrid: True면 임베딩 유사도와 어휘/해시태그 점수를 융합 (None이면 Config.HYBRID_SEARCH)
+        """
+        if hybrid is None:
+            hybrid = Config.HYBRID_SEARCH
+        with self.instrumentation.trace('find_similar_animals'):
+            return self._find_similar_animals(user_query, top_k, available_only, verbose, hybrid)
     
-    def find_similar_animals(self, user_query, top_k=5, available_only=True):
-        """하드 필터 + 성격 유사도 매칭"""
+    def _find_similar_animals(self, user_query, top_k, available_only, verbose, hybrid=False):
+        """find_similar_animals 본체 (단계별 span 기록)"""
+        instrumentation = self.instrumentation
         
         if self.embeddings is None:
             print("❌ 임베딩 데이터가 없습니다.")
             return []
         
-        print(f"🔍 사용자 쿼리 처리: '{user_query}'")
-        
         # 1. 사용자 선호도 추출
-        preferences = self.extract_user_preferences(user_query)
-        print(f"🎯 추출된 선호도: {preferences}")
-        
-        # 2. 입양 가능 동물 필터링
-        if available_only:
-            available_mask = self.processed_df['state'] == '임보가능'
-            filtered_df = self.processed_df[available_mask].reset_index(drop=True)
-            
-            # numpy 배열도 같은 마스크로 필터링
-            available_indices = available_mask.values
-            filtered_embeddings = self.embeddings[available_indices]
-        else:
-            filtered_df = self.processed_df.reset_index(drop=True)
-            filtered_embeddings = self.embeddings
-        
-        # 3. 하드 필터 적용
-        final_df, final_embeddings = self.apply_hard_filters(
-            filtered_df, filtered_embeddings, preferences
-        )
-        
-        print(f"📋 필터링: 전체 {len(self.processed_df)}마리 → 입양가능 {len(filtered_df)}마리 → 조건부합 {len(final_df)}마리")
-        
-        if len(final_df) == 0:
-            print("❌ 조건에 맞는 동물이 없습니다.")
+        with instrumentation.span('preference_extraction'):
+            preferences = self.extract_user_preferences(user_query)
+        if verbose:
+            print(f"🔍 사용자 쿼리 처리: '{user_query}'")
+            print(f"🎯 추출된 선호도: {preferences}")
+        
+        # 2~3. 입양 가능 여부 + 하드 필터 (정렬된 행렬의 연속 구간 + 구간 내 나이 마스크)
+        with instrumentation.span('hard_filter'):
+            ranges, residual_mask = self._filter_ranges(preferences, available_only)
+        
+        if verbose:
+            available_total = int(self.features.available.sum()) if available_only else len(self.processed_df)
+        if not ranges:
+            if verbose:
+                print(f"📋 필터링: 전체 {len(self.processed_df)}마리 → 입양가능 {available_total}마리 → 조건부합 0마리")
+                print("❌ 조건에 맞는 동물이 없습니다.")
             return []
         
-        # 4. 성격 유사도 계산
-        query_embedding = self.process_user_query(user_query)
-        if query_embedding is None:
+        # 4. 성격 유사도 계산 (필터링된 복사본 없이 구간 view에 대해 행렬-벡터 곱)
+        with instrumentation.span('query_embedding'):
+            query_embedding = self.process_user_query(user_query, deadline=Config.QUERY_EMBEDDING_DEADLINE_SECONDS,
+                                                      verbose=verbose)
+        
+        # 5. 상위 k개 추출 (후보가 많으면 ANN, 적으면 구간별 전수 검색)
+        retrieval = 'dense'
+        if query_embedding is not None and hybrid and self.lexical_index is not None:
+            # 임베딩 유사도 후보 + 어휘/해시태그 posting 후보 융합 (similarity는 코사인 유사도 그대로)
+            retrieval = 'hybrid'
+            top_indices, top_scores, candidate_count, filter_note = self._hybrid_candidates(
+                user_query, normalize_vector(query_embedding), top_k, ranges, residual_mask, preferences
+            )
+        elif query_embedding is not None:
+            query_vector = normalize_vector(query_embedding)
+            with instrumentation.span('similarity'):
+                top_indices, top_scores, candidate_count, filter_note = self._search_candidates(
+                    query_vector, top_k, ranges, residual_mask, preferences
+                )
+        elif self.lexical_index is not None:
+            # 임베딩 API 실패/지연 → 같은 필터 구간에서 로컬 어휘 색인으로 검색 (유사도 대신 BM25 점수)
+            retrieval = 'lexical'
+            with instrumentation.span('lexical_search'):
+                top_indices, top_scores, candidate_count = self.lexical_index.search(
+                    self.preprocess_user_query(user_query), top_k, ranges, self._residual_rows(preferences)
+                )
+            instrumentation.increment('lexical_fallbacks')
+            filter_note = f"어휘 검색 일치 {candidate_count}마리 (임베딩 대체)"
+        else:
             return []
+        instrumentation.increment('candidates', candidate_count)
+        available_count = len(top_indices)
         
-        query_embedding = query_embedding.reshape(1, -1)
-        similarities = cosine_similarity(query_embedding, final_embeddings).flatten()
+        if verbose:
+            print(f"📋 필터링: 전체 {len(self.processed_df)}마리 → 입양가능 {available_total}마리 → {filter_note}")
         
-        # 5. 상위 k개 추출
-        available_count = min(top_k, len(similarities))
-        top_indices = similarities.argsort()[-available_count:][::-1]
+        if candidate_count == 0:
+            if verbose:
+                print("❌ 조건에 맞는 동물이 없습니다.")
+            return []
         
         # 6. 결과 정리
-        results = []
-        for i, idx in enumerate(top_indices):
-            # UID를 사용해서 링크 생성
-            uid = final_df.iloc[idx].get('uid', '')
-            link = f"https://www.pimfyvirus.com/search/01_v/{uid}" if uid else "링크 없음"
-            
-            animal_info = {
-                'rank': i + 1,
-                'index': idx,
-                'uid': uid,
-                'link': link,
-                'similarity': similarities[idx],
-                'name': final_df.iloc[idx]['addinfo01'],
-                'gender': final_df.iloc[idx]['addinfo03'],
-                'weight': final_df.iloc[idx]['addinfo07'],
-                'age': final_df.iloc[idx].get('addinfo05', '나이미정'),
-                'neuter': final_df.iloc[idx].get('addinfo04', '중성화미정'),
-                'personality_tags': final_df.iloc[idx]['addinfo08'],
-                'personality_desc': final_df.iloc[idx].get('addinfo10', ''),
-                'rescue_story': final_df.iloc[idx].get('addinfo09', ''),
-                'special_needs': final_df.iloc[idx].get('addinfo16', ''),
-                'state': final_df.iloc[idx]['state'],
-                'kind': final_df.iloc[idx].get('kind', '임보종류미정'),
-            }
-            results.append(animal_info)
+        with instrumentation.span('result_building'):
+            results = self._build_results(top_indices, top_scores, retrieval)
         
         # 7. 결과 출력
-        print(f"\n🎯 추천 결과 (조건 맞춤) (상위 {available_count}개):")
+        if verbose:
+            self.print_results(results, available_count)
+        
+        return results
+    
+    def print_results(self, results, available_count=None):
+        """추천 결과 콘솔 출력"""
+        print(f"\n🎯 추천 결과 (조건 맞춤) (상위 {available_count or len(results)}개):")
         print("=" * 60)
         
         for result in results:
-            print(f"\n{result['rank']}. 🐕 {result['name']} (유사도: {result['similarity']:.3f}) 🟢")
+            score_label = '어휘 점수' if result['retrieval'] == 'lexical' else '유사도'
+            print(f"\n{result['rank']}. 🐕 {result['name']} ({score_label}: {result['similarity']:.3f}) 🟢")
             print(f"   📊 기본정보: {result['gender']}, {result['weight']}kg, {result['state']}")
             print(f"   🎭 성격특징: {result['personality_tags']}")
             print(f"   🔗 상세정보: {result['link']}")
@@ -451,34 +1003,68 @@ class GPTEmbeddingProcessor:
             # 특별 요구사항이 있으면 표시
             if result['special_needs'] and result['special_needs'].strip():
                 print(f"   ⚠️  특별요구: {result['special_needs']}")
-        
-        return results
     
-    def save_embeddings(self, output_path="animal_embeddings.pkl"):
-        """임베딩 데이터 저장"""
-        print(f"\n💾 임베딩 데이터 저장: {output_path}")
-        
-        data = {
-            'embeddings': self.embeddings,
-            'dataframe': self.processed_df,
-            'model': self.model,
-            'embedding_dim': self.embedding_dim,
-            'metadata': {
-                'total_animals': len(self.processed_df),
-                'embedding_shape': self.embeddings.shape,
-                'model_used': self.model
-            }
-        }
-        
-        with open(output_path, 'wb') as f:
-            pickle.dump(data, f)
-        
-        print(f"✅ 저장 완료")
+    def save_embeddings(self, output_path="animal_embeddings", dtype=None):
+        """임베딩 데이터 저장 (memmap 저장소 형식)"""
+        dtype = dtype or Config.EMBEDDING_STORE_DTYPE
+        print(f"\n💾 임베딩 데이터 저장: {output_path} ({dtype})")
+        
+        # 검색에 쓰는 정규화 행렬을 그대로 저장해서 로드 시 memmap을 복사 없이 사용
+        extra = {'normalized': True, 'dimensions': self.dimensions}
+        if self.reduction:
+            extra['reduction'] = self.reduction
+        manifest = save_store(output_path, self.normalized_embeddings, self.processed_df, self.model,
+                              dtype=dtype, extra=extra)
+        if self.projection is not None:
+            self.projection.save(output_path)
+        if self.ann_index is not None:
+            self.ann_index.save(output_path, manifest['checksum'])
+        if self.quantizer is not None:
+            self.quantizer.save(output_path, manifest['checksum'])
+        if self.lexical_index is not None:
+            self.lexical_index.save(output_path, manifest['checksum'])
+        
+        print(f"✅ 저장 완료: {manifest['rows']:,}행 x {manifest['embedding_dim']}차원")
     
-    def load_embeddings(self, file_path="animal_embeddings.pkl"):
-        """저장된 임베딩 데이터 로드"""
+    def load_embeddings(self, file_path="animal_embeddings", verify=False):
+        """저장된 임베딩 데이터 로드 (저장소 디렉토리는 memmap, 기존 .pkl은 pickle로 로드)"""
         print(f"📂 임베딩 데이터 로딩: {file_path}")
         
+        if not is_embedding_store(file_path):
+            self._load_pickle_embeddings(file_path)
+            return
+        
+        embeddings, df, _, manifest = load_store(file_path, verify=verify)
+        
+        self.embeddings = embeddings
+        self.processed_df = df
+        self.model = manifest['model']
+        self.embedding_dim = manifest['embedding_dim']
+        self.dimensions = manifest.get('dimensions')
+        self.reduction = manifest.get('reduction')
+        if self.reduction and self.reduction['method'] == 'pca':
+            # 쿼리는 원본 차원으로 받아서 저장소와 같은 투영을 적용
+            self.projection = PCAProjection.load(file_path)
+            self.request_dim = self.reduction['source_dimensions']
+        else:
+            self.projection = None
+            self.request_dim = self.embedding_dim
+        self.engine.model = self.model
+        self.engine.embedding_dim = self.request_dim
+        self.engine.dimensions = self.dimensions
+        ann_index = None
+        if manifest['rows'] >= Config.ANN_MIN_ROWS:
+            ann_index = IVFFlatIndex.load(file_path, manifest['checksum'])
+        quantizer = Int8Quantizer.load(file_path, manifest['checksum']) if Config.EMBEDDING_QUANTIZE else None
+        load_lexical = Config.LEXICAL_FALLBACK or Config.HYBRID_SEARCH
+        lexical_index = LexicalIndex.load(file_path, manifest['checksum']) if load_lexical else None
+        self._refresh_index(already_normalized=manifest.get('normalized', False),
+                            ann_index=ann_index, quantizer=quantizer, lexical_index=lexical_index)
+        
+        print(f"✅ 로딩 완료: {manifest['rows']:,}행 x {manifest['embedding_dim']}차원 ({manifest['dtype']}, memmap)")
+    
+    def _load_pickle_embeddings(self, file_path):
+        """기존 pickle 형식 로드 (저장소로 변환 전 호환용)"""
         with open(file_path, 'rb') as f:
             data = pickle.load(f)
         
@@ -486,8 +1072,17 @@ class GPTEmbeddingProcessor:
         self.processed_df = data['dataframe']
         self.model = data['model']
         self.embedding_dim = data['embedding_dim']
+        self.dimensions = None
+        self.request_dim = self.embedding_dim
+        self.projection = None
+        self.reduction = None
+        self.engine.model = self.model
+        self.engine.embedding_dim = self.request_dim
+        self.engine.dimensions = None
+        self._refresh_index()
         
         print(f"✅ 로딩 완료: {data['metadata']}")
+        print("   💡 embedding_store.convert_pickle_store로 memmap 저장소로 변환할 수 있습니다.")
     
     def get_recommendation_stats(self):
         """추천 시스템 통계 정보"""
@@ -534,6 +1129,6 @@ if __name__ == "__main__":
     gpt_processor.save_embeddings()
     
     # 추천 테스트
-    results = gpt_processor.find_similar_animals("활발하고 애교 많은 소형견을 원해요", available_only=True)
+    results = gpt_processor.find_similar_animals("활발하고 애교 많은 소형견을 원해요", available_only=True, verbose=True)
     
     print("\n🎯 GPT 임베딩 기반 추천 시스템 구축 완료!")
\ No newline at end of file
@@ -0,0 +1,155 @@
+"""
+메모리 매핑 임베딩 저장소 모듈
+
+저장소는 디렉토리 하나로 구성된다.
+    manifest.json   모델, 차원, dtype, 행 수, 체크섬
+    embeddings.npy  (행 수 x 차원) float32/float16 행렬 (np.memmap으로 로드)
+    ids.npy         행 순서와 같은 uid 배열
+    animals.pkl     검색 결과 표시에 쓰는 동물 속성 데이터프레임
+
+행렬을 memmap으로 열기 때문에 로드는 즉시 끝나고, 여러 서빙 프로세스가
+OS 페이지 캐시를 공유한다.
+"""
+
+import os
+import json
+import pickle
+import hashlib
+from datetime import datetime
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+MANIFEST_FILE = 'manifest.json'
+MATRIX_FILE = 'embeddings.npy'
+IDS_FILE = 'ids.npy'
+METADATA_FILE = 'animals.pkl'
+FORMAT_VERSION = 1
+SUPPORTED_DTYPES = ('float32', 'float16')
+
+
+def is_embedding_store(path: str) -> bool:
+    """디렉토리 형식 임베딩 저장소인지 확인"""
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, MANIFEST_FILE))
+
+
+def file_checksum(path: str, chunk_size: int = 1 << 24) -> str:
+    """파일 SHA-256 (큰 행렬도 일정한 메모리로 계산)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store_size_bytes(path: str) -> int:
+    """저장소(디렉토리 또는 파일) 전체 크기"""
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+
+def save_store(store_dir: str, embeddings, df: pd.DataFrame, model: str,
+               dtype: str = 'float32', id_column: str = 'uid', extra: Dict = None) -> Dict:
+    """임베딩 행렬과 동물 데이터를 저장소 형식으로 저장"""
+    if dtype not in SUPPORTED_DTYPES:
+        raise ValueError(f"지원하지 않는 dtype: {dtype} (가능: {SUPPORTED_DTYPES})")
+    if len(df) != len(embeddings):
+        raise ValueError(f"행 수 불일치: 데이터 {len(df)}개, 임베딩 {len(embeddings)}개")
+
+    os.makedirs(store_dir, exist_ok=True)
+    embeddings = np.asarray(embeddings)
+    rows, dims = embeddings.shape
+
+    # 새 행렬을 임시 파일에 쓴 뒤 교체해서, 기존 저장소를 memmap으로 열고 있는 프로세스를 깨뜨리지 않음
+    matrix_path = os.path.join(store_dir, MATRIX_FILE)
+    tmp_matrix_path = matrix_path + '.tmp.npy'
+    matrix = np.lib.format.open_memmap(tmp_matrix_path, mode='w+', dtype=dtype, shape=(rows, dims))
+    block = 8192
+    for start in range(0, rows, block):
+        matrix[start:start + block] = embeddings[start:start + block]
+    matrix.flush()
+    del matrix
+    os.replace(tmp_matrix_path, matrix_path)
+
+    ids = df[id_column].to_numpy() if id_column in df.columns else np.arange(rows)
+    if ids.dtype == object:
+        ids = ids.astype(str)
+    np.save(os.path.join(store_dir, IDS_FILE), ids)
+
+    with open(os.path.join(store_dir, METADATA_FILE), 'wb') as f:
+        pickle.dump(df.reset_index(drop=True), f)
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'model': model,
+        'embedding_dim': int(dims),
+        'dtype': dtype,
+        'rows': int(rows),
+        'id_column': id_column,
+        'checksum': file_checksum(matrix_path),
+        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    if extra:
+        manifest.update(extra)
+
+    with open(os.path.join(store_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    return manifest
+
+
+def load_store(store_dir: str, verify: bool = False) -> Tuple[np.ndarray, pd.DataFrame, np.ndarray, Dict]:
+    """저장소 로드 (행렬은 읽기 전용 memmap)
+
+    Args:
+        verify: True면 행렬 파일 체크섬 검증 (전체 파일을 읽으므로 느림)
+    """
+    with open(os.path.join(store_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    matrix_path = os.path.join(store_dir, MATRIX_FILE)
+    if verify and file_checksum(matrix_path) != manifest['checksum']:
+        raise ValueError(f"임베딩 행렬 체크섬 불일치: {matrix_path}")
+
+    embeddings = np.load(matrix_path, mmap_mode='r')
+    ids = np.load(os.path.join(store_dir, IDS_FILE), allow_pickle=False)
+
+    with open(os.path.join(store_dir, METADATA_FILE), 'rb') as f:
+        df = pickle.load(f)
+
+    if embeddings.shape != (manifest['rows'], manifest['embedding_dim']) or len(df) != manifest['rows']:
+        raise ValueError(f"저장소 구성 파일의 행 수가 manifest와 다릅니다: {store_dir}")
+
+    return embeddings, df, ids, manifest
+
+
+def convert_pickle_store(pickle_path: str, store_dir: str, dtype: str = 'float32') -> Dict:
+    """기존 animal_embeddings.pkl을 저장소 형식으로 1회 변환"""
+    print(f"🔁 임베딩 pickle 변환: {pickle_path} → {store_dir} ({dtype})")
+
+    with open(pickle_path, 'rb') as f:
+        data = pickle.load(f)
+
+    manifest = save_store(
+        store_dir, data['embeddings'], data['dataframe'], data['model'], dtype=dtype,
+        extra={'converted_from': os.path.basename(pickle_path)}
+    )
+
+    before = os.path.getsize(pickle_path) / 1024 / 1024
+    after = store_size_bytes(store_dir) / 1024 / 1024
+    print(f"✅ 변환 완료: {manifest['rows']:,}행 x {manifest['embedding_dim']}차원, {before:.1f} MB → {after:.1f} MB")
+    return manifest
+
+
+# 사용 예시: 기존 pickle 변환
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 3:
+        print("사용법: python embedding_store.py <animal_embeddings.pkl> <저장소 디렉토리> [float32|float16]")
+        sys.exit(1)
+
+    convert_pickle_store(sys.argv[1], sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else 'float32')
@@ -0,0 +1,229 @@
+"""
+하드 필터 + 소프트 선호도 + 임베딩 유사도 단일 패스 점수 모듈
+AnimalFilter.apply_soft_filtering(규칙 기반 가중 점수)과 GPTEmbeddingProcessor.find_similar_animals
+(하드 필터 + 코사인 유사도)를 따로 돌려 데이터프레임을 합치지 않고, 같은 행 순서의 배열 위에서 한 번에 계산한다.
+
+    1. 하드 조건 → 행 위치 (AnimalFeatures 라벨 마스크, AnimalFilter 필터 계획)
+    2. 남은 위치의 소프트 점수 배열 (AnimalFilter.match_scores)
+    3. 남은 위치의 코사인 유사도 배열 (정규화 행렬 @ 쿼리 벡터)
+    4. 두 점수를 min-max 정규화 가중합(hybrid_search.weighted_fusion) → 상위 k개
+
+AnimalFilter의 동물 데이터, 임베딩 행렬, AnimalFeatures는 모두 같은 행 순서여야 한다.
+임베딩 쪽 processed_df(addinfo 컬럼)는 filter_frame_from_processed로 AnimalFilter 컬럼 구성으로 바꿔 쓴다.
+조건에 필요한 컬럼이 동물 데이터에 없으면 (예: addinfo 데이터에는 행동 특성/건강 dict가 없음) ValueError.
+"""
+
+from collections import namedtuple
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from vector_index import normalize_vector, top_k_indices
+from hybrid_search import weighted_fusion
+from animal_filter import AnimalFilter
+
+
+# processed_df 값 → AnimalFilter 값
+FILTER_GENDERS = {'남': 'male', '여': 'female'}
+NEUTERED_KEYWORDS = (('완', True), ('전', False), ('안', False), ('미', False))
+
+
+# 상위 k개 결과: 행 위치와 행별 융합 점수 / 소프트 점수 / 코사인 유사도 (유사도가 없으면 None)
+FusedScores = namedtuple('FusedScores', ['rows', 'scores', 'match_scores', 'similarities', 'candidate_count'])
+
+
+def _split_hashtags(text) -> list:
+    """'#애교쟁이#사람좋아' / '# 애교쟁이, # 사람좋아' → ['애교쟁이', '사람좋아']"""
+    if not isinstance(text, str):
+        return []
+    return [tag.strip(' ,') for tag in text.split('#') if tag.strip(' ,')]
+
+
+def _neutered_flag(text):
+    """'중성화 완(료)' → True, '중성화 전'/'안함'/'미' → False, 그 밖(미정) → None"""
+    if not isinstance(text, str) or '미정' in text:
+        return None
+    for keyword, flag in NEUTERED_KEYWORDS:
+        if keyword in text:
+            return flag
+    return None
+
+
+def filter_frame_from_processed(processed_df: pd.DataFrame, features) -> pd.DataFrame:
+    """임베딩용 processed_df(addinfo/state 컬럼) → AnimalFilter 컬럼 구성의 데이터프레임 (같은 행 순서)
+
+    매핑되는 컬럼: status, gender, rescue_location, neutered, age(년), weight, care_type, hashtags.
+    care_conditions/behavior_traits/health_info에 해당하는 구조화된 값은 없으므로 만들지 않는다.
+    """
+    def column(name):
+        return processed_df[name] if name in processed_df.columns else pd.Series([None] * len(processed_df))
+
+    age_months = features.age_months.astype(np.float64)
+    frame = pd.DataFrame({
+        'uid': column('uid').to_numpy(),
+        'status': column('state').to_numpy(),
+        'gender': column('addinfo03').map(lambda value: FILTER_GENDERS.get(value, value)).to_numpy(),
+        'rescue_location': column('addinfo02').to_numpy(),
+        'neutered': column('addinfo04').map(_neutered_flag).to_numpy(),
+        'age': np.where(age_months >= 0, age_months / 12, np.nan),
+        'weight': features.weight.astype(np.float64),
+        'care_type': column('kind').to_numpy(),
+        'hashtags': column('addinfo08').map(_split_hashtags).to_numpy(),
+    })
+    return frame
+
+
+@dataclass
+class MatchPreferences:
+    """융합 점수 계산용 구조화된 선호도"""
+    hard_filters: Dict = field(default_factory=dict)   # AnimalFilter.apply_filters 조건
+    soft: Dict = field(default_factory=dict)           # apply_soft_filtering 선호도 (region, age_preference, ..., weights)
+    labels: Dict = field(default_factory=dict)         # AnimalFeatures 라벨 조건 (size/gender/age, extract_user_preferences 결과)
+    dense_weight: float = 0.5                          # 유사도 비중 (소프트 점수 비중은 1 - dense_weight)
+    min_match_score: float = 0.0                       # 소프트 점수 최소값 (apply_soft_filtering의 threshold)
+    available_only: bool = True
+
+
+class FusedScorer:
+    """같은 행 순서의 동물 데이터/임베딩/파생 배열에 대한 단일 패스 점수 계산기"""
+
+    def __init__(self, animal_filter: AnimalFilter, embeddings: Optional[np.ndarray] = None, features=None,
+                 processor=None):
+        """
+        Args:
+            animal_filter: 동물 데이터가 설정된 AnimalFilter (행 순서 기준)
+            embeddings: L2 정규화 임베딩 행렬 (없으면 소프트 점수만 사용)
+            features: AnimalFeatures (labels 조건과 입양 가능 여부에 사용)
+            processor: 쿼리 문장 임베딩용 GPTEmbeddingProcessor (search에 문자열을 줄 때)
+        """
+        rows = len(animal_filter.animals)
+        for name, aligned in (('embeddings', embeddings), ('features', features)):
+            if aligned is not None and len(aligned) != rows:
+                raise ValueError(f"{name} 행 수({len(aligned)})가 동물 데이터 행 수({rows})와 다릅니다.")
+
+        self.animal_filter = animal_filter
+        self.embeddings = embeddings
+        self.features = features
+        self.processor = processor
+
+    @classmethod
+    def from_processor(cls, processor, animal_filter: Optional[AnimalFilter] = None) -> 'FusedScorer':
+        """GPTEmbeddingProcessor의 정렬된 processed_df/정규화 행렬/파생 배열로 생성
+
+        animal_filter를 주지 않으면 processed_df를 filter_frame_from_processed로 바꿔 만든다.
+        animal_filter를 주면 그 동물 데이터가 processed_df와 같은 행 순서여야 한다.
+        """
+        if animal_filter is None:
+            animal_filter = AnimalFilter(filter_frame_from_processed(processor.processed_df, processor.features))
+        return cls(animal_filter, processor.normalized_embeddings, processor.features, processor)
+
+    def check_columns(self, preferences: MatchPreferences):
+        """조건에 필요한 컬럼이 동물 데이터에 없으면 ValueError (조용히 0건/상수 점수가 되지 않도록)"""
+        missing = self.animal_filter.missing_columns(preferences.hard_filters, preferences.soft)
+        if preferences.available_only and self.features is None and 'status' not in self.animal_filter.animals.columns:
+            missing.append('status')
+        if missing:
+            raise ValueError(f"동물 데이터에 조건에 필요한 컬럼이 없습니다: {', '.join(missing)}")
+
+    def candidate_positions(self, preferences: MatchPreferences) -> np.ndarray:
+        """하드 조건을 통과한 행 위치 (오름차순)"""
+        self.check_columns(preferences)
+        animal_filter = self.animal_filter
+        n = len(animal_filter.animals)
+
+        # 입양 가능 여부: AnimalFeatures(state)가 있으면 그 기준, 없으면 AnimalFilter(status == 임보가능)
+        if self.features is not None:
+            positions = np.flatnonzero(self.features.hard_filter_mask(preferences.labels, preferences.available_only))
+        elif preferences.available_only:
+            positions = animal_filter.columns.available_positions
+        else:
+            positions = np.arange(n)
+
+        if preferences.hard_filters and len(positions):
+            positions = animal_filter.run_filter_plan(animal_filter.compile_filter_plan(preferences.hard_filters),
+                                                       positions)
+        return positions
+
+    def score(self, preferences: MatchPreferences, query_vector=None, top_k: int = 10) -> FusedScores:
+        """하드 마스크 → 소프트 점수/유사도 배열 → 가중합 상위 k개"""
+        positions = self.candidate_positions(preferences)
+        use_soft = bool(preferences.soft)
+        use_dense = query_vector is not None and self.embeddings is not None
+
+        match_scores = None
+        if use_soft and len(positions):
+            match_scores = self.animal_filter.match_scores(positions, preferences.soft).astype(np.float64)
+            keep = match_scores >= preferences.min_match_score
+            positions, match_scores = positions[keep], match_scores[keep]
+
+        if not len(positions):
+            empty = np.empty(0)
+            return FusedScores(positions, empty, empty if use_soft else None, empty if use_dense else None, 0)
+
+        similarities = None
+        if use_dense:
+            query_vector = normalize_vector(query_vector)
+            matrix = self.embeddings if len(positions) == len(self.embeddings) else self.embeddings[positions]
+            similarities = (matrix @ query_vector.astype(matrix.dtype, copy=False)).astype(np.float64)
+
+        if use_soft and use_dense:
+            scores = weighted_fusion(similarities, match_scores, preferences.dense_weight)
+        elif use_dense:
+            scores = similarities
+        elif use_soft:
+            scores = match_scores
+        else:
+            scores = np.zeros(len(positions))
+
+        # 점수가 없으면(하드 조건만) 행 순서 그대로
+        top = top_k_indices(scores, top_k) if use_soft or use_dense else np.arange(min(top_k, len(positions)))
+        return FusedScores(
+            positions[top],
+            scores[top],
+            match_scores[top] if match_scores is not None else None,
+            similarities[top] if similarities is not None else None,
+            len(positions),
+        )
+
+    def search(self, preferences: MatchPreferences, query=None, top_k: int = 10) -> pd.DataFrame:
+        """점수순 상위 k개 동물 데이터프레임 (fused_score, match_score, similarity 컬럼 추가)
+
+        Args:
+            query: 쿼리 벡터 또는 문장 (문장은 processor로 임베딩, 실패하면 소프트 점수만 사용)
+        """
+        if isinstance(query, str):
+            if self.processor is None:
+                raise ValueError("쿼리 문장을 임베딩하려면 processor가 필요합니다.")
+            query = self.processor.process_user_query(query)
+
+        fused = self.score(preferences, query, top_k)
+        results = self.animal_filter.animals.iloc[fused.rows].copy()
+        results['fused_score'] = fused.scores
+        if fused.match_scores is not None:
+            results['match_score'] = fused.match_scores
+        if fused.similarities is not None:
+            results['similarity'] = fused.similarities
+        return results
+
+
+# 사용 예시
+if __name__ == "__main__":
+    from benchmark import make_synthetic_animals, make_synthetic_embeddings
+    from vector_index import normalize_rows
+
+    animals = make_synthetic_animals(10000)
+    embeddings = normalize_rows(make_synthetic_embeddings(len(animals), 256))
+    scorer = FusedScorer(AnimalFilter(animals), embeddings)
+
+    preferences = MatchPreferences(
+        hard_filters={'neutered': True, 'weight_range': {'min': 0, 'max': 15}},
+        soft={
+            'region': ['서울'],
+            'age_preference': {'preferred': {'min': 2, 'max': 5}, 'acceptable': {'min': 1, 'max': 8}},
+            'personality_traits': ['애교', '조용함'],
+        },
+    )
+    results = scorer.search(preferences, embeddings[0], top_k=5)
+    print(results[['id', 'rescue_location', 'age', 'fused_score', 'match_score', 'similarity']])
@@ -0,0 +1,257 @@
+"""
+추천 경로 계측 모듈
+단계별 소요 시간(span)과 카운터(후보 수, 캐시 히트, API 재시도 등)를 기록하고
+요청 1건이 끝날 때마다 sink(로그 한 줄, JSONL 파일, Prometheus 텍스트)로 내보낸다.
+단계별 시간은 최근 max_samples개를 보관해서 p50/p95/p99를 계산한다.
+
+    instrumentation = Instrumentation(sinks=[LogSink()])
+    with instrumentation.trace('recommendation'):
+        with instrumentation.span('query_embedding'):
+            ...
+        instrumentation.increment('candidates', 1234)
+"""
+
+import json
+import time
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+PERCENTILES = (50, 95, 99)
+
+
+class Trace:
+    """요청 1건의 단계별 시간(ms)과 카운터"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.spans: Dict[str, float] = {}
+        self.counters: Dict[str, float] = {}
+        self._start = time.perf_counter()
+        self.total_ms = None
+
+    def finish(self):
+        self.total_ms = (time.perf_counter() - self._start) * 1000
+
+    def to_dict(self) -> Dict:
+        return {
+            'trace': self.name,
+            'started_at': self.started_at,
+            'total_ms': round(self.total_ms, 3) if self.total_ms is not None else None,
+            'spans_ms': {name: round(ms, 3) for name, ms in self.spans.items()},
+            'counters': dict(self.counters),
+        }
+
+
+class Instrumentation:
+    """단계별 시간/카운터 수집기
+
+    span과 increment는 현재 스레드에서 열려 있는 trace에 같이 기록된다.
+    trace가 이미 열려 있을 때 다시 trace를 열면 바깥 trace를 그대로 사용한다
+    (find_similar_animals가 test_single_recommendation 안에서 불릴 때 한 건으로 묶임).
+    """
+
+    def __init__(self, sinks: Optional[List] = None, max_samples: int = 2048, enabled: bool = True):
+        self.sinks = list(sinks or [])
+        self.max_samples = max_samples
+        self.enabled = enabled
+        self.samples = defaultdict(lambda: deque(maxlen=self.max_samples))  # 단계 → 최근 소요 시간(ms)
+        self.counters = defaultdict(float)                                  # 누적 카운터
+        self.traces = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        for sink in self.sinks:
+            if hasattr(sink, 'bind'):
+                sink.bind(self)
+
+    @property
+    def current(self) -> Optional[Trace]:
+        return getattr(self._local, 'trace', None)
+
+    @contextmanager
+    def trace(self, name: str):
+        """요청 1건 단위 (끝나면 sink로 내보냄)"""
+        if not self.enabled or self.current is not None:
+            yield self.current
+            return
+
+        trace = Trace(name)
+        self._local.trace = trace
+        try:
+            yield trace
+        finally:
+            self._local.trace = None
+            trace.finish()
+            self._record(name, trace.total_ms)
+            with self._lock:
+                self.traces += 1
+            for sink in self.sinks:
+                sink.emit(trace, self)
+
+    @contextmanager
+    def span(self, stage: str):
+        """단계 소요 시간 기록"""
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self._record(stage, elapsed_ms)
+            trace = self.current
+            if trace is not None:
+                trace.spans[stage] = trace.spans.get(stage, 0.0) + elapsed_ms
+
+    def increment(self, name: str, value: float = 1):
+        """카운터 증가 (누적값과 현재 trace 모두)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] += value
+        trace = self.current
+        if trace is not None:
+            trace.counters[name] = trace.counters.get(name, 0) + value
+
+    def _record(self, stage: str, elapsed_ms: float):
+        with self._lock:
+            self.samples[stage].append(elapsed_ms)
+
+    def summary(self) -> Dict[str, Dict]:
+        """단계별 {count, mean, p50, p95, p99, max} (ms, 최근 max_samples개 기준)"""
+        with self._lock:
+            snapshot = {stage: np.fromiter(values, dtype=np.float64) for stage, values in self.samples.items()}
+
+        summary = {}
+        for stage, values in snapshot.items():
+            if not len(values):
+                continue
+            p50, p95, p99 = np.percentile(values, PERCENTILES)
+            summary[stage] = {
+                'count': len(values),
+                'mean': float(values.mean()),
+                'p50': float(p50),
+                'p95': float(p95),
+                'p99': float(p99),
+                'max': float(values.max()),
+            }
+        return summary
+
+    def print_summary(self):
+        """단계별 지연 시간 요약 표 출력"""
+        summary = self.summary()
+        if not summary:
+            return
+
+        print(f"\n⏱️  단계별 지연 시간 (요청 {self.traces}건, ms)")
+        print(f"{'단계':<24} | {'횟수':>6} | {'p50':>8} | {'p95':>8} | {'p99':>8} | {'최대':>8}")
+        print("-" * 76)
+        for stage, stats in summary.items():
+            print(f"{stage:<24} | {stats['count']:>6} | {stats['p50']:>8.2f} | {stats['p95']:>8.2f} | "
+                  f"{stats['p99']:>8.2f} | {stats['max']:>8.2f}")
+        if self.counters:
+            print("📈 카운터: " + ", ".join(f"{name}={value:g}" for name, value in sorted(self.counters.items())))
+
+    def prometheus_text(self, prefix: str = 'animal_recommender') -> str:
+        """Prometheus 텍스트 노출 형식 (단계별 summary + 카운터)"""
+        lines = [
+            f"# HELP {prefix}_stage_latency_ms Per-stage latency over the most recent samples",
+            f"# TYPE {prefix}_stage_latency_ms summary",
+        ]
+        for stage, stats in self.summary().items():
+            for percentile in PERCENTILES:
+                quantile = percentile / 100
+                lines.append(f'{prefix}_stage_latency_ms{{stage="{stage}",quantile="{quantile}"}} {stats[f"p{percentile}"]:.3f}')
+            lines.append(f'{prefix}_stage_latency_ms_count{{stage="{stage}"}} {stats["count"]}')
+
+        lines.append(f"# TYPE {prefix}_events_total counter")
+        with self._lock:
+            counters = sorted(self.counters.items())
+        for name, value in counters:
+            lines.append(f'{prefix}_events_total{{name="{name}"}} {value:g}')
+        return "\n".join(lines) + "\n"
+
+
+class LogSink:
+    """요청마다 한 줄 로그 출력"""
+
+    def emit(self, trace: Trace, instrumentation: Instrumentation):
+        spans = ", ".join(f"{name}={ms:.1f}ms" for name, ms in trace.spans.items())
+        counters = ", ".join(f"{name}={value:g}" for name, value in trace.counters.items())
+        print(f"⏱️  [{trace.name}] 총 {trace.total_ms:.1f}ms | {spans}" + (f" | {counters}" if counters else ""))
+
+
+class JsonlSink:
+    """요청마다 JSON 한 줄을 파일에 추가"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def emit(self, trace: Trace, instrumentation: Instrumentation):
+        line = json.dumps(trace.to_dict(), ensure_ascii=False)
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line + "\n")
+
+
+class PrometheusSink:
+    """GET /metrics 요청에 Prometheus 텍스트를 돌려주는 HTTP 엔드포인트 (백그라운드 스레드)"""
+
+    def __init__(self, port: int = 9108, host: str = '127.0.0.1'):
+        self.instrumentation = None
+        sink = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') != '/metrics' or sink.instrumentation is None:
+                    self.send_error(404)
+                    return
+                body = sink.instrumentation.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        print(f"📡 Prometheus 지표 엔드포인트: http://{host}:{self.server.server_address[1]}/metrics")
+
+    def bind(self, instrumentation: Instrumentation):
+        self.instrumentation = instrumentation
+
+    def emit(self, trace: Trace, instrumentation: Instrumentation):
+        # 요청마다 내보낼 것은 없고, 엔드포인트가 조회 시점의 요약을 계산함
+        pass
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def build_sinks(names, jsonl_path: Optional[str] = None, prometheus_port: int = 9108) -> List:
+    """설정 문자열 목록('log', 'jsonl', 'prometheus')으로 sink 생성"""
+    sinks = []
+    for name in names or ():
+        if name == 'log':
+            sinks.append(LogSink())
+        elif name == 'jsonl':
+            sinks.append(JsonlSink(jsonl_path or 'recommendation_metrics.jsonl'))
+        elif name == 'prometheus':
+            sinks.append(PrometheusSink(prometheus_port))
+        else:
+            raise ValueError(f"지원하지 않는 계측 sink: {name} (가능: log, jsonl, prometheus)")
+    return sinks
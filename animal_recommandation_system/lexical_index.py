@@ -0,0 +1,298 @@
+"""
+로컬 어휘(lexical) 검색 모듈
+동물 텍스트(embedding_text, gpt_description)의 글자 n-gram에 대한 BM25 역색인.
+한국어는 띄어쓰기/조사 변형이 많아 형태소 분석 없이 토큰 안의 2~3글자 n-gram을 색인어로 쓴다.
+
+    색인어별 문서 번호(오름차순)와 BM25 가중치를 CSR 형태로 미리 계산해 두고,
+    쿼리는 쿼리 n-gram의 posting만 모아 문서별로 더한다 (전체 행 순회 없음).
+
+임베딩 API가 실패하거나 제한 시간을 넘기면 find_similar_animals가 이 색인으로 대신 검색한다.
+하이브리드 검색에서는 해시태그(addinfo08) posting 색인(HashtagIndex)과 함께 sparse 쪽 점수로 쓴다.
+"""
+
+import os
+import re
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from itertools import chain
+from typing import Optional, Sequence
+
+import numpy as np
+
+from vector_index import top_k_indices
+
+
+INDEX_FILE = 'lexical_index.npz'
+TOKEN_PATTERN = re.compile(r'[가-힣a-z0-9]+')
+
+
+@lru_cache(maxsize=200000)
+def _token_ngrams(token: str, low: int, high: int):
+    """토큰 하나의 n-gram (공고 문장은 같은 토큰이 반복되므로 캐시)"""
+    if len(token) < low:
+        return (token,)
+    return tuple(token[i:i + n] for n in range(low, min(high, len(token)) + 1) for i in range(len(token) - n + 1))
+
+
+def char_ngrams(text, ngram_range=(2, 3)):
+    """토큰별 글자 n-gram 목록 (최소 길이보다 짧은 토큰은 토큰 그대로)"""
+    low, high = ngram_range
+    grams = []
+    for token in TOKEN_PATTERN.findall(str(text).lower()):
+        grams.extend(_token_ngrams(token, low, high))
+    return grams
+
+
+def nonzero_scores(totals: np.ndarray):
+    """문서별 점수 배열 → (점수가 있는 문서 번호, 점수)"""
+    docs = np.flatnonzero(totals)
+    return docs, totals[docs].astype(np.float32)
+
+
+def restrict_to_ranges(docs, scores, ranges=None, residual_rows=None):
+    """문서 번호 오름차순 (docs, scores)에서 필터 구간/나머지 조건에 맞는 것만 남김
+
+    Args:
+        ranges: 후보 행 구간 [(start, stop), ...] (None이면 전체)
+        residual_rows: 행 번호 배열 → boolean 마스크 함수 (나이 등 구간으로 표현되지 않는 조건)
+    """
+    if ranges is not None and len(docs):
+        # 정렬된 구간 경계 [s0, e0, s1, e1, ...]에서 오른쪽 위치가 홀수면 구간 안
+        bounds = np.asarray(ranges, dtype=np.int64).ravel()
+        keep = np.searchsorted(bounds, docs, side='right') % 2 == 1
+        docs, scores = docs[keep], scores[keep]
+    if residual_rows is not None and len(docs):
+        keep = residual_rows(docs)
+        docs, scores = docs[keep], scores[keep]
+    return docs, scores
+
+
+class LexicalIndex:
+    """글자 n-gram BM25 역색인 (posting별 가중치를 미리 계산)"""
+
+    def __init__(self, terms: Sequence[str], offsets: np.ndarray, doc_ids: np.ndarray, weights: np.ndarray,
+                 n_docs: int, ngram_range=(2, 3)):
+        self.terms = list(terms)
+        self.vocabulary = {term: i for i, term in enumerate(self.terms)}
+        self.offsets = np.asarray(offsets, dtype=np.int64)   # 색인어 i의 posting: offsets[i]:offsets[i + 1]
+        self.doc_ids = np.asarray(doc_ids, dtype=np.int32)   # 색인어 안에서 오름차순
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.n_docs = int(n_docs)
+        self.ngram_range = tuple(int(n) for n in ngram_range)
+
+    @classmethod
+    def build(cls, texts: Sequence[str], k1: float = 1.2, b: float = 0.75, ngram_range=(2, 3),
+              max_df_ratio: float = 0.5) -> 'LexicalIndex':
+        """문서 텍스트 목록으로 색인 생성
+
+        Args:
+            max_df_ratio: 이 비율보다 많은 문서에 나오는 n-gram('니다', '하고' 등)은 변별력이 없으므로 색인에서 제외
+        """
+        low, high = ngram_range
+        vocabulary = {}
+        token_ids = {}
+
+        def ids_for(token):
+            ids = token_ids.get(token)
+            if ids is None:
+                ids = token_ids[token] = [vocabulary.setdefault(gram, len(vocabulary))
+                                          for gram in _token_ngrams(token, low, high)]
+            return ids
+
+        # 1. 문서별 n-gram 번호 (토큰 → 번호 목록 캐시)
+        doc_terms = []
+        doc_lengths = np.empty(len(texts), dtype=np.int64)
+        for doc_id, text in enumerate(texts):
+            ids = list(chain.from_iterable(map(ids_for, TOKEN_PATTERN.findall(str(text).lower()))))
+            doc_terms.append(ids)
+            doc_lengths[doc_id] = len(ids)
+
+        n_docs = len(texts)
+        flat_terms = np.fromiter(chain.from_iterable(doc_terms), dtype=np.int64, count=int(doc_lengths.sum()))
+        flat_docs = np.repeat(np.arange(n_docs, dtype=np.int64), doc_lengths)
+
+        # 2. (색인어, 문서) 쌍별 빈도 — 키 정렬 결과가 곧 색인어 → 문서 번호 오름차순 posting 순서
+        keys, term_freqs = np.unique(flat_terms * max(n_docs, 1) + flat_docs, return_counts=True)
+        term_ids = keys // max(n_docs, 1)
+        doc_ids = keys % max(n_docs, 1)
+        doc_freqs = np.bincount(term_ids, minlength=len(vocabulary))
+
+        # 3. 너무 흔한 n-gram 제외 후 색인어 번호 재부여
+        kept_terms = np.flatnonzero(doc_freqs <= max(1, max_df_ratio * n_docs))
+        remap = np.full(len(vocabulary), -1, dtype=np.int64)
+        remap[kept_terms] = np.arange(len(kept_terms))
+        keep = remap[term_ids] >= 0
+        term_ids, doc_ids, term_freqs = remap[term_ids[keep]], doc_ids[keep], term_freqs[keep].astype(np.float32)
+        doc_freqs = doc_freqs[kept_terms]
+        offsets = np.concatenate(([0], np.cumsum(doc_freqs)))
+
+        # 4. posting별 BM25 가중치
+        idf = np.log1p((n_docs - doc_freqs + 0.5) / (doc_freqs + 0.5)).astype(np.float32)
+        avg_length = max(float(doc_lengths.mean()) if n_docs else 0.0, 1.0)
+        length_norm = k1 * (1 - b + b * doc_lengths[doc_ids] / avg_length)
+        weights = idf[term_ids] * term_freqs * (k1 + 1) / (term_freqs + length_norm)
+
+        terms = [None] * len(vocabulary)
+        for term, i in vocabulary.items():
+            terms[i] = term
+        return cls([terms[i] for i in kept_terms], offsets, doc_ids, weights, n_docs, ngram_range)
+    
+    def totals(self, query: str) -> np.ndarray:
+        """문서별 BM25 점수 배열 (길이 n_docs, 쿼리 n-gram이 없는 문서는 0)"""
+        postings, weights = [], []
+        for term, query_tf in Counter(char_ngrams(query, self.ngram_range)).items():
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                continue
+            start, stop = self.offsets[term_id], self.offsets[term_id + 1]
+            postings.append(self.doc_ids[start:stop])
+            weights.append(self.weights[start:stop] * query_tf)
+
+        if not postings:
+            return np.zeros(self.n_docs)
+
+        # posting 합이 행 수에 가까우므로 정렬 대신 행 길이 누적 배열에 더함
+        return np.bincount(np.concatenate(postings), weights=np.concatenate(weights), minlength=self.n_docs)
+
+    def score(self, query: str):
+        """쿼리 n-gram이 하나라도 있는 문서와 BM25 점수 (문서 번호 오름차순)"""
+        return nonzero_scores(self.totals(query))
+
+    def search(self, query: str, top_k: int, ranges=None, residual_rows=None):
+        """BM25 상위 k개 (PartitionedIndex.search와 같은 반환 형식, 필터 인자는 restrict_to_ranges 참고)"""
+        docs, scores = restrict_to_ranges(*self.score(query), ranges, residual_rows)
+        order = top_k_indices(scores, top_k)
+        return docs[order], scores[order], len(docs)
+
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + self.doc_ids.nbytes + self.weights.nbytes
+
+    def save(self, store_dir: str, matrix_checksum: str = ''):
+        """임베딩 저장소 디렉토리에 색인 저장 (행렬 체크섬으로 행 순서 짝을 맞춤)"""
+        path = os.path.join(store_dir, INDEX_FILE)
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, terms=np.array(self.terms, dtype=str), offsets=self.offsets, doc_ids=self.doc_ids,
+                 weights=self.weights, n_docs=np.array(self.n_docs), ngram_range=np.array(self.ngram_range),
+                 matrix_checksum=np.array(matrix_checksum))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, store_dir: str, matrix_checksum: str = None) -> Optional['LexicalIndex']:
+        """저장된 색인 로드 (파일이 없거나 행렬 체크섬이 다르면 None)"""
+        path = os.path.join(store_dir, INDEX_FILE)
+        if not os.path.exists(path):
+            return None
+
+        with np.load(path, allow_pickle=False) as data:
+            if matrix_checksum is not None and str(data['matrix_checksum']) != matrix_checksum:
+                return None
+            return cls(data['terms'].tolist(), data['offsets'], data['doc_ids'], data['weights'],
+                       int(data['n_docs']), data['ngram_range'].tolist())
+
+
+HASHTAG_PATTERN = re.compile(r'#([^#\s,]+)')
+MIN_TAG_TERM_LENGTH = 2   # 이보다 짧은 쿼리 단어/태그는 대응에서 제외 ('개', '좀' 등), 어간 비교 길이
+TERM_CACHE_SIZE = 1024    # 쿼리 단어별 posting 캐시 최대 항목 수 (오래 안 쓴 단어부터 제거)
+
+
+def parse_hashtags(text):
+    """'#애교쟁이#산책좋아' → ['애교쟁이', '산책좋아']"""
+    if not isinstance(text, str):
+        return []
+    return [tag.lower() for tag in HASHTAG_PATTERN.findall(text)]
+
+
+def hashtag_query_terms(query: str):
+    """쿼리의 해시태그 (없으면 2글자 이상 단어)"""
+    tags = parse_hashtags(query)
+    if tags:
+        return tags
+    return [token for token in TOKEN_PATTERN.findall(str(query).lower()) if len(token) >= MIN_TAG_TERM_LENGTH]
+
+
+class HashtagIndex:
+    """해시태그(addinfo08) → 동물 행 번호 posting (태그별 idf 가중치)
+
+    쿼리 단어는 부분 문자열 관계이거나 앞 두 글자(어간)가 같은 색인 태그에 대응시킨다
+    ('애교' → '애교쟁이', '활발하고' → '활발', '조용하고' → '조용함').
+    대응 태그의 posting은 쿼리 단어별로 모아 최근 cache_size개 단어까지 LRU 캐시한다.
+    """
+
+    def __init__(self, tags: Sequence[str], offsets: np.ndarray, doc_ids: np.ndarray, n_docs: int,
+                 cache_size: int = TERM_CACHE_SIZE):
+        self.tags = list(tags)
+        self.offsets = np.asarray(offsets, dtype=np.int64)   # 태그 i의 posting: offsets[i]:offsets[i + 1]
+        self.doc_ids = np.asarray(doc_ids, dtype=np.int32)
+        self.n_docs = int(n_docs)
+        doc_freqs = np.diff(self.offsets)
+        self.idf = np.log1p((self.n_docs - doc_freqs + 0.5) / (doc_freqs + 0.5)).astype(np.float32)
+        self.cache_size = cache_size
+        self._term_postings = OrderedDict()
+
+    @classmethod
+    def build(cls, tag_texts: Sequence[str]) -> 'HashtagIndex':
+        """동물별 해시태그 문자열 목록으로 색인 생성"""
+        vocabulary = {}
+        term_ids, doc_ids = [], []
+        for doc_id, text in enumerate(tag_texts):
+            for tag in set(parse_hashtags(text)):
+                term_ids.append(vocabulary.setdefault(tag, len(vocabulary)))
+                doc_ids.append(doc_id)
+
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        order = np.argsort(term_ids, kind='stable')   # 태그별로 묶되 태그 안에서는 문서 번호 오름차순 유지
+        offsets = np.concatenate(([0], np.cumsum(np.bincount(term_ids, minlength=len(vocabulary)))))
+
+        tags = [None] * len(vocabulary)
+        for tag, i in vocabulary.items():
+            tags[i] = tag
+        return cls(tags, offsets, np.asarray(doc_ids, dtype=np.int32)[order], len(tag_texts))
+
+    def matching_tags(self, term: str):
+        """쿼리 단어에 대응하는 색인 태그 번호 목록"""
+        stem = term[:MIN_TAG_TERM_LENGTH]
+        return [i for i, tag in enumerate(self.tags)
+                if len(tag) >= MIN_TAG_TERM_LENGTH and (term in tag or tag in term or tag.startswith(stem))]
+
+    def term_postings(self, term: str):
+        """쿼리 단어 하나의 (문서 번호, 가중치) — 여러 태그가 대응하면 문서별 최대 idf (LRU 캐시)"""
+        cached = self._term_postings.get(term)
+        if cached is not None:
+            self._term_postings.move_to_end(term)
+            return cached
+
+        tag_ids = self.matching_tags(term)
+        if not tag_ids:
+            cached = (np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32))
+        else:
+            docs = np.concatenate([self.doc_ids[self.offsets[t]:self.offsets[t + 1]] for t in tag_ids])
+            weights = np.repeat(self.idf[tag_ids], np.diff(self.offsets)[tag_ids])
+            order = np.lexsort((-weights, docs))
+            docs, weights = docs[order], weights[order]
+            first = np.concatenate(([True], docs[1:] != docs[:-1]))
+            cached = (docs[first], weights[first])
+        if self.cache_size > 0:
+            self._term_postings[term] = cached
+            while len(self._term_postings) > self.cache_size:
+                self._term_postings.popitem(last=False)
+        return cached
+
+    def totals(self, query: str) -> np.ndarray:
+        """문서별 쿼리 단어 대응 태그 idf 합 배열 (길이 n_docs)"""
+        postings, weights = [], []
+        for term in dict.fromkeys(hashtag_query_terms(query)):
+            docs, term_weights = self.term_postings(term)
+            if len(docs):
+                postings.append(docs)
+                weights.append(term_weights)
+
+        if not postings:
+            return np.zeros(self.n_docs)
+        return np.bincount(np.concatenate(postings), weights=np.concatenate(weights), minlength=self.n_docs)
+
+    def score(self, query: str):
+        """대응 태그가 있는 문서와 점수 (문서 번호 오름차순, LexicalIndex.score와 같은 형식)"""
+        return nonzero_scores(self.totals(query))
+
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + self.doc_ids.nbytes + self.idf.nbytes
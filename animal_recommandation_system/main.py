@@ -4,6 +4,7 @@ import time
 import pandas as pd
 import numpy as np
 from datetime import datetime
+import json
 import pickle
 import openai
 from dotenv import load_dotenv
@@ -16,6 +17,13 @@ load_dotenv(env_path)
 # 프로젝트 내 모듈 import
 from data_preprocessor import AnimalDataProcessorForGPT
 from embedding_processor import GPTEmbeddingProcessor
+from embedding_cache import EmbeddingCache, QueryEmbeddingCache
+from repair_queue import RepairQueue
+from embedding_store import convert_pickle_store, store_size_bytes
+from adopter_matching import ReverseMatcher, REVERSE_INDEX_DIR, ADOPTER_MATRIX_FILE
+from instrumentation import Instrumentation, build_sinks
+from hybrid_search import compare_with_dense
+from config import Config
 
 class AnimalRecommendationMain:
     def __init__(self):
@@ -23,10 +31,23 @@ class AnimalRecommendationMain:
         script_dir = os.path.dirname(os.path.abspath(__file__))
         self.data_file = os.path.join(script_dir, 'homeprotection_data.csv')
         self.preprocessed_file = os.path.join(script_dir, 'gpt_preprocessed_data.pkl')
-        self.embedding_file = os.path.join(script_dir, 'animal_embeddings.pkl')
+        self.embedding_file = os.path.join(script_dir, 'animal_embeddings')
+        self.legacy_embedding_file = os.path.join(script_dir, 'animal_embeddings.pkl')
+        self.embedding_cache_file = os.path.join(script_dir, 'embedding_cache.pkl')
+        self.query_cache_file = os.path.join(script_dir, 'query_cache.pkl')
+        self.sync_state_file = os.path.join(script_dir, 'sync_state.json')
+        self.repair_queue_file = os.path.join(script_dir, 'embedding_repair_queue.pkl')
+        self.adopter_index_dir = os.path.join(script_dir, REVERSE_INDEX_DIR)
         self.gpt_processor = None
         self.embedding_processor = None
         
+        # 단계별 지연 시간 계측 (임베딩 프로세서와 GPT 재추천이 같이 사용)
+        self.instrumentation = Instrumentation(build_sinks(
+            Config.INSTRUMENTATION_SINKS,
+            jsonl_path=os.path.join(script_dir, Config.METRICS_JSONL_FILE),
+            prometheus_port=Config.PROMETHEUS_PORT
+        ))
+        
         # OpenAI API 키 설정
         self.api_key = os.getenv('OPENAI_API_KEY')
         
@@ -63,7 +84,7 @@ class AnimalRecommendationMain:
         files_status = {
             '원본 데이터': (self.data_file, os.path.exists(self.data_file)),
             '전처리된 데이터': (self.preprocessed_file, os.path.exists(self.preprocessed_file)),
-            '임베딩 데이터': (self.embedding_file, os.path.exists(self.embedding_file))
+            '임베딩 데이터': (self.embedding_file, os.path.exists(self.embedding_file) or os.path.exists(self.legacy_embedding_file))
         }
         
         for name, (file_path, exists) in files_status.items():
@@ -84,7 +105,19 @@ class AnimalRecommendationMain:
             if self.api_key:
                 self.embedding_processor = GPTEmbeddingProcessor(
                     api_key=self.api_key,
-                    model="text-embedding-3-large"  # 파일에서 large 모델 사용
+                    model="text-embedding-3-large",  # 파일에서 large 모델 사용
+                    cache=EmbeddingCache(
+                        self.embedding_cache_file,
+                        max_entries=Config.EMBEDDING_CACHE_MAX_ENTRIES
+                    ),
+                    repair_queue=RepairQueue(self.repair_queue_file),
+                    dimensions=Config.EMBEDDING_DIMENSIONS,
+                    query_cache=QueryEmbeddingCache(
+                        self.query_cache_file,
+                        max_entries=Config.QUERY_CACHE_MAX_ENTRIES,
+                        ttl_seconds=Config.QUERY_CACHE_TTL_SECONDS
+                    ),
+                    instrumentation=self.instrumentation
                 )
                 print("   ✅ GPT 임베딩 프로세서 초기화 완료")
             else:
@@ -153,6 +186,129 @@ class AnimalRecommendationMain:
             print(f"❌ 임베딩 생성 중 오류 발생: {e}")
             return False
     
+    def load_sync_watermark(self):
+        """마지막 동기화 시점(Config.SYNC_TIMESTAMP_COLUMN 기준) 로드"""
+        column = Config.SYNC_TIMESTAMP_COLUMN
+        if os.path.exists(self.sync_state_file):
+            with open(self.sync_state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            # 기준 컬럼이 바뀌었으면 이전 시점은 의미가 없으므로 저장된 데이터에서 다시 계산
+            if state.get('column', 'd_regis') == column:
+                return state.get('last_update')
+        
+        # 동기화 기록이 없으면 저장된 데이터의 최신 시점 사용
+        df = self.embedding_processor.processed_df
+        if df is not None and column in df.columns and df[column].notna().any():
+            return str(pd.to_datetime(df[column]).max())
+        
+        return None
+    
+    def save_sync_watermark(self, last_update):
+        """동기화 시점 저장"""
+        state = {
+            'column': Config.SYNC_TIMESTAMP_COLUMN,
+            'last_update': str(last_update),
+            'synced_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+        with open(self.sync_state_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+    
+    def run_incremental_update(self):
+        """DB의 신규/변경 동물만 전처리·임베딩해서 기존 임베딩 저장소에 병합"""
+        print("\n" + "="*60)
+        print("🔁 증분 임베딩 갱신 단계")
+        print("="*60)
+        
+        from database import Database
+        
+        if not self.load_system():
+            print("❌ 기존 임베딩이 없어 증분 갱신을 할 수 없습니다. 전체 파이프라인을 먼저 실행하세요.")
+            return False
+        
+        last_update = self.load_sync_watermark()
+        if last_update is None:
+            print("❌ 동기화 기준 시점을 알 수 없습니다. 전체 파이프라인을 먼저 실행하세요.")
+            return False
+        
+        column = Config.SYNC_TIMESTAMP_COLUMN
+        print(f"⏱️  기준 시점: {last_update} ({column})")
+        
+        try:
+            db = Database()
+            processed_df = self.embedding_processor.processed_df
+            
+            # 1. 기준 시점 이후 등록/수정된 임보가능 동물
+            candidates_df = db.get_changed_data(last_update, column)
+            
+            # 2. 현재 임보가능 uid 목록과 비교해서 상태가 바뀐 동물 확인
+            available_uids = db.get_available_uids()
+            stored_available = set(processed_df.loc[processed_df['state'] == '임보가능', 'uid'])
+            retired_uids = stored_available - available_uids
+            
+            # 지난 실행에서 임베딩에 실패한 동물 중 여전히 임보가능한 동물만 재처리
+            repair_queue = self.embedding_processor.repair_queue
+            pending_uids = set()
+            if repair_queue is not None:
+                repair_queue.remove([uid for uid in repair_queue.uids() if uid not in available_uids])
+                pending_uids = set(repair_queue.uids())
+            repaired = self.embedding_processor.drain_repair_queue()
+            
+            # 기준 시점 이전에 등록됐다가 다시 임보가능이 된 동물은 uid로 추가 조회
+            returned_uids = available_uids - stored_available - set(candidates_df['uid']) - pending_uids
+            if returned_uids:
+                candidates_df = pd.concat([candidates_df, db.get_data_by_uids(returned_uids)], ignore_index=True)
+            
+            # 3. 후보만 전처리해서 임베딩 텍스트 해시가 저장된 것과 다른 행만 임베딩 후 uid 기준 병합
+            changed_df = candidates_df
+            if len(changed_df) > 0:
+                changed_df, _ = self.gpt_processor.process_dataframe(changed_df)
+                changed_df = self.embedding_processor.changed_rows(changed_df)
+            
+            embedded_uids = []
+            if len(changed_df) > 0:
+                embedded_df, embeddings = self.embedding_processor.embed_dataframe(changed_df)
+                self.embedding_processor.upsert_animals(embedded_df, embeddings)
+                embedded_uids = embedded_df['uid'].tolist()
+            
+            # 4. 임보가능 상태에서 벗어난 동물 제외
+            self.embedding_processor.retire_animals(retired_uids)
+            
+            if column in candidates_df.columns and candidates_df[column].notna().any():
+                last_update = max(pd.to_datetime(candidates_df[column]).max(), pd.to_datetime(last_update))
+            
+            if len(changed_df) == 0 and not retired_uids and not repaired:
+                self.save_sync_watermark(last_update)
+                print("✅ 변경 사항 없음")
+                return True
+            
+            self.embedding_processor.save_embeddings(self.embedding_file)
+            # 복구 대기열에서 살아난 동물도 신규 동물과 같이 역매칭
+            self.run_reverse_matching(embedded_uids + list(repaired), retired_uids)
+            self.save_sync_watermark(last_update)
+            
+            print(f"✅ 증분 갱신 완료: 신규/변경 {len(changed_df)}마리, 복구 {len(repaired)}마리, 제외 {len(retired_uids)}마리")
+            return True
+            
+        except Exception as e:
+            print(f"❌ 증분 갱신 중 오류 발생: {e}")
+            return False
+    
+    def run_reverse_matching(self, new_uids, retired_uids):
+        """신규/변경 동물만 신청자 행렬과 비교해서 동물별 상위 신청자 테이블 갱신"""
+        if not os.path.exists(os.path.join(self.adopter_index_dir, ADOPTER_MATRIX_FILE)):
+            print("   ℹ️  신청자 임베딩이 없어 역매칭을 건너뜁니다. (python adopter_matching.py --reverse로 생성)")
+            return 0
+        
+        matcher = ReverseMatcher(self.adopter_index_dir, top_n=Config.REVERSE_MATCH_TOP_N)
+        try:
+            matcher.remove_animals(retired_uids)
+            return matcher.sync_animals(self.embedding_processor, new_uids)
+        except ValueError as e:
+            print(f"   ⚠️  역매칭 실패: {e}")
+            return 0
+        finally:
+            matcher.close()
+    
     def load_system(self):
         """기존 시스템 로드"""
         print("\n" + "="*60)
@@ -160,6 +316,10 @@ class AnimalRecommendationMain:
         print("="*60)
         
         try:
+            # 기존 pickle만 있으면 memmap 저장소로 1회 변환
+            if not os.path.exists(self.embedding_file) and os.path.exists(self.legacy_embedding_file):
+                convert_pickle_store(self.legacy_embedding_file, self.embedding_file, Config.EMBEDDING_STORE_DTYPE)
+            
             if os.path.exists(self.embedding_file):
                 self.embedding_processor.load_embeddings(self.embedding_file)
                 print("   ✅ 임베딩 데이터 로드 완료")
@@ -172,6 +332,18 @@ class AnimalRecommendationMain:
             print(f"❌ 시스템 로드 중 오류 발생: {e}")
             return False
     
+    def compare_hybrid_search(self, top_k=5):
+        """테스트 쿼리로 dense 단독 순위와 하이브리드(어휘/해시태그 융합) 순위 비교"""
+        print("\n" + "="*60)
+        print("🔀 하이브리드 검색 비교")
+        print("="*60)
+        
+        if self.embedding_processor.lexical_index is None:
+            print("❌ 어휘 색인이 없습니다. (Config.LEXICAL_FALLBACK 또는 Config.HYBRID_SEARCH 확인)")
+            return []
+        
+        return compare_with_dense(self.embedding_processor, self.test_queries, top_k=top_k)
+    
     def run_recommendations(self):
         """추천 시스템 테스트 실행"""
         print("\n" + "="*60)
@@ -181,6 +353,9 @@ class AnimalRecommendationMain:
         print("🧪 테스트 모드로 실행합니다.")
         print(f"📝 준비된 테스트 쿼리: {len(self.test_queries)}개\n")
         
+        # 테스트 쿼리는 매번 같으므로 한 번에 임베딩해 둠 (증분 갱신 같은 헤드리스 실행에서는 하지 않음)
+        self.embedding_processor.warm_up_query_cache(self.test_queries)
+        
         for i, query in enumerate(self.test_queries, 1):
             print(f"\n【테스트 {i}/{len(self.test_queries)}】")
             print(f"🔍 사용자 쿼리: '{query}'")
@@ -191,7 +366,8 @@ class AnimalRecommendationMain:
                 initial_candidates = self.embedding_processor.find_similar_animals(
                     query, 
                     top_k=10,  # 더 많은 후보를 가져와서 GPT가 선택할 수 있도록
-                    available_only=True
+                    available_only=True,
+                    verbose=True
                 )
                 
                 if not initial_candidates:
@@ -211,7 +387,8 @@ class AnimalRecommendationMain:
                     print(gpt_response)
                     
                     # GPT 응답 파싱 (선택사항)
-                    parsed_recommendations = self.parse_gpt_recommendations(gpt_response)
+                    with self.instrumentation.span('response_parsing'):
+                        parsed_recommendations = self.parse_gpt_recommendations(gpt_response)
                     
                     if parsed_recommendations:
                         print("\n📋 파싱된 추천 결과:")
@@ -265,6 +442,20 @@ class AnimalRecommendationMain:
             except Exception as e:
                 print(f"❌ 추천 처리 중 오류: {e}")
                 continue
+        
+        self.show_query_cache_stats()
+        self.instrumentation.print_summary()
+    
+    def show_query_cache_stats(self):
+        """쿼리 임베딩 캐시 히트율 표시 (종료 전 캐시 저장)"""
+        query_cache = self.embedding_processor.query_cache if self.embedding_processor else None
+        if query_cache is None:
+            return
+        
+        query_cache.save()
+        stats = query_cache.stats()
+        print(f"\n📦 쿼리 임베딩 캐시: 히트 {stats['hits']}회, 미스 {stats['misses']}회 "
+              f"(히트율 {stats['hit_rate']*100:.1f}%, 캐시 {stats['entries']}개, 만료 {stats['expirations']}개)")
     
     def show_system_stats(self):
         """시스템 통계 정보 표시"""
@@ -292,11 +483,12 @@ class AnimalRecommendationMain:
                         print(f"   {gender}: {count:,}마리")
             
             # 파일 크기 정보
-            files = [self.data_file, self.preprocessed_file, self.embedding_file]
+            files = [self.data_file, self.preprocessed_file, self.embedding_file, self.embedding_cache_file,
+                     self.query_cache_file]
             print(f"\n💾 파일 크기:")
             for file_path in files:
                 if os.path.exists(file_path):
-                    size_mb = os.path.getsize(file_path) / 1024 / 1024
+                    size_mb = store_size_bytes(file_path) / 1024 / 1024
                     print(f"   {file_path}: {size_mb:.1f} MB")
                     
         except Exception as e:
@@ -337,6 +529,12 @@ class AnimalRecommendationMain:
             print("❌ 시스템 로드 실패. 프로그램을 종료합니다.")
             return False
         
+        # 임베딩 실패로 제외됐던 동물 복구 시도
+        repaired = self.embedding_processor.drain_repair_queue()
+        if repaired:
+            self.embedding_processor.save_embeddings(self.embedding_file)
+            self.run_reverse_matching(repaired, [])
+        
         # 6. 시스템 통계
         self.show_system_stats()
         
@@ -401,20 +599,22 @@ class AnimalRecommendationMain:
             print("🤖 GPT에게 재추천 요청 중...")
             
             # GPT API 호출
-            response = openai.chat.completions.create(
-                model="gpt-4o-mini",  # 비용 효율적인 모델 사용
-                messages=[
-                    {"role": "system", "content": "당신은 동물 입양 전문가입니다. 사용자의 요구사항에 가장 적합한 동물을 추천해주세요."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,  # 일관성 있는 추천을 위해 낮은 temperature
-                max_tokens=1000
-            )
+            with self.instrumentation.span('llm_rerank'):
+                response = openai.chat.completions.create(
+                    model="gpt-4o-mini",  # 비용 효율적인 모델 사용
+                    messages=[
+                        {"role": "system", "content": "당신은 동물 입양 전문가입니다. 사용자의 요구사항에 가장 적합한 동물을 추천해주세요."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.3,  # 일관성 있는 추천을 위해 낮은 temperature
+                    max_tokens=1000
+                )
             
             return response.choices[0].message.content
             
         except Exception as e:
             print(f"❌ GPT 재추천 중 오류: {e}")
+            self.instrumentation.increment('llm_failures')
             return None
     
     def get_animal_description(self, candidate):
@@ -548,7 +748,14 @@ class AnimalRecommendationMain:
         print("   실제 구글 시트 연동을 원하시면 위 주석의 가이드를 참고하세요.")
         
     def test_single_recommendation(self, query):
-        """단일 쿼리로 추천 시스템 테스트"""
+        """단일 쿼리로 추천 시스템 테스트 (후보 선정 → GPT 재추천 → 파싱을 요청 1건으로 계측)"""
+        with self.instrumentation.trace('recommendation'):
+            result = self._run_single_recommendation(query)
+        self.instrumentation.print_summary()
+        return result
+    
+    def _run_single_recommendation(self, query):
+        """test_single_recommendation 본체"""
         print("\n" + "="*60)
         print("🎯 단일 추천 테스트")
         print("="*60)
@@ -561,7 +768,8 @@ class AnimalRecommendationMain:
             initial_candidates = self.embedding_processor.find_similar_animals(
                 query, 
                 top_k=10,
-                available_only=True
+                available_only=True,
+                verbose=True
             )
             
             if not initial_candidates:
@@ -581,7 +789,8 @@ class AnimalRecommendationMain:
                 print(gpt_response)
                 
                 # GPT 응답 파싱
-                parsed_recommendations = self.parse_gpt_recommendations(gpt_response)
+                with self.instrumentation.span('response_parsing'):
+                    parsed_recommendations = self.parse_gpt_recommendations(gpt_response)
                 
                 if parsed_recommendations:
                     print("\n📋 파싱된 추천 결과:")
@@ -610,6 +819,18 @@ def main():
     recommender = AnimalRecommendationMain()
     
     try:
+        if '--incremental' in sys.argv:
+            # 신규/변경 동물만 증분 갱신
+            if recommender.setup_processors():
+                recommender.run_incremental_update()
+            return
+        
+        if '--compare-hybrid' in sys.argv:
+            # 테스트 쿼리로 dense 단독 vs 하이브리드 순위 비교
+            if recommender.setup_processors() and recommender.load_system():
+                recommender.compare_hybrid_search()
+            return
+        
         # 전체 파이프라인 실행
         recommender.run_full_pipeline(skip_existing=True)
             
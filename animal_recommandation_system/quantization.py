@@ -0,0 +1,135 @@
+"""
+임베딩 행렬 int8 스칼라 양자화 모듈
+차원별 offset/scale로 정규화 행렬을 int8로 압축해 메모리에 올려 두고,
+1차 스캔은 int8 행렬로, 상위 후보 재정렬은 디스크(memmap)의 원본 벡터로 수행한다.
+
+    x[d] ≈ offset[d] + scale[d] * (code[d] + 128)
+    q · x ≈ q · offset + 128 * Σ q[d] * scale[d] + Σ (q[d] * scale[d]) * code[d]
+
+앞의 두 항은 쿼리마다 상수이므로 순위에는 마지막 항만 필요하다.
+"""
+
+import os
+from typing import Optional
+
+import numpy as np
+
+from vector_index import top_k_indices
+
+
+CODES_FILE = 'embeddings_int8.npy'
+PARAMS_FILE = 'quantization.npz'
+
+
+class Int8Quantizer:
+    """차원별 offset/scale int8 양자화 행렬 + 원본 재정렬 검색"""
+    
+    def __init__(self, codes: np.ndarray, offset: np.ndarray, scale: np.ndarray):
+        self.codes = codes                                 # (행 수, 차원) int8
+        self.offset = np.asarray(offset, dtype=np.float32)
+        self.scale = np.asarray(scale, dtype=np.float32)
+    
+    @classmethod
+    def fit(cls, matrix, block_size: int = 8192) -> 'Int8Quantizer':
+        """차원별 최소/최대값으로 구간을 잡아 전체 행렬을 int8로 변환 (블록 단위 2회 순회)"""
+        dims = matrix.shape[1]
+        low = np.full(dims, np.inf, dtype=np.float32)
+        high = np.full(dims, -np.inf, dtype=np.float32)
+        for start in range(0, len(matrix), block_size):
+            block = np.asarray(matrix[start:start + block_size], dtype=np.float32)
+            np.minimum(low, block.min(axis=0), out=low)
+            np.maximum(high, block.max(axis=0), out=high)
+        
+        scale = (high - low) / 255.0
+        scale[scale == 0] = 1.0
+        
+        quantizer = cls(np.empty(matrix.shape, dtype=np.int8), low, scale)
+        for start in range(0, len(matrix), block_size):
+            quantizer.codes[start:start + block_size] = quantizer.encode(matrix[start:start + block_size])
+        return quantizer
+    
+    def encode(self, block) -> np.ndarray:
+        block = np.asarray(block, dtype=np.float32)
+        levels = np.rint((block - self.offset) / self.scale) - 128
+        return np.clip(levels, -128, 127).astype(np.int8)
+    
+    def decode(self, codes) -> np.ndarray:
+        return self.offset + self.scale * (codes.astype(np.float32) + 128)
+    
+    def approximate_scores(self, query, start: int, stop: int, block_size: int = 128) -> np.ndarray:
+        """[start, stop) 구간의 근사 내적 (상수항 포함, 캐시에 들어가는 작은 int8 블록만 float32로 변환)"""
+        weights = (query * self.scale).astype(np.float32)
+        constant = float(query @ self.offset + 128 * weights.sum())
+        
+        scores = np.empty(stop - start, dtype=np.float32)
+        for block_start in range(start, stop, block_size):
+            block_stop = min(block_start + block_size, stop)
+            block = self.codes[block_start:block_stop].astype(np.float32)
+            scores[block_start - start:block_stop - start] = block @ weights
+        scores += constant
+        return scores
+    
+    def search(self, matrix, query, top_k, ranges, residual_mask=None, rerank: int = 200):
+        """int8 1차 스캔 → 상위 rerank개를 원본 행렬로 재정렬 (PartitionedIndex.search와 같은 반환 형식)
+        
+        Args:
+            matrix: 원본 정규화 행렬 (memmap이면 재정렬 후보 행만 디스크에서 읽음)
+            rerank: 재정렬할 후보 수
+        """
+        shortlist_size = max(top_k, rerank)
+        shortlist = []
+        shortlist_scores = []
+        candidates = 0
+        
+        for start, stop in ranges:
+            scores = self.approximate_scores(query, start, stop)
+            if residual_mask is not None:
+                keep = residual_mask(start, stop)
+                candidates += int(keep.sum())
+                scores[~keep] = -np.inf
+            else:
+                candidates += stop - start
+            
+            local = top_k_indices(scores, shortlist_size)
+            local = local[np.isfinite(scores[local])]
+            shortlist.append(local + start)
+            shortlist_scores.append(scores[local])
+        
+        if not shortlist:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32), 0
+        
+        rows = np.concatenate(shortlist)
+        if len(rows) > shortlist_size:
+            rows = rows[top_k_indices(np.concatenate(shortlist_scores), shortlist_size)]
+        if not len(rows):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32), candidates
+        
+        # 원본 벡터로 정확한 유사도 재계산 (행 번호 순으로 읽기)
+        rows = np.sort(rows)
+        exact = np.asarray(matrix[rows], dtype=np.float32) @ query
+        order = top_k_indices(exact, top_k)
+        return rows[order], exact[order], candidates
+    
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.offset.nbytes + self.scale.nbytes
+    
+    def save(self, store_dir: str, matrix_checksum: str = ''):
+        """임베딩 저장소 디렉토리에 int8 행렬과 파라미터 저장 (행렬 체크섬으로 짝을 맞춤)"""
+        codes_path = os.path.join(store_dir, CODES_FILE)
+        np.save(codes_path + '.tmp.npy', self.codes)
+        os.replace(codes_path + '.tmp.npy', codes_path)
+        np.savez(os.path.join(store_dir, PARAMS_FILE), offset=self.offset, scale=self.scale,
+                 matrix_checksum=np.array(matrix_checksum))
+    
+    @classmethod
+    def load(cls, store_dir: str, matrix_checksum: str = None) -> Optional['Int8Quantizer']:
+        """저장된 int8 행렬을 메모리로 로드 (파일이 없거나 행렬 체크섬이 다르면 None)"""
+        params_path = os.path.join(store_dir, PARAMS_FILE)
+        codes_path = os.path.join(store_dir, CODES_FILE)
+        if not (os.path.exists(params_path) and os.path.exists(codes_path)):
+            return None
+        
+        with np.load(params_path, allow_pickle=False) as params:
+            if matrix_checksum is not None and str(params['matrix_checksum']) != matrix_checksum:
+                return None
+            return cls(np.load(codes_path), params['offset'], params['scale'])
@@ -0,0 +1,105 @@
+"""
+추천 결과 레코드 모듈
+상위 k개 행 번호가 정해지면 필드별 컬럼 배열에서 한 번씩만 take해서 결과를 만든다.
+결과는 __slots__ 레코드이고 기존 딕셔너리 결과처럼 result['name'], result.get('rank')로 읽을 수 있다.
+"""
+
+from typing import Dict, List
+
+import numpy as np
+
+
+LINK_PREFIX = "https://www.pimfyvirus.com/search/01_v/"
+
+# 결과 필드 → (원본 컬럼, 컬럼이 없을 때 기본값)
+COLUMN_FIELDS = {
+    'uid': ('uid', ''),
+    'name': ('addinfo01', None),
+    'gender': ('addinfo03', None),
+    'weight': ('addinfo07', None),
+    'age': ('addinfo05', '나이미정'),
+    'neuter': ('addinfo04', '중성화미정'),
+    'personality_tags': ('addinfo08', None),
+    'personality_desc': ('addinfo10', ''),
+    'rescue_story': ('addinfo09', ''),
+    'special_needs': ('addinfo16', ''),
+    'state': ('state', None),
+    'kind': ('kind', '임보종류미정'),
+}
+
+# retrieval: 'dense'(임베딩 유사도), 'hybrid'(유사도 + 어휘/해시태그 융합 순위, similarity는 코사인 유사도)
+#            또는 'lexical'(임베딩 API 대체 어휘 검색, similarity는 BM25 점수)
+RESULT_FIELDS = ('rank', 'index', 'uid', 'link', 'similarity') + tuple(f for f in COLUMN_FIELDS if f != 'uid') + ('retrieval',)
+
+
+class AnimalResult:
+    """추천 결과 1건 (딕셔너리처럼 읽을 수 있는 slotted 레코드)"""
+
+    __slots__ = RESULT_FIELDS
+
+    def __init__(self, **values):
+        for name in RESULT_FIELDS:
+            setattr(self, name, values.get(name))
+
+    def __getitem__(self, key):
+        if key not in RESULT_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in RESULT_FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key) -> bool:
+        return key in RESULT_FIELDS
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in RESULT_FIELDS else default
+
+    def keys(self):
+        return RESULT_FIELDS
+
+    def items(self):
+        return [(name, getattr(self, name)) for name in RESULT_FIELDS]
+
+    def to_dict(self) -> Dict:
+        return dict(self.items())
+
+    def __repr__(self) -> str:
+        return f"AnimalResult(rank={self.rank}, uid={self.uid!r}, name={self.name!r}, similarity={self.similarity:.3f})"
+
+
+class ResultColumns:
+    """결과 필드별 컬럼 배열 (processed_df가 바뀔 때 한 번만 만듦)"""
+
+    def __init__(self, df):
+        self.columns = {}
+        for field, (column, default) in COLUMN_FIELDS.items():
+            self.columns[field] = df[column].to_numpy() if column in df.columns else None
+            if self.columns[field] is None and default is None:
+                raise KeyError(column)
+
+    def take(self, top_indices, top_scores, retrieval: str = 'dense') -> List[AnimalResult]:
+        """상위 행 번호/유사도로 결과 레코드 목록 생성 (필드마다 배열 take 1회)"""
+        top_indices = np.asarray(top_indices, dtype=np.int64)
+        count = len(top_indices)
+
+        values = {}
+        for field, (_, default) in COLUMN_FIELDS.items():
+            column = self.columns[field]
+            values[field] = column[top_indices].tolist() if column is not None else [default] * count
+
+        results = []
+        for i in range(count):
+            uid = values['uid'][i]
+            record = {field: values[field][i] for field in COLUMN_FIELDS}
+            record.update({
+                'rank': i + 1,
+                'index': int(top_indices[i]),
+                'link': f"{LINK_PREFIX}{uid}" if uid else "링크 없음",
+                'similarity': float(top_scores[i]),
+                'retrieval': retrieval,
+            })
+            results.append(AnimalResult(**record))
+        return results
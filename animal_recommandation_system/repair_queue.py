@@ -0,0 +1,89 @@
+"""
+임베딩 복구 대기열 모듈
+분할 재시도 후에도 임베딩에 실패한 동물을 저장해 두고 다음 실행에서 다시 처리한다.
+대기열에 있는 동물은 임베딩 저장소에 들어가지 않으므로 검색 대상에서 제외된다.
+"""
+
+import os
+import pickle
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+
+class RepairQueue:
+    """임베딩 실패 동물 영속 대기열"""
+
+    def __init__(self, queue_path: Optional[str] = None, max_attempts: int = 5):
+        self.queue_path = queue_path
+        self.max_attempts = max_attempts
+        self._entries: Dict[str, Dict] = {}
+
+        if queue_path and os.path.exists(queue_path):
+            self.load()
+
+    def add(self, uid, row: Dict, text: str, error: str, permanent: bool = False) -> None:
+        """실패한 동물 추가 (이미 있으면 시도 횟수 증가)
+
+        permanent: 입력 자체가 거부된 실패 (텍스트가 바뀌기 전에는 재시도하지 않음)
+        """
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        key = str(uid)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = {'uid': uid, 'attempts': 0, 'first_failed': now}
+            self._entries[key] = entry
+
+        entry.update({
+            'row': row,
+            'text': text,
+            'error': error,
+            'last_failed': now,
+            'permanent': permanent,
+        })
+        entry['attempts'] += 1
+
+    def remove(self, uids: Iterable) -> int:
+        """복구되었거나 더 이상 필요 없는 동물 제거"""
+        removed = 0
+        for uid in uids:
+            if self._entries.pop(str(uid), None) is not None:
+                removed += 1
+        return removed
+
+    def pending(self) -> List[Dict]:
+        """재시도 대상 (최대 시도 횟수 미만, 입력이 거부된 항목 제외)"""
+        return [entry for entry in self._entries.values()
+                if entry['attempts'] < self.max_attempts and not entry.get('permanent')]
+
+    def exhausted(self) -> List[Dict]:
+        """최대 시도 횟수를 넘겼거나 입력이 거부되어 수동 확인이 필요한 항목"""
+        return [entry for entry in self._entries.values()
+                if entry['attempts'] >= self.max_attempts or entry.get('permanent')]
+
+    def permanently_failed(self, uid, text: str) -> bool:
+        """같은 텍스트로 입력이 거부된 적이 있는지 (텍스트가 바뀌었으면 False)"""
+        entry = self._entries.get(str(uid))
+        return entry is not None and bool(entry.get('permanent')) and entry['text'] == text
+
+    def uids(self) -> List:
+        return [entry['uid'] for entry in self._entries.values()]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, uid) -> bool:
+        return str(uid) in self._entries
+
+    def load(self) -> None:
+        with open(self.queue_path, 'rb') as f:
+            self._entries = pickle.load(f)
+        print(f"🧰 임베딩 복구 대기열 로드: {len(self._entries)}개")
+
+    def save(self) -> None:
+        if not self.queue_path:
+            return
+
+        tmp_path = self.queue_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(self._entries, f)
+        os.replace(tmp_path, self.queue_path)
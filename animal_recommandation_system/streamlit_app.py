@@ -9,13 +9,16 @@ st.set_page_config(page_title="임시보호 동물 추천 시스템", layout="wi
 # ✅ CSV 경로 직접 지정
 CSV_PATH = "C:/Users/keti/git/Recommendation/data/pimfyvirus_dog_data.csv"
 
-# ✅ 데이터 로딩
-preprocessor = DataPreprocessor()
-processed_data = preprocessor.load_and_process(CSV_PATH)
-metadata = preprocessor.get_metadata()
+# ✅ 데이터 로딩 (위젯을 누를 때마다 스크립트가 다시 실행되므로 프로세스당 한 번만 만들고 재사용)
+#    AnimalFilter의 컬럼 배열과 필터 결과 LRU 캐시가 재실행 사이에 유지된다.
+@st.cache_resource
+def load_filter(csv_path):
+    preprocessor = DataPreprocessor()
+    processed_data = preprocessor.load_and_process(csv_path)
+    return preprocessor, preprocessor.get_metadata(), AnimalFilter(processed_data)
 
-animal_filter = AnimalFilter()
-animal_filter.set_animals(processed_data)
+
+preprocessor, metadata, animal_filter = load_filter(CSV_PATH)
 
 st.success("✅ 데이터가 자동으로 로딩되었습니다!")
 
@@ -0,0 +1,171 @@
+"""
+임베딩 요청 토큰 추정 및 배치 패킹 모듈
+tiktoken이 설치되어 있으면 실제 토크나이저를, 없으면 한국어 기준으로 보정한
+글자당 토큰 비율을 사용한다.
+"""
+
+import re
+from typing import Dict, List, Optional
+
+from config import Config
+
+try:
+    import tiktoken
+except ImportError:  # 선택 의존성
+    tiktoken = None
+
+
+HANGUL_PATTERN = re.compile(r'[가-힣ㄱ-ㆎ]')
+
+
+class TokenEstimator:
+    """텍스트 토큰 수 추정기"""
+
+    def __init__(self, encoding_name: str = "cl100k_base",
+                 hangul_tokens_per_char: float = None, other_tokens_per_char: float = None):
+        self.hangul_tokens_per_char = hangul_tokens_per_char or Config.EMBEDDING_HANGUL_TOKENS_PER_CHAR
+        self.other_tokens_per_char = other_tokens_per_char or Config.EMBEDDING_OTHER_TOKENS_PER_CHAR
+        self.encoding = None
+        if tiktoken is not None:
+            try:
+                self.encoding = tiktoken.get_encoding(encoding_name)
+            except Exception:
+                self.encoding = None
+
+    @property
+    def method(self) -> str:
+        return "tiktoken" if self.encoding is not None else "char-ratio"
+
+    def count(self, text: str) -> int:
+        """텍스트 하나의 토큰 수"""
+        if self.encoding is not None:
+            return len(self.encoding.encode(text))
+
+        hangul = len(HANGUL_PATTERN.findall(text))
+        other = len(text) - hangul
+        return int(hangul * self.hangul_tokens_per_char + other * self.other_tokens_per_char) + 1
+
+    def count_many(self, texts: List[str]) -> List[int]:
+        return [self.count(text) for text in texts]
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """토큰 수가 max_tokens 이하가 되도록 텍스트 뒤쪽을 잘라냄 (한도 안이면 그대로)"""
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text)
+            if len(tokens) <= max_tokens:
+                return text
+            # 멀티바이트 글자 중간에서 잘리면 디코딩 결과가 달라질 수 있어 다시 세면서 줄임
+            limit = max_tokens
+            while limit > 0:
+                truncated = self.encoding.decode(tokens[:limit]).rstrip('\ufffd')
+                excess = len(self.encoding.encode(truncated)) - max_tokens
+                if excess <= 0:
+                    return truncated
+                limit -= excess
+            return ''
+
+        if self.count(text) <= max_tokens:
+            return text
+        # count와 같은 글자당 비율로 누적해서 한도(+1 보정 포함)를 넘기 직전 위치에서 자름
+        budget = max_tokens - 1
+        used = 0.0
+        for position, char in enumerate(text):
+            used += self.hangul_tokens_per_char if HANGUL_PATTERN.match(char) else self.other_tokens_per_char
+            if used > budget:
+                return text[:position]
+        return text
+
+    def calibrate(self, texts: List[str]) -> Dict:
+        """tiktoken 결과에 맞춰 한글/기타 글자당 토큰 비율을 최소제곱으로 재추정"""
+        if self.encoding is None:
+            raise RuntimeError("보정에는 tiktoken이 필요합니다.")
+
+        import numpy as np
+
+        features = []
+        targets = []
+        for text in texts:
+            hangul = len(HANGUL_PATTERN.findall(text))
+            features.append([hangul, len(text) - hangul])
+            targets.append(len(self.encoding.encode(text)))
+
+        (hangul_ratio, other_ratio), *_ = np.linalg.lstsq(np.array(features, dtype=float),
+                                                          np.array(targets, dtype=float), rcond=None)
+        self.hangul_tokens_per_char = float(hangul_ratio)
+        self.other_tokens_per_char = float(other_ratio)
+        return {'hangul_tokens_per_char': self.hangul_tokens_per_char,
+                'other_tokens_per_char': self.other_tokens_per_char}
+
+
+def pack_batches(token_counts: List[int], max_tokens_per_request: int,
+                 max_inputs_per_request: int) -> List[List[int]]:
+    """토큰 예산 안에서 요청 수가 최소가 되도록 입력을 배치로 묶음 (First-Fit Decreasing)"""
+    order = sorted(range(len(token_counts)), key=lambda i: token_counts[i], reverse=True)
+
+    batches = []
+    remaining = []
+    for i in order:
+        tokens = token_counts[i]
+        for b, left in enumerate(remaining):
+            if tokens <= left and len(batches[b]) < max_inputs_per_request:
+                batches[b].append(i)
+                remaining[b] -= tokens
+                break
+        else:
+            # 예산을 넘는 단일 입력도 자체 배치로 보냄
+            batches.append([i])
+            remaining.append(max_tokens_per_request - tokens)
+
+    for batch in batches:
+        batch.sort()
+    batches.sort(key=lambda batch: batch[0])
+    return batches
+
+
+def plan_embedding_requests(texts: List[str], estimator: Optional[TokenEstimator] = None,
+                            max_tokens_per_request: int = None, max_inputs_per_request: int = None,
+                            max_tokens_per_input: int = None) -> Dict:
+    """실행 전 토큰 수와 요청 수를 계산한 배치 계획
+
+    입력당 토큰 한도를 넘는 텍스트는 API가 매번 거부하므로 한도에 맞게 잘라서 'texts'에 담는다
+    (요청은 원본 대신 'texts'로 보냄).
+    """
+    estimator = estimator or TokenEstimator()
+    max_tokens_per_request = max_tokens_per_request or Config.EMBEDDING_MAX_TOKENS_PER_REQUEST
+    max_inputs_per_request = max_inputs_per_request or Config.EMBEDDING_MAX_INPUTS_PER_REQUEST
+    max_tokens_per_input = max_tokens_per_input or Config.EMBEDDING_MAX_TOKENS_PER_INPUT
+
+    texts = list(texts)
+    token_counts = estimator.count_many(texts)
+    truncated_inputs = [i for i, tokens in enumerate(token_counts) if tokens > max_tokens_per_input]
+    for i in truncated_inputs:
+        texts[i] = estimator.truncate(texts[i], max_tokens_per_input)
+        token_counts[i] = estimator.count(texts[i])
+
+    batches = pack_batches(token_counts, max_tokens_per_request, max_inputs_per_request)
+
+    return {
+        'texts': texts,
+        'token_counts': token_counts,
+        'batches': batches,
+        'total_tokens': sum(token_counts),
+        'num_requests': len(batches),
+        'max_tokens_per_request': max_tokens_per_request,
+        'truncated_inputs': truncated_inputs,
+        'method': estimator.method,
+    }
+
+
+def print_plan_report(plan: Dict) -> None:
+    """배치 계획 사전 보고"""
+    token_counts = plan['token_counts']
+    batch_tokens = [sum(token_counts[i] for i in batch) for batch in plan['batches']]
+
+    print(f"📐 임베딩 요청 계획 ({plan['method']} 기준)")
+    print(f"   - 입력: {len(token_counts):,}개, 총 토큰: {plan['total_tokens']:,}")
+    print(f"   - 요청 수: {plan['num_requests']:,}회 (요청당 최대 {plan['max_tokens_per_request']:,} 토큰)")
+    if batch_tokens:
+        fill = sum(batch_tokens) / (len(batch_tokens) * plan['max_tokens_per_request']) * 100
+        print(f"   - 요청당 평균 토큰: {sum(batch_tokens) / len(batch_tokens):,.0f} (예산 대비 {fill:.1f}%)")
+    if plan['truncated_inputs']:
+        print(f"   ✂️  입력당 토큰 한도 초과로 잘라낸 입력: {len(plan['truncated_inputs'])}개")
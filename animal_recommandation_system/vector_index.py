@@ -0,0 +1,172 @@
+"""
+벡터 검색 유틸리티 모듈
+정규화된 임베딩 행렬에 대한 내적 유사도 계산과 top-k 선택
+"""
+
+import numpy as np
+
+
+def normalize_rows(matrix, dtype=np.float32, block_size: int = 8192) -> np.ndarray:
+    """행 단위 L2 정규화 (0 벡터는 그대로 0으로 유지)"""
+    matrix = np.asarray(matrix)
+    normalized = np.empty(matrix.shape, dtype=dtype)
+
+    # memmap 행렬도 한 번에 전부 올리지 않도록 블록 단위 처리
+    for start in range(0, len(matrix), block_size):
+        block = np.asarray(matrix[start:start + block_size], dtype=np.float32)
+        norms = np.linalg.norm(block, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        normalized[start:start + block_size] = block / norms
+
+    return normalized
+
+
+def normalize_vector(vector) -> np.ndarray:
+    """쿼리 벡터 L2 정규화"""
+    vector = np.asarray(vector, dtype=np.float32).ravel()
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """점수 내림차순 상위 k개 인덱스 (전체 정렬 없이 argpartition 후 k개만 정렬)"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    if k < len(scores):
+        candidates = np.argpartition(scores, -k)[-k:]
+    else:
+        candidates = np.arange(len(scores))
+
+    return candidates[np.argsort(scores[candidates])[::-1]]
+
+
+class PartitionedIndex:
+    """입양 가능 여부 → 크기 → 성별 순으로 물리 정렬된 행렬의 구간 인덱스
+
+    자주 쓰는 필터 조합(입양 가능 + 크기 + 성별)이 연속된 행 구간으로 대응되므로
+    필터링된 행렬 복사본 없이 view에 대해 바로 유사도를 계산할 수 있다.
+    """
+
+    SIZE_VALUES = (-1, 0, 1, 2)
+    GENDER_VALUES = (-1, 0, 1)
+
+    def __init__(self, features):
+        self.features = features
+        self.keys = self.partition_keys(features)
+        if len(self.keys) > 1 and np.any(self.keys[1:] < self.keys[:-1]):
+            raise ValueError("행렬이 파티션 순서로 정렬되어 있지 않습니다. partition_order로 먼저 정렬하세요.")
+
+    @staticmethod
+    def partition_keys(features) -> np.ndarray:
+        """(입양 불가 여부, 크기, 성별) 조합을 정렬 가능한 정수 키로 변환"""
+        unavailable = (~features.available).astype(np.int16)
+        return unavailable * 100 + (features.size.astype(np.int16) + 1) * 10 + (features.gender.astype(np.int16) + 1)
+
+    @classmethod
+    def partition_order(cls, features) -> np.ndarray:
+        """파티션 정렬 순서 (같은 키 안에서는 기존 순서 유지)"""
+        return np.argsort(cls.partition_keys(features), kind='stable')
+
+    def candidate_ranges(self, available_only=True, size=None, gender=None):
+        """조건에 맞는 연속 행 구간 목록 [(start, stop), ...]"""
+        availability = (0,) if available_only else (0, 1)
+        sizes = (size,) if size is not None else self.SIZE_VALUES
+        genders = (gender,) if gender is not None else self.GENDER_VALUES
+
+        ranges = []
+        for a in availability:
+            for s in sizes:
+                for g in genders:
+                    key = a * 100 + (s + 1) * 10 + (g + 1)
+                    start = int(np.searchsorted(self.keys, key, side='left'))
+                    stop = int(np.searchsorted(self.keys, key, side='right'))
+                    if stop <= start:
+                        continue
+                    # 이어지는 구간은 하나로 합침
+                    if ranges and ranges[-1][1] == start:
+                        ranges[-1] = (ranges[-1][0], stop)
+                    else:
+                        ranges.append((start, stop))
+        return ranges
+
+    @staticmethod
+    def search(matrix, query, top_k, ranges, residual_mask=None):
+        """구간별 view에서 내적 후 상위 k개 병합
+
+        Args:
+            residual_mask: (start, stop) → 구간 내 boolean 마스크를 돌려주는 함수 (나이 등 정렬 키에 없는 조건)
+
+        Returns:
+            (전체 행 기준 상위 인덱스, 유사도, 조건을 만족한 후보 수)
+        """
+        best_indices = []
+        best_scores = []
+        candidates = 0
+
+        for start, stop in ranges:
+            scores = matrix[start:stop] @ query
+            if residual_mask is not None:
+                keep = residual_mask(start, stop)
+                candidates += int(keep.sum())
+                scores[~keep] = -np.inf
+            else:
+                candidates += stop - start
+
+            local = top_k_indices(scores, top_k)
+            local = local[np.isfinite(scores[local])]
+            best_indices.append(local + start)
+            best_scores.append(scores[local])
+
+        if not best_indices:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32), 0
+
+        indices = np.concatenate(best_indices)
+        scores = np.concatenate(best_scores)
+        order = top_k_indices(scores, top_k)
+        return indices[order], scores[order], candidates
+
+    @staticmethod
+    def search_many(matrix, queries, top_k, ranges, residual_mask=None, block_size: int = 4096):
+        """여러 쿼리를 행 블록 단위 행렬-행렬 곱으로 한 번에 검색 (같은 필터 조건의 쿼리 묶음용)
+        
+        행렬을 block_size행씩 한 번만 읽고, 블록마다 (블록 행 수 x 쿼리 수) 점수만 만든 뒤
+        쿼리별 상위 k개를 누적한다. 추가 메모리는 block_size x 쿼리 수로 제한된다.
+        
+        Returns:
+            ([(상위 인덱스, 유사도), ...] 쿼리 순서대로, 조건을 만족한 후보 수)
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        num_queries = len(queries)
+        best_indices = np.empty((0, num_queries), dtype=np.int64)
+        best_scores = np.empty((0, num_queries), dtype=np.float32)
+        candidates = 0
+        
+        for start, stop in ranges:
+            keep = residual_mask(start, stop) if residual_mask is not None else None
+            candidates += int(keep.sum()) if keep is not None else stop - start
+            
+            for block_start in range(start, stop, block_size):
+                block_stop = min(block_start + block_size, stop)
+                scores = np.asarray(matrix[block_start:block_stop], dtype=np.float32) @ queries.T
+                if keep is not None:
+                    scores[~keep[block_start - start:block_stop - start]] = -np.inf
+                
+                rows = np.broadcast_to(np.arange(block_start, block_stop)[:, None], scores.shape)
+                merged_scores = np.vstack([best_scores, scores])
+                merged_indices = np.vstack([best_indices, rows])
+                if len(merged_scores) > top_k:
+                    keep_rows = np.argpartition(merged_scores, -top_k, axis=0)[-top_k:]
+                    merged_scores = np.take_along_axis(merged_scores, keep_rows, axis=0)
+                    merged_indices = np.take_along_axis(merged_indices, keep_rows, axis=0)
+                best_scores, best_indices = merged_scores, merged_indices
+        
+        results = []
+        order = np.argsort(-best_scores, axis=0, kind='stable')
+        for j in range(num_queries):
+            scores = best_scores[order[:, j], j]
+            indices = best_indices[order[:, j], j]
+            finite = np.isfinite(scores)
+            results.append((indices[finite], scores[finite]))
+        return results, candidates
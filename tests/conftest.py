@@ -0,0 +1,10 @@
+"""
+pytest 공통 설정
+animal_recommandation_system의 모듈은 패키지가 아니라 같은 폴더에서 모듈 이름으로 import하므로 경로에 추가한다.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'animal_recommandation_system'))
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from adopter_matching import (SURVEY_COLUMNS, ReverseMatcher, build_profiles, derive_preferences,
+                              parse_period_months, parse_region)
+from animal_features import AnimalFeatures, parse_foster_regions, parse_min_period, REGION_BITS
+from vector_index import normalize_rows
+
+
+def test_parse_region_uses_first_place_name():
+    assert parse_region('서울시 강서구 화곡동') == '서울'
+    assert parse_region('수원시 영통구 매탄동') == '경기'
+    assert parse_region('경기도 광주시 오포읍') == '경기'
+    assert parse_region('부산시 남구 대연동') == '경상'
+    assert parse_region('미국, 뉴욕') is None
+
+
+def test_derive_preferences_maps_structured_answers():
+    preferences = derive_preferences('소형견 희망합니다', '인천시 연수구 송도동', parse_period_months('3-6개월'))
+    assert preferences == {'size': '소형', 'age': None, 'gender': None, 'region': '경기', 'period': 6.0}
+
+
+def test_parse_foster_conditions():
+    assert parse_foster_regions('전국') == sum(REGION_BITS.values())
+    assert parse_foster_regions('서울,경기') == REGION_BITS['서울'] | REGION_BITS['경기']
+    assert parse_foster_regions(None) == 0
+    assert [parse_min_period(v) for v in ('3 개월 이상', '1년', '2 개월 이하', None)] == [3, 12, 0, -1]
+
+
+def test_region_and_period_are_hard_filters():
+    animals = pd.DataFrame({
+        'state': '임보가능',
+        'addinfo12': ['서울,경기', '경상도', '전국', None],
+        'addinfo13sub02': ['3 개월 이상', '1 개월', '12 개월 이상', None],
+    })
+    features = AnimalFeatures.from_dataframe(animals)
+
+    # 지역/기간을 모르는 동물(3번)은 제외하지 않음
+    assert np.flatnonzero(features.hard_filter_mask({'region': '서울'})).tolist() == [0, 2, 3]
+    assert np.flatnonzero(features.hard_filter_mask({'period': 3.0})).tolist() == [0, 1, 3]
+    assert np.flatnonzero(features.hard_filter_mask({'region': '경기', 'period': 3.0})).tolist() == [0, 3]
+    assert features.residual_mask_at({'region': '경상'}, np.array([1, 0])).tolist() == [True, False]
+
+
+def make_survey(rows):
+    survey = pd.DataFrame([{column: '' for column in SURVEY_COLUMNS.values()} for _ in rows])
+    for i, row in enumerate(rows):
+        for column, value in row.items():
+            survey.loc[i, column] = value
+    return survey
+
+
+def test_adopter_ids_do_not_depend_on_row_order():
+    rows = [{'submitted_at': f'2024. 1. {day}', 'name': name, 'status': '상담중', 'species': '개'}
+            for day, name in ((1, '가'), (2, '나'), (3, '다'))]
+    ids = {profile.name: profile.adopter_id for profile in build_profiles(make_survey(rows))}
+    reordered = {profile.name: profile.adopter_id for profile in build_profiles(make_survey(rows[::-1]))}
+    assert ids == reordered and len(set(ids.values())) == 3
+
+
+class StubProcessor:
+    """ReverseMatcher가 쓰는 GPTEmbeddingProcessor 속성만 가진 대역"""
+    model = 'test-model'
+
+    def __init__(self, n_animals=12, dim=8):
+        rng = np.random.default_rng(0)
+        self.processed_df = pd.DataFrame({'uid': [f'a{i}' for i in range(n_animals)], 'state': '임보가능'})
+        self.features = AnimalFeatures.from_dataframe(self.processed_df)
+        self.normalized_embeddings = normalize_rows(rng.standard_normal((n_animals, dim)).astype(np.float32))
+        self.dim = dim
+
+    def embed_queries(self, queries):
+        return [np.random.default_rng(len(query)).standard_normal(self.dim) for query in queries]
+
+
+@pytest.fixture
+def survey_rows():
+    return [{'submitted_at': f'2024. 2. {i + 1}', 'name': f'신청자{i}', 'status': '상담중', 'species': '개',
+             'notes': '사람 좋아하는 아이' + '!' * i} for i in range(4)]
+
+
+def test_reverse_matcher_drops_withdrawn_adopters(tmp_path, survey_rows):
+    processor = StubProcessor()
+    matcher = ReverseMatcher(str(tmp_path), top_n=4)
+    profiles = build_profiles(make_survey(survey_rows))
+    matcher.add_adopters(processor, profiles)
+    matcher.rebuild_table(processor)
+
+    withdrawn = profiles[0].adopter_id
+    survey_rows[0]['status'] = '신청포기'
+    matcher.add_adopters(processor, build_profiles(make_survey(survey_rows)))
+
+    adopter_ids = {adopter_id for (adopter_id,) in matcher.conn.execute("SELECT adopter_id FROM best_adopters")}
+    ranks = matcher.conn.execute("SELECT animal_uid, COUNT(*) FROM best_adopters GROUP BY animal_uid").fetchall()
+    assert withdrawn not in adopter_ids and withdrawn not in matcher.adopter_ids
+    # 철회한 신청자가 빠진 동물도 남은 신청자 3명으로 다시 채워짐
+    assert len(ranks) == len(processor.processed_df) and all(count == 3 for _, count in ranks)
+    matcher.close()
+
+
+def test_reverse_matcher_rebuilds_adopters_whose_answers_changed(tmp_path, survey_rows):
+    processor = StubProcessor()
+    matcher = ReverseMatcher(str(tmp_path), top_n=4)
+    matcher.add_adopters(processor, build_profiles(make_survey(survey_rows)))
+
+    survey_rows[1]['region'] = '부산시 남구'
+    assert matcher.add_adopters(processor, build_profiles(make_survey(survey_rows))) == 1
+    assert sorted(matcher.adopters['foster_region']) == ['', '', '', '경상']
+    matcher.close()
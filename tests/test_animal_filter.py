@@ -0,0 +1,271 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from animal_filter import AnimalFilter, TagBitsetIndex
+from benchmark import make_synthetic_animals
+
+
+@pytest.fixture(scope='module')
+def animals():
+    return make_synthetic_animals(2000, seed=3)
+
+
+def baseline_has_tag(hashtags, required_tags):
+    """변경 전 _filter_by_hashtags의 행 단위 판정 (포함 관계, OR 조건)"""
+    return bool(hashtags) and any(tag in animal_tag or animal_tag in tag
+                                  for tag in required_tags for animal_tag in hashtags)
+
+
+@pytest.mark.parametrize('required_tags', [['애교'], ['분리불안', '조용함'], ['사람좋아해요'], ['없는태그']])
+def test_tag_bitsets_match_row_substring_semantics(animals, required_tags):
+    index = TagBitsetIndex(animals['hashtags'])
+    expected = [baseline_has_tag(tags, required_tags) for tags in animals['hashtags']]
+    assert index.any_mask(required_tags).tolist() == expected
+
+    positions = np.arange(0, len(animals), 7)
+    assert index.any_mask(required_tags, positions).tolist() == [expected[p] for p in positions]
+
+
+def test_tag_match_counts_count_each_requested_trait(animals):
+    index = TagBitsetIndex(animals['hashtags'])
+    traits = ['애교', '사람', '애교']
+    expected = [sum(baseline_has_tag(tags, [trait]) for trait in traits) for tags in animals['hashtags']]
+    assert index.match_counts(traits).tolist() == expected
+
+
+def test_tag_query_caches_are_bounded(animals):
+    index = TagBitsetIndex(animals['hashtags'], cache_size=2)
+    for tag in ('애교', '산책', '조용', '활발'):
+        index.tag_bits(tag)
+    assert list(index._related) == ['조용', '활발']
+    assert list(index._query_bits) == ['조용', '활발']
+
+
+SOFT_PREFERENCES = {
+    'region': ['서울', '경기'],
+    'age_preference': {'preferred': {'min': 2, 'max': 5}, 'acceptable': {'min': 1, 'max': 8}},
+    'size_preference': {'preferred': {'min': 3, 'max': 10}, 'acceptable': {'min': 1, 'max': 15}},
+    'personality_traits': ['애교', '조용함'],
+    'behavior_preferences': {'affection': {'ideal': 5, 'acceptable': [4]}, 'barking': {'ideal': 1}},
+    'weights': {'region': 2, 'personality': 1.5},
+}
+
+
+def test_match_scores_equal_row_by_row_scores(animals):
+    animal_filter = AnimalFilter(animals)
+    reference = AnimalFilter(animals)
+    reference.tag_index = None   # 행 단위 부분 문자열 비교 경로
+
+    positions = np.arange(len(animals))
+    expected = [reference._calculate_match_score(row, SOFT_PREFERENCES) for _, row in animals.iterrows()]
+    np.testing.assert_allclose(animal_filter.match_scores(positions, SOFT_PREFERENCES), expected)
+
+
+def baseline_filter(animals, criteria):
+    """변경 전 apply_filters의 pandas 단계별 필터 (지역/성별/임보 종류/나이/몸무게/중성화/해시태그)"""
+    results = animals[animals['status'] == '임보가능']
+    if criteria.get('region'):
+        nationwide = results['care_conditions'].apply(lambda c: isinstance(c, dict) and c.get('region') == '전국')
+        results = results[results['rescue_location'].isin(criteria['region']) | nationwide]
+    for name in ('gender', 'care_type'):
+        if criteria.get(name):
+            results = results[results[name].isin(criteria[name])]
+    for name, column in (('age_range', 'age'), ('weight_range', 'weight')):
+        if criteria.get(name):
+            low, high = criteria[name].get('min', 0), criteria[name].get('max', 100)
+            results = results[(results[column] >= low) & (results[column] <= high) & results[column].notna()]
+    if criteria.get('neutered') is not None:
+        results = results[results['neutered'] == criteria['neutered']]
+    if criteria.get('hashtags'):
+        results = results[results['hashtags'].apply(lambda tags: baseline_has_tag(tags, criteria['hashtags']))]
+    return results
+
+
+@pytest.mark.parametrize('criteria', [
+    {},
+    {'region': ['서울', '부산'], 'gender': ['female']},
+    {'age_range': {'min': 2, 'max': 6}, 'weight_range': {'max': 12}, 'neutered': False},
+    {'care_type': ['단기임보'], 'hashtags': ['애교', '산책'], 'neutered': True, 'region': ['경기']},
+    {'hashtags': ['없는태그'], 'gender': None, 'region': []},
+])
+def test_filter_plan_matches_stepwise_baseline(animals, criteria):
+    results = AnimalFilter(animals).apply_filters(criteria)
+    assert results['id'].tolist() == baseline_filter(animals, criteria)['id'].tolist()
+
+
+def test_filter_cache_is_reset_when_animals_change(animals):
+    criteria = {'region': ['서울'], 'neutered': True}
+    animal_filter = AnimalFilter(animals, cache_size=4)
+    first = animal_filter.apply_filters(criteria)
+    assert animal_filter.apply_filters(dict(reversed(list(criteria.items()))))['id'].tolist() == first['id'].tolist()
+    assert len(animal_filter._filter_cache) == 1
+
+    others = make_synthetic_animals(500, seed=4)
+    animal_filter.set_animals(others)
+    assert len(animal_filter._filter_cache) == 0
+    assert animal_filter.apply_filters(criteria)['id'].tolist() == baseline_filter(others, criteria)['id'].tolist()
+
+
+def test_filter_cache_is_bounded_and_results_are_per_thread(animals):
+    animal_filter = AnimalFilter(animals, cache_size=2)
+    for region in ('서울', '경기', '부산'):
+        animal_filter.apply_filters({'region': [region]})
+    assert len(animal_filter._filter_cache) == 2
+
+    mine = animal_filter.apply_filters({'gender': ['male']})
+    seen = []
+    other = threading.Thread(target=lambda: seen.append(animal_filter.get_results()))
+    other.start()
+    other.join()
+
+    assert seen[0].empty
+    assert animal_filter.get_results()['id'].tolist() == mine['id'].tolist()
+
+
+def make_dict_column_animals(rows=600, seed=5):
+    """dict 컬럼이 없거나(None/NaN) 비었거나 키가 빠진 행을 섞은 동물 데이터"""
+    rng = np.random.default_rng(seed)
+
+    def pick(*choices):
+        return choices[rng.integers(len(choices))]
+
+    def behavior_traits():
+        kind = pick('none', 'nan', 'empty', 'full')
+        if kind != 'full':
+            return {'none': None, 'nan': np.nan, 'empty': {}}[kind]
+        traits = {name: int(rng.integers(1, 6)) for name in ('affection', 'human_friendly', 'barking')
+                  if rng.random() < 0.7}
+        if rng.random() < 0.2:
+            traits['barking'] = None
+        return traits
+
+    def health_info():
+        kind = pick('none', 'empty', 'full', 'full')
+        if kind != 'full':
+            return {'none': None, 'empty': {}}[kind]
+        return {
+            'vaccination': pick([], ['종합'], ['종합', '광견병'], ['종합', '광견병', '코로나'], None),
+            'medical_history': pick('', None, '슬개골 탈구', 'Heartworm 치료 완료', '피부염'),
+        }
+
+    def care_conditions():
+        kind = pick('none', 'empty', 'full', 'full', 'full')
+        if kind != 'full':
+            return {'none': None, 'empty': {}}[kind]
+        conditions = {'region': pick('전국', '', '서울')}
+        if rng.random() < 0.8:
+            conditions['duration'] = pick(0, None, 3, 6, 12)
+        if rng.random() < 0.8:
+            conditions['pickup'] = pick('', None, '직접 픽업', '배송 가능', ['직접'], ['배송', '직접'], [])
+        if rng.random() < 0.8:
+            conditions['suitable_homes'] = pick([], ['아파트'], ['주택', '1인가구'], ['아파트 1층'], None)
+        if rng.random() < 0.8:
+            conditions['additional_conditions'] = pick(None, '', '고양이 없는 집', '산책 하루 2회', 'NO CATS')
+        return conditions
+
+    return pd.DataFrame({
+        'id': np.arange(rows).astype(str),
+        'status': rng.choice(['임보가능', '입양완료'], rows, p=[0.8, 0.2]),
+        'behavior_traits': [behavior_traits() for _ in range(rows)],
+        'health_info': [health_info() for _ in range(rows)],
+        'care_conditions': [care_conditions() for _ in range(rows)],
+    })
+
+
+def baseline_suitable_homes(care_conditions, home_types):
+    """변경 전 _filter_by_suitable_homes의 행 단위 판정"""
+    if not isinstance(care_conditions, dict) or not care_conditions.get('suitable_homes'):
+        return False
+    return any(home_type in home or home in home_type
+               for home_type in home_types for home in care_conditions['suitable_homes'])
+
+
+def baseline_behavior_traits(behavior_traits, requirements):
+    """변경 전 _filter_by_behavior_traits의 행 단위 판정"""
+    if not isinstance(behavior_traits, dict):
+        return False
+    for trait_name, requirement in requirements.items():
+        value = behavior_traits.get(trait_name)
+        if value is None:
+            continue
+        if 'min' in requirement and value < requirement['min']:
+            return False
+        if 'max' in requirement and value > requirement['max']:
+            return False
+        if 'exact' in requirement and value != requirement['exact']:
+            return False
+    return True
+
+
+def baseline_health(health_info, requirements):
+    """변경 전 _filter_by_health_requirements의 행 단위 판정"""
+    if not isinstance(health_info, dict):
+        return False
+    if 'min_vaccinations' in requirements and health_info.get('vaccination'):
+        if len(health_info['vaccination']) < requirements['min_vaccinations']:
+            return False
+    if requirements.get('no_medical_history', False) and health_info.get('medical_history'):
+        return False
+    if 'exclude_conditions' in requirements and health_info.get('medical_history'):
+        history = str(health_info['medical_history']).lower()
+        if any(condition.lower() in history for condition in requirements['exclude_conditions']):
+            return False
+    return True
+
+
+def baseline_care_preferences(care_conditions, preferences):
+    """변경 전 _filter_by_care_preferences의 행 단위 판정"""
+    if not isinstance(care_conditions, dict):
+        return False
+    if 'max_duration' in preferences and care_conditions.get('duration'):
+        if care_conditions['duration'] > preferences['max_duration']:
+            return False
+    if 'pickup_method' in preferences and care_conditions.get('pickup'):
+        if preferences['pickup_method'] not in care_conditions['pickup']:
+            return False
+    if 'exclude_conditions' in preferences and care_conditions.get('additional_conditions'):
+        text = str(care_conditions['additional_conditions']).lower()
+        if any(condition.lower() in text for condition in preferences['exclude_conditions']):
+            return False
+    return True
+
+
+def baseline_dict_filter(animals, criteria):
+    """변경 전 apply_filters의 dict 컬럼 조건 (적합 가정/행동 특성/건강/임보 조건)"""
+    results = animals[animals['status'] == '임보가능']
+    checks = (
+        ('suitable_homes', 'care_conditions', baseline_suitable_homes),
+        ('behavior_traits', 'behavior_traits', baseline_behavior_traits),
+        ('health_requirements', 'health_info', baseline_health),
+        ('care_preferences', 'care_conditions', baseline_care_preferences),
+    )
+    for name, column, check in checks:
+        if criteria.get(name):
+            results = results[[check(value, criteria[name]) for value in results[column]]]
+    return results
+
+
+@pytest.mark.parametrize('criteria', [
+    {'suitable_homes': ['아파트']},
+    {'suitable_homes': ['1인가구', '주택 2층']},
+    {'behavior_traits': {'affection': {'min': 3}, 'barking': {'max': 2}}},
+    {'behavior_traits': {'human_friendly': {'exact': 5}}},
+    {'behavior_traits': {'unknown_trait': {'min': 1}}},
+    {'health_requirements': {'min_vaccinations': 2}},
+    {'health_requirements': {'no_medical_history': True}},
+    {'health_requirements': {'exclude_conditions': ['탈구', 'HEARTWORM']}},
+    {'care_preferences': {'max_duration': 6}},
+    {'care_preferences': {'pickup_method': '직접'}},
+    {'care_preferences': {'exclude_conditions': ['고양이', 'cats']}},
+    {'suitable_homes': ['아파트'], 'behavior_traits': {'affection': {'min': 2}},
+     'health_requirements': {'min_vaccinations': 1, 'no_medical_history': True},
+     'care_preferences': {'max_duration': 12, 'pickup_method': '배송'}},
+])
+def test_dict_column_filters_match_row_by_row_baseline(criteria):
+    animals = make_dict_column_animals()
+    expected = baseline_dict_filter(animals, criteria)['id'].tolist()
+    assert AnimalFilter(animals).apply_filters(criteria)['id'].tolist() == expected
+    assert AnimalFilter(animals, cache_size=0).apply_filters(criteria)['id'].tolist() == expected
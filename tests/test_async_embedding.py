@@ -0,0 +1,56 @@
+from async_embedding import AsyncEmbeddingEngine, FakeEmbeddingBackend
+
+
+class RateLimitError(Exception):
+    """openai.RateLimitError와 같은 이름 (is_retryable_error는 타입 이름으로 판별)"""
+
+
+class RateLimitedBackend(FakeEmbeddingBackend):
+    async def embed(self, texts, model, dimensions=None):
+        self.requests += 1
+        raise RateLimitError("rate limited")
+
+
+def make_engine(backend, max_retries=2):
+    return AsyncEmbeddingEngine(model='fake', backend=backend, embedding_dim=8, max_retries=max_retries,
+                                batch_size=4, rpm_limit=100000, tpm_limit=10000000)
+
+
+def test_exhausted_retryable_error_fails_whole_batch_without_bisecting(monkeypatch):
+    import async_embedding
+
+    async def no_sleep(seconds):
+        pass
+    monkeypatch.setattr(async_embedding.asyncio, 'sleep', no_sleep)
+
+    backend = RateLimitedBackend(dimensions=8, latency=0)
+    engine = make_engine(backend)
+    texts = [f'동물 {i}' for i in range(4)]
+
+    _, failed = engine.embed(texts)
+    assert failed == [0, 1, 2, 3]
+    assert engine.stats['bisections'] == 0
+    assert backend.requests == 2   # 한 배치의 재시도만큼
+
+
+def test_rejected_input_is_isolated_by_bisection():
+    texts = [f'동물 {i}' for i in range(4)]
+    backend = FakeEmbeddingBackend(dimensions=8, latency=0, bad_inputs=[texts[2]])
+    engine = make_engine(backend)
+
+    vectors, failed = engine.embed(texts)
+    assert failed == [2]
+    assert engine.stats['bisections'] > 0
+    assert vectors[[0, 1, 3]].any(axis=1).all()
+
+
+def test_permanent_error_classification():
+    from async_embedding import is_permanent_error
+
+    class BadRequestError(Exception):
+        status_code = 400
+
+    assert is_permanent_error(BadRequestError("input too long"))
+    assert is_permanent_error("BadRequestError: Error code: 400")
+    assert not is_permanent_error(RateLimitError("rate limited"))
+    assert not is_permanent_error("RateLimitError: rate limited")
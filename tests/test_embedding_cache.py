@@ -0,0 +1,62 @@
+import numpy as np
+
+import embedding_cache
+from embedding_cache import EmbeddingCache, QueryEmbeddingCache
+
+
+def test_embedding_cache_evicts_least_recently_used():
+    cache = EmbeddingCache(max_entries=2)
+    cache.put('m', 4, 'a', np.ones(4))
+    cache.put('m', 4, 'b', np.ones(4) * 2)
+    assert cache.get('m', 4, 'a') is not None   # a를 최근 사용으로 갱신
+    cache.put('m', 4, 'c', np.ones(4) * 3)
+
+    assert cache.get('m', 4, 'b') is None
+    assert cache.get('m', 4, 'a') is not None
+    assert cache.evictions == 1
+
+
+def test_embedding_cache_key_includes_model_and_dimensions():
+    cache = EmbeddingCache()
+    cache.put('m', 4, 'a', np.ones(4))
+
+    assert cache.get('m', 8, 'a') is None
+    assert cache.get('other', 4, 'a') is None
+
+
+def test_embedding_cache_round_trip(tmp_path):
+    path = str(tmp_path / 'cache.pkl')
+    cache = EmbeddingCache(path)
+    found, missing = cache.lookup_many('m', 4, ['a', 'b'])
+    assert (found, missing) == ({}, [0, 1])
+
+    cache.put('m', 4, 'a', np.arange(4))
+    cache.save()
+
+    found, missing = EmbeddingCache(path).lookup_many('m', 4, ['a', 'b'])
+    assert missing == [1]
+    np.testing.assert_array_equal(found[0], np.arange(4, dtype=np.float32))
+
+
+def test_query_cache_expires_entries_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(embedding_cache.time, 'time', lambda: now[0])
+    cache = QueryEmbeddingCache(ttl_seconds=60, autosave_every=0)
+    cache.put('m', 4, '산책 좋아하는 아이', np.ones(4))
+
+    now[0] += 59
+    assert cache.get('m', 4, '산책 좋아하는 아이') is not None
+    now[0] += 2
+    assert cache.get('m', 4, '산책 좋아하는 아이') is None
+    assert cache.expirations == 1 and len(cache) == 0
+
+
+def test_query_cache_is_bounded_lru():
+    cache = QueryEmbeddingCache(max_entries=2, ttl_seconds=None, autosave_every=0)
+    for query in ('a', 'b'):
+        cache.put('m', 4, query, np.ones(4))
+    cache.get('m', 4, 'a')
+    cache.put('m', 4, 'c', np.ones(4))
+
+    assert ('m', 4, 'b') not in cache
+    assert ('m', 4, 'a') in cache and ('m', 4, 'c') in cache
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from animal_features import AnimalFeatures
+from animal_filter import AnimalFilter
+from benchmark import make_synthetic_animals
+from fused_scoring import FusedScorer, MatchPreferences, filter_frame_from_processed
+from vector_index import normalize_rows
+
+
+@pytest.fixture(scope='module')
+def animals():
+    return make_synthetic_animals(1000, seed=5)
+
+
+def test_soft_only_scores_follow_apply_soft_filtering(animals):
+    soft = {'region': ['서울'], 'personality_traits': ['애교', '산책']}
+    expected = AnimalFilter(animals).apply_soft_filtering(soft, threshold=0.3)
+
+    fused = FusedScorer(AnimalFilter(animals)).score(MatchPreferences(soft=soft, min_match_score=0.3),
+                                                     top_k=len(animals))
+    assert fused.candidate_count == len(expected)
+    np.testing.assert_allclose(fused.scores, np.sort(expected['match_score'].to_numpy())[::-1])
+    assert fused.similarities is None
+
+
+def test_hard_filters_and_similarity_use_the_same_rows(animals):
+    embeddings = normalize_rows(np.random.default_rng(0).standard_normal((len(animals), 16)).astype(np.float32))
+    scorer = FusedScorer(AnimalFilter(animals), embeddings)
+    hard = {'neutered': True, 'weight_range': {'max': 15}}
+
+    fused = scorer.score(MatchPreferences(hard_filters=hard), embeddings[0], top_k=5)
+    allowed = set(AnimalFilter(animals).apply_filters(hard).index)
+    assert set(fused.rows) <= allowed and fused.candidate_count == len(allowed)
+    np.testing.assert_allclose(fused.similarities, embeddings[fused.rows] @ embeddings[0], rtol=1e-6)
+
+    # 점수가 없으면 행 순서 그대로
+    assert scorer.score(MatchPreferences(hard_filters=hard), top_k=3).rows.tolist() == sorted(allowed)[:3]
+
+
+def test_processed_frame_is_mapped_to_filter_columns():
+    processed = pd.DataFrame({
+        'uid': [10, 11, 12],
+        'state': ['임보가능', '임보가능', '입양완료'],
+        'addinfo02': ['서울', '부산', '서울'],
+        'addinfo03': ['남', '여', '남'],
+        'addinfo04': ['중성화 완료', '중성화 전', '미정'],
+        'addinfo05': ['2020', '2023', ''],
+        'addinfo07': [4.5, 12, None],
+        'addinfo08': ['#애교쟁이#산책좋아', '# 조용함, # 순둥이', None],
+    })
+    frame = filter_frame_from_processed(processed, AnimalFeatures.from_dataframe(processed))
+    assert frame['gender'].tolist() == ['male', 'female', 'male']
+    assert frame['neutered'].tolist() == [True, False, None]
+    assert frame['hashtags'].tolist() == [['애교쟁이', '산책좋아'], ['조용함', '순둥이'], []]
+
+    scorer = FusedScorer(AnimalFilter(frame), features=AnimalFeatures.from_dataframe(processed))
+    fused = scorer.score(MatchPreferences(hard_filters={'region': ['서울']}, soft={'personality_traits': ['애교']}))
+    assert fused.rows.tolist() == [0]
+
+
+def test_missing_columns_raise_instead_of_matching_nothing(animals):
+    frame = animals.drop(columns=['behavior_traits'])
+    scorer = FusedScorer(AnimalFilter(frame))
+    with pytest.raises(ValueError, match='behavior_traits'):
+        scorer.score(MatchPreferences(hard_filters={'behavior_traits': {'affection': {'min': 3}}}))
+    with pytest.raises(ValueError, match='행 수'):
+        FusedScorer(AnimalFilter(animals), np.zeros((3, 4)))
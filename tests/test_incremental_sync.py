@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from embedding_processor import GPTEmbeddingProcessor
+
+
+def make_rows(descriptions, state='임보가능'):
+    return pd.DataFrame({
+        'uid': list(range(len(descriptions))),
+        'state': state,
+        'addinfo01': [f'멍멍{i}' for i in range(len(descriptions))],
+        'addinfo03': '남',
+        'addinfo05': '2020',
+        'addinfo07': '5',
+        'addinfo10': descriptions,
+    })
+
+
+@pytest.fixture
+def processor():
+    processor = GPTEmbeddingProcessor(api_key='sk-test')
+    stored = make_rows(['순함', '활발함', '겁많음'])
+    stored['embedding_text'] = [processor.create_embedding_text(row) for _, row in stored.iterrows()]
+    processor.processed_df = stored
+    processor.embeddings = np.zeros((len(stored), 4), dtype=np.float32)
+    processor._refresh_index()
+    return processor
+
+
+def test_changed_rows_skips_unchanged_animals(processor):
+    assert processor.changed_rows(make_rows(['순함', '활발함', '겁많음'])).empty
+
+
+def test_changed_rows_detects_edits_to_older_rows_and_new_animals(processor):
+    current = make_rows(['순함', '사람을 좋아함', '겁많음', '조용함'])
+    assert processor.changed_rows(current)['uid'].tolist() == [1, 3]
+
+
+def test_changed_rows_detects_state_change(processor):
+    assert processor.changed_rows(make_rows(['순함', '활발함', '겁많음'], state='입양완료'))['uid'].tolist() == [0, 1, 2]
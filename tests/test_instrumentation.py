@@ -0,0 +1,60 @@
+import json
+
+from config import Config
+from instrumentation import Instrumentation, JsonlSink, build_sinks
+
+
+def test_span_and_counter_land_in_current_trace():
+    instrumentation = Instrumentation()
+    with instrumentation.trace('recommendation') as trace:
+        with instrumentation.span('query_embedding'):
+            pass
+        instrumentation.increment('candidates', 3)
+        instrumentation.increment('candidates', 2)
+
+    assert trace.counters == {'candidates': 5}
+    assert 'query_embedding' in trace.spans
+    assert trace.total_ms is not None
+    assert instrumentation.counters['candidates'] == 5
+    assert instrumentation.traces == 1
+
+
+def test_nested_trace_reuses_outer_trace():
+    instrumentation = Instrumentation()
+    with instrumentation.trace('outer') as outer:
+        with instrumentation.trace('inner') as inner:
+            instrumentation.increment('hits')
+
+    assert inner is outer
+    assert outer.counters == {'hits': 1}
+    assert instrumentation.traces == 1
+
+
+def test_disabled_instrumentation_records_nothing():
+    instrumentation = Instrumentation(enabled=False)
+    with instrumentation.trace('recommendation') as trace:
+        with instrumentation.span('filter'):
+            instrumentation.increment('candidates')
+
+    assert trace is None
+    assert not instrumentation.counters
+    assert not instrumentation.summary()
+
+
+def test_default_config_builds_no_sinks():
+    assert Config.INSTRUMENTATION_SINKS == ()
+    assert build_sinks(Config.INSTRUMENTATION_SINKS) == []
+
+
+def test_jsonl_sink_writes_one_line_per_trace(tmp_path):
+    path = tmp_path / 'metrics.jsonl'
+    instrumentation = Instrumentation(sinks=build_sinks(['jsonl'], str(path)))
+    assert isinstance(instrumentation.sinks[0], JsonlSink)
+
+    for _ in range(2):
+        with instrumentation.trace('recommendation'):
+            instrumentation.increment('candidates', 7)
+
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[0])['counters'] == {'candidates': 7}
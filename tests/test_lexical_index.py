@@ -0,0 +1,28 @@
+import numpy as np
+
+from lexical_index import HashtagIndex, hashtag_query_terms
+
+
+def test_hashtag_query_terms_prefers_explicit_tags():
+    assert hashtag_query_terms('#산책좋아 조용한 아이') == ['산책좋아']
+    assert hashtag_query_terms('산책 좋아하는 조용한 아이') == ['산책', '좋아하는', '조용한', '아이']
+
+
+def test_hashtag_index_matches_stems_and_substrings():
+    index = HashtagIndex.build(['#애교쟁이#산책좋아', '#조용함', '#활발#애교', ''])
+    totals = index.totals('애교 많은 아이')
+    assert np.flatnonzero(totals).tolist() == [0, 2]
+    assert np.flatnonzero(index.totals('#조용함')).tolist() == [1]
+
+
+def test_hashtag_term_cache_is_bounded_lru():
+    index = HashtagIndex.build(['#애교쟁이', '#조용함', '#활발'])
+    index.cache_size = 2
+    for term in ('애교', '조용', '애교', '활발'):
+        index.term_postings(term)
+    assert list(index._term_postings) == ['애교', '활발']
+
+    uncached = HashtagIndex.build(['#애교쟁이'])
+    uncached.cache_size = 0
+    uncached.term_postings('애교')
+    assert len(uncached._term_postings) == 0
@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+
+import openai
+
+from embedding_processor import GPTEmbeddingProcessor
+
+
+class RequestTimedOut(openai.APITimeoutError):
+    """요청 객체 없이 만드는 타임아웃 예외"""
+
+    def __init__(self):
+        Exception.__init__(self, 'Request timed out.')
+
+
+class RateLimited(openai.RateLimitError):
+    """응답 객체 없이 만드는 429 예외"""
+
+    def __init__(self):
+        Exception.__init__(self, 'Rate limit reached.')
+
+
+class StubEmbeddings:
+    def __init__(self, *errors):
+        self.errors = list(errors)   # 호출마다 앞에서부터 하나씩 발생 (다 쓰면 성공)
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.errors:
+            raise self.errors.pop(0)
+        return SimpleNamespace(data=[SimpleNamespace(embedding=[0.1, 0.2])])
+
+
+def processor_with(embeddings):
+    processor = GPTEmbeddingProcessor(api_key='sk-test')
+    processor._query_client = SimpleNamespace(embeddings=embeddings)
+    return processor
+
+
+def test_deadline_is_passed_as_request_timeout():
+    embeddings = StubEmbeddings()
+    processor = processor_with(embeddings)
+    assert processor._get_query_embedding('산책 좋아하는 아이', deadline=0.5, verbose=False) == [0.1, 0.2]
+    assert len(embeddings.calls) == 1 and 0 < embeddings.calls[0]['timeout'] <= 0.5
+
+
+def test_timed_out_query_is_counted_in_the_request_trace():
+    processor = processor_with(StubEmbeddings(RequestTimedOut()))
+
+    with processor.instrumentation.trace('find_similar_animals') as trace:
+        assert processor._get_query_embedding('조용한 아이', deadline=0.5, verbose=False) is None
+    assert trace.counters == {'embedding_deadline_exceeded': 1}
+    assert processor.instrumentation.counters['embedding_deadline_exceeded'] == 1
+
+
+def test_rate_limited_query_is_retried_with_the_remaining_budget():
+    embeddings = StubEmbeddings(RateLimited())
+    processor = processor_with(embeddings)
+
+    with processor.instrumentation.trace('find_similar_animals') as trace:
+        assert processor._get_query_embedding('산책 좋아하는 아이', deadline=0.5, verbose=False) == [0.1, 0.2]
+    assert len(embeddings.calls) == 2
+    assert 0 < embeddings.calls[1]['timeout'] <= embeddings.calls[0]['timeout'] <= 0.5
+    assert trace.counters == {'api_retries': 1}
+
+
+def test_query_gives_up_after_one_retry():
+    embeddings = StubEmbeddings(RateLimited(), RateLimited(), RateLimited())
+    processor = processor_with(embeddings)
+
+    assert processor._get_query_embedding('조용한 아이', deadline=0.5, verbose=False) is None
+    assert len(embeddings.calls) == 2
+    assert processor.instrumentation.counters['api_failures'] == 1
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from embedding_processor import GPTEmbeddingProcessor
+from repair_queue import RepairQueue
+
+
+def test_repair_queue_counts_attempts_until_exhausted(tmp_path):
+    path = str(tmp_path / 'repair.pkl')
+    queue = RepairQueue(path, max_attempts=2)
+    queue.add(7, {'uid': 7}, 'text', 'timeout')
+    assert [entry['uid'] for entry in queue.pending()] == [7]
+
+    queue.add(7, {'uid': 7}, 'text', 'timeout')
+    assert queue.pending() == [] and len(queue.exhausted()) == 1
+    queue.save()
+
+    loaded = RepairQueue(path, max_attempts=2)
+    assert 7 in loaded and loaded.remove([7, 8]) == 1 and len(loaded) == 0
+
+
+def test_drain_repair_queue_returns_recovered_uids(tmp_path, monkeypatch):
+    processor = GPTEmbeddingProcessor(api_key='sk-test')
+    processor.repair_queue = RepairQueue(str(tmp_path / 'repair.pkl'))
+    for uid in (1, 2):
+        processor.repair_queue.add(uid, {'uid': uid, 'state': '임보가능', 'addinfo01': f'멍멍{uid}'}, '', 'timeout')
+
+    # uid 2는 다시 실패
+    def embed_texts_with_cache(texts):
+        return np.ones((len(texts), 4), dtype=np.float32), {1: 'timeout'}
+    monkeypatch.setattr(processor, 'embed_texts_with_cache', embed_texts_with_cache)
+
+    assert processor.drain_repair_queue() == [1]
+    assert processor.processed_df['uid'].tolist() == [1]
+    assert processor.repair_queue.uids() == [2]
+
+
+def test_rejected_input_is_not_retried_until_text_changes(tmp_path):
+    queue = RepairQueue(str(tmp_path / 'repair.pkl'))
+    queue.add(7, {'uid': 7}, 'text', 'BadRequestError: input too long', permanent=True)
+
+    assert queue.pending() == []
+    assert [entry['uid'] for entry in queue.exhausted()] == [7]
+    assert queue.permanently_failed(7, 'text')
+    assert not queue.permanently_failed(7, 'edited text')
+
+
+def test_failed_rows_are_classified_and_unchanged_rejections_skipped(tmp_path, monkeypatch):
+    processor = GPTEmbeddingProcessor(api_key='sk-test')
+    processor.repair_queue = RepairQueue(str(tmp_path / 'repair.pkl'))
+    rows = pd.DataFrame({'uid': [1, 2], 'state': '임보가능', 'addinfo01': ['멍멍1', '멍멍2']})
+
+    def embed_texts_with_cache(texts):
+        return (np.ones((len(texts), 4), dtype=np.float32),
+                {0: 'BadRequestError: Error code: 400 - input too long', 1: 'RateLimitError: rate limited'})
+    monkeypatch.setattr(processor, 'embed_texts_with_cache', embed_texts_with_cache)
+
+    processor.embed_dataframe(rows)
+    assert [entry['uid'] for entry in processor.repair_queue.pending()] == [2]
+
+    # 같은 내용이면 다시 임베딩하지 않고, 내용이 바뀌면 다시 시도
+    assert processor.changed_rows(rows)['uid'].tolist() == [2]
+    edited = rows.assign(addinfo01=['멍멍1 수정', '멍멍2'])
+    assert processor.changed_rows(edited)['uid'].tolist() == [1, 2]
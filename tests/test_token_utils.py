@@ -0,0 +1,36 @@
+from async_embedding import AsyncEmbeddingEngine, FakeEmbeddingBackend
+from token_utils import TokenEstimator, plan_embedding_requests
+
+
+LONG_TEXT = '사람을 좋아하는 활발한 아이입니다. ' * 2000
+
+
+def test_truncate_keeps_short_text_and_fits_the_limit():
+    estimator = TokenEstimator()
+    assert estimator.truncate('짧은 문장', 100) == '짧은 문장'
+
+    truncated = estimator.truncate(LONG_TEXT, 500)
+    assert LONG_TEXT.startswith(truncated)
+    assert 0 < estimator.count(truncated) <= 500
+
+
+def test_plan_truncates_oversized_inputs_before_packing():
+    texts = ['짧은 문장', LONG_TEXT]
+    plan = plan_embedding_requests(texts, max_tokens_per_input=500, max_tokens_per_request=100000,
+                                   max_inputs_per_request=10)
+
+    assert plan['truncated_inputs'] == [1]
+    assert plan['texts'][0] == texts[0]
+    assert max(plan['token_counts']) <= 500
+    assert plan['total_tokens'] == sum(plan['token_counts'])
+
+
+def test_engine_sends_truncated_text():
+    backend = FakeEmbeddingBackend(dimensions=8, latency=0, bad_inputs=[LONG_TEXT])
+    engine = AsyncEmbeddingEngine(model='fake', backend=backend, embedding_dim=8)
+    plan = plan_embedding_requests([LONG_TEXT], engine.estimator, max_tokens_per_input=500)
+
+    vectors, failed = engine.embed([LONG_TEXT], plan=plan)
+    assert failed == []
+    assert backend.requests == 1
+    assert vectors[0].any()